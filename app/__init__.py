@@ -2,14 +2,14 @@ from flask import Flask, render_template
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_login import LoginManager
-from flask_wtf.csrf import CSRFProtect
+from app.csrf_masking import MaskedCSRFProtect
 from config import Config
 
 # Initialize extensions
 db = SQLAlchemy()
 bcrypt = Bcrypt()
 login_manager = LoginManager()
-csrf = CSRFProtect()
+csrf = MaskedCSRFProtect()
 
 # Configure login manager
 login_manager.login_view = 'auth.login'
@@ -21,10 +21,26 @@ def create_app(config_class=Config):
 
     # Initialize core extensions
     db.init_app(app)
+    from app import sqlite_profile
+    sqlite_profile.init_app(app)
     bcrypt.init_app(app)
     login_manager.init_app(app)
     csrf.init_app(app)
 
+    from app import assets, compression, identity, images, metrics, passwords, profiling, scheduler, stats, tasks
+    from app import uploads  # noqa: F401  registers the upload reference counting hook
+    # First, so their after_request hooks run last and time the others too
+    profiling.init_app(app)
+    metrics.init_app(app)
+    identity.init_app(app)
+    stats.init_app(app)
+    passwords.init_app(app)
+    images.init_app(app)
+    assets.init_app(app)
+    compression.init_app(app)
+    scheduler.init_app(app)
+    tasks.init_app(app)  # registers its scheduled jobs
+
     # Register Blueprints
     from app.auth import auth as auth_bp
     app.register_blueprint(auth_bp, url_prefix='/auth')
@@ -38,6 +54,28 @@ def create_app(config_class=Config):
     from app.staff import staff as staff_bp
     app.register_blueprint(staff_bp, url_prefix='/staff')
 
+    # CLI commands
+    from app.schema import schema_cli
+    app.cli.add_command(schema_cli)
+    from app.stats import stats_cli
+    app.cli.add_command(stats_cli)
+    from app.tasks import tasks_cli
+    app.cli.add_command(tasks_cli)
+    from app.scheduler import jobs_cli
+    app.cli.add_command(jobs_cli)
+    from app.images import images_cli
+    app.cli.add_command(images_cli)
+    from app.uploads import uploads_cli
+    app.cli.add_command(uploads_cli)
+    from app.assets import assets_cli
+    app.cli.add_command(assets_cli)
+    from app.assignment import assign_cli
+    app.cli.add_command(assign_cli)
+    from app.export import export_cli
+    app.cli.add_command(export_cli)
+    from app.seed import seed_cli
+    app.cli.add_command(seed_cli)
+
     # Error handlers
     @app.errorhandler(404)
     def not_found(error):
@@ -1,12 +1,16 @@
-from flask import Blueprint, render_template, url_for, flash, redirect, request, abort, jsonify
+from flask import Blueprint, current_app, render_template, stream_with_context, url_for, flash, redirect, request, abort, jsonify
 from flask_login import current_user, login_required
 from app import db
 from app.models import Complaint, User
+from app import stats as complaint_stats
+from app import search as complaint_search
+from app import bulk as complaint_bulk
+from app import assignment
+from app import export as complaint_export
 from functools import wraps
-from sqlalchemy import func
-from flask_paginate import Pagination, get_page_parameter
-from datetime import datetime
-import json
+from sqlalchemy.orm import joinedload
+from app.pagination import paginate
+from datetime import datetime, timedelta
 
 admin = Blueprint('admin', __name__)
 
@@ -30,56 +34,153 @@ def dashboard():
     category_filter = request.args.get('category')
     search = request.args.get('search', '')
 
-    page = request.args.get(get_page_parameter(), type=int, default=1)
     per_page = 10
 
-    query = Complaint.query.filter(Complaint.is_deleted == False)
+    # Authors and assignees are rendered on every row; join them in up front
+    query = Complaint.query.filter(Complaint.is_deleted == False).options(
+        joinedload(Complaint.author).load_only(User.username),
+        joinedload(Complaint.assignee).load_only(User.username)
+    )
 
     if status_filter:
         query = query.filter_by(status=status_filter)
     if category_filter:
         query = query.filter_by(category=category_filter)
-    if search:
-        query = query.filter(Complaint.title.contains(search))
 
-    complaints = query.order_by(Complaint.date_posted.desc()).paginate(page=page, per_page=per_page, error_out=False)
-    pagination = Pagination(page=page, total=complaints.total, per_page=per_page, css_framework='bootstrap5')
+    if search:
+        query = complaint_search.apply(query, search)
+        pagination = paginate(query, per_page=per_page, ranked=True)
+    else:
+        # Totals come from the statistics counters instead of a COUNT(*)
+        total = complaint_stats.live_count(status_filter, category_filter)
+        pagination = paginate(query, per_page=per_page, total=total)
+    snippets = complaint_search.snippets((c.id for c in pagination.items), search)
 
     # Get staff members for assignment dropdown - filter to asmedu.org only
     staff_members = User.query.filter_by(role='staff').filter(User.email.endswith('@asmedu.org')).all()
+    # Open complaints each of them holds, from one grouped query (cached briefly)
+    staff_open = assignment.open_counts()
 
-    # Analytics - Status breakdown
-    total_complaints = Complaint.query.filter(Complaint.is_deleted == False).count()
-    pending_count = Complaint.query.filter(Complaint.status == 'Pending', Complaint.is_deleted == False).count()
-    in_progress_count = Complaint.query.filter(Complaint.status == 'In Progress', Complaint.is_deleted == False).count()
-    resolved_count = Complaint.query.filter(Complaint.status == 'Resolved', Complaint.is_deleted == False).count()
-
-    # Analytics - Category breakdown
-    category_data = db.session.query(
-        Complaint.category,
-        func.count(Complaint.id).label('count')
-    ).filter(Complaint.is_deleted == False).group_by(Complaint.category).all()
-
-    # Convert to JSON-safe dict for Chart.js
-    status_counts = {
-        "Pending": pending_count,
-        "In Progress": in_progress_count,
-        "Resolved": resolved_count
-    }
-
-    category_counts = {item[0]: item[1] for item in category_data}
-
-    # Convert to JSON strings for template
-    status_counts_json = json.dumps(status_counts)
-    category_counts_json = json.dumps(category_counts)
+    # Summary cards - served from the incrementally maintained counters;
+    # the charts fetch their data from api_stats
+    status_counts, category_counts = complaint_stats.dashboard_counts()
+    total_complaints = sum(status_counts.values())
+    pending_count = status_counts['Pending']
+    in_progress_count = status_counts['In Progress']
+    resolved_count = status_counts['Resolved']
 
     return render_template('admin/dashboard.html', title='Admin Dashboard',
-                           complaints=complaints, staff_members=staff_members,
-                           pagination=pagination, total_complaints=total_complaints,
+                           complaints=pagination.items, staff_members=staff_members, staff_open=staff_open,
+                           pagination=pagination, search=search, snippets=snippets,
+                           total_complaints=total_complaints,
                            pending_count=pending_count, in_progress_count=in_progress_count,
-                           resolved_count=resolved_count,
-                           status_counts_json=status_counts_json,
-                           category_counts_json=category_counts_json)
+                           resolved_count=resolved_count)
+
+@admin.route("/api/stats")
+@admin_required
+def api_stats():
+    """Status and category breakdown for the dashboard charts, as JSON.
+
+    ``?days=N`` restricts it to complaints posted in the last N days.
+    """
+    days = None
+    if request.args.get('days'):
+        days = request.args.get('days', type=int)
+        if days is None or not 1 <= days <= current_app.config.get('STATS_WINDOW_MAX_DAYS', 365):
+            abort(400)
+
+    breakdown = complaint_stats.breakdown(days)
+    response = current_app.response_class(breakdown.body, mimetype='application/json')
+    response.set_etag(breakdown.etag)
+    response.cache_control.private = True
+    response.cache_control.max_age = current_app.config.get('STATS_CACHE_TTL', 30)
+    return response.make_conditional(request)
+
+@admin.route("/bulk", methods=['POST'])
+@admin_required
+def bulk_action():
+    """Assign, re-status or soft delete many complaints in one transaction.
+
+    Targets are the posted ``ids``, or with ``scope=filter`` every live
+    complaint matching ``filter_status``/``filter_category``/``filter_search``.
+    JSON clients get the per-id results back; the dashboard form gets a
+    flash summary and is sent back to the same filtered view.
+    """
+    if request.is_json:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not isinstance(data.get('ids') or [], list):
+            return jsonify(error='Send a JSON object whose "ids" is a list.'), 400
+        ids = data.get('ids') or []
+    else:
+        data = request.form
+        ids = data.getlist('ids')
+    wants_json = request.is_json or request.accept_mimetypes.best == 'application/json'
+    filters = {name: data.get(f'filter_{name}') or None for name in ('status', 'category', 'search')}
+    action = data.get('action')
+
+    try:
+        if action == 'delete' and data.get('confirm') != 'yes':
+            raise complaint_bulk.BulkError('Deletion not confirmed.')
+        if data.get('scope') == 'filter':
+            ids = complaint_bulk.select_ids(**filters)
+        result = complaint_bulk.apply(action, ids, current_user.id,
+                                      staff_id=data.get('staff_id'), status=data.get('status'))
+    except complaint_bulk.BulkError as exc:
+        if wants_json:
+            return jsonify(error=str(exc)), 400
+        flash(str(exc), 'warning')
+    else:
+        if wants_json:
+            return jsonify(result.as_dict())
+        counts = result.counts
+        flash(f'{counts[complaint_bulk.UPDATED]} complaints updated, '
+              f'{counts[complaint_bulk.UNCHANGED]} unchanged, '
+              f'{counts[complaint_bulk.NOT_FOUND]} not found.', 'success')
+    return redirect(url_for('admin.dashboard', **{k: v for k, v in filters.items() if v}))
+
+@admin.route("/export/<dataset>.<fmt>")
+@admin_required
+def export(dataset, fmt):
+    """Stream complaints (with the dashboard filters) or their history as CSV or NDJSON.
+
+    For incremental pulls send back the ``Last-Modified`` of the previous
+    export as ``If-Modified-Since`` (or pass ``?since=<ISO time>``): the
+    response then holds only what changed since, or is a 304.
+    ``Last-Modified`` is set ``EXPORT_SAFETY_MARGIN`` seconds before the
+    export started: a row stamped earlier but committed after the export
+    read the table is then sent again next time instead of never.
+    """
+    if dataset not in complaint_export.DATASETS or fmt not in complaint_export.FORMATS:
+        abort(404)
+    filters = {}
+    if dataset == 'complaints':
+        filters = {name: request.args.get(name) or None for name in ('status', 'category', 'search')}
+
+    since = request.if_modified_since
+    if since is not None:
+        since = since.replace(tzinfo=None)  # stored times are naive UTC
+    if request.args.get('since'):
+        try:
+            since = datetime.fromisoformat(request.args['since'])
+        except ValueError:
+            abort(400)
+
+    exported_at = datetime.utcnow().replace(microsecond=0)
+    if since is not None and not complaint_export.has_changes(dataset, since, **filters):
+        response = current_app.response_class(status=304)
+        response.last_modified = since
+        return response
+
+    response = current_app.response_class(
+        stream_with_context(complaint_export.generate(dataset, fmt, since=since, **filters)),
+        mimetype=complaint_export.FORMATS[fmt],
+    )
+    response.last_modified = exported_at - timedelta(seconds=current_app.config.get('EXPORT_SAFETY_MARGIN', 60))
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.headers['Content-Disposition'] = (
+        f'attachment; filename="{dataset}-{exported_at:%Y%m%dT%H%M%S}.{fmt}"')
+    return response
 
 @admin.route("/assign/<int:complaint_id>", methods=['POST'])
 @admin_required
@@ -100,6 +201,7 @@ def assign_staff(complaint_id):
 
         complaint.assigned_to = staff_user.id
         complaint.status = 'In Progress'
+        complaint_stats.invalidate_on_commit(db.session)  # the dropdowns' open counts change too
         db.session.commit()
 
         flash(f'Complaint assigned to {staff_user.username} successfully!', 'success')
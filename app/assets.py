@@ -0,0 +1,200 @@
+"""Fingerprinted, precompressed static assets.
+
+``flask assets build`` downloads the pinned front-end libraries into
+``static/vendor`` if they are missing, then copies every CSS/JS file under
+``static`` to ``static/dist`` with a content hash in its name, writes
+``.gz`` (and, with the ``brotli`` package, ``.br``) siblings, and records
+the mapping in ``static/dist/manifest.json``.
+
+Templates call ``asset_url('css/style.css')``. With a manifest, that is the
+fingerprinted file, served with a year-long immutable ``Cache-Control`` and
+the best precompressed encoding the browser accepts. Without one (or in
+debug mode) the plain static file is used, and a library that has not been
+vendored yet falls back to its pinned CDN URL.
+"""
+import gzip
+import hashlib
+import json
+import os
+import urllib.request
+
+import click
+from flask import Blueprint, abort, current_app, request, send_from_directory, url_for
+from flask.cli import AppGroup
+
+try:
+    import brotli
+except ImportError:  # .br files are optional; gzip is always generated
+    brotli = None
+
+# Vendored library -> pinned upstream URL
+VENDORED = {
+    'vendor/bootstrap/bootstrap.min.css':
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css',
+    'vendor/bootstrap/bootstrap.bundle.min.js':
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js',
+    'vendor/chart.js/chart.umd.js':
+        'https://cdn.jsdelivr.net/npm/chart.js@4.4.0/dist/chart.umd.js',
+}
+
+DIST = 'dist'
+MANIFEST = 'manifest.json'
+_EXTENSIONS = ('.css', '.js')
+_MAX_AGE = 365 * 24 * 3600
+
+# Content-Encoding -> file suffix, in order of preference
+_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+assets = Blueprint('assets', __name__)
+
+
+def init_app(app):
+    app.extensions['assets'] = load_manifest(app.static_folder)
+    app.register_blueprint(assets)
+
+    @app.context_processor
+    def _asset_helpers():
+        return {'asset_url': asset_url}
+
+
+def load_manifest(static_folder):
+    try:
+        with open(os.path.join(static_folder, DIST, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def asset_url(name):
+    """URL of the static asset ``name`` (a path relative to ``static``)."""
+    manifest = current_app.extensions.get('assets') or {}
+    if name in manifest and not current_app.debug:
+        return url_for('assets.fingerprinted', filename=manifest[name])
+    if name in VENDORED and not os.path.exists(os.path.join(current_app.static_folder, name)):
+        return VENDORED[name]
+    return url_for('static', filename=name)
+
+
+@assets.route('/static/dist/<path:filename>')
+def fingerprinted(filename):
+    """Serve a fingerprinted asset, precompressed when the client allows it."""
+    folder = os.path.join(current_app.static_folder, DIST)
+    if filename == MANIFEST:
+        abort(404)
+    accepted = request.accept_encodings
+    for encoding, suffix in _ENCODINGS:
+        if accepted[encoding] and os.path.exists(os.path.join(folder, filename + suffix)):
+            # Typed as the asset itself, not as the compressed file
+            response = send_from_directory(folder, filename + suffix, mimetype=_mimetype(filename),
+                                           max_age=_MAX_AGE)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(folder, filename, mimetype=_mimetype(filename), max_age=_MAX_AGE)
+    response.vary.add('Accept-Encoding')
+    response.cache_control.immutable = True
+    return response
+
+
+def _mimetype(filename):
+    return 'text/css' if filename.endswith('.css') else 'text/javascript'
+
+
+def _write(path, data):
+    with open(path + '.part', 'wb') as f:
+        f.write(data)
+    os.replace(path + '.part', path)
+
+
+def vendor(static_folder, fetch=urllib.request.urlopen):
+    """Download the pinned libraries missing from ``static/vendor``.
+
+    Returns ``(fetched, failed)``, where ``failed`` maps names to errors.
+    """
+    fetched, failed = [], {}
+    for name, url in VENDORED.items():
+        target = os.path.join(static_folder, name)
+        if os.path.exists(target):
+            continue
+        try:
+            with fetch(url, timeout=30) as response:
+                data = response.read()
+        except OSError as exc:
+            failed[name] = exc
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        _write(target, data)
+        fetched.append(name)
+    return fetched, failed
+
+
+def build(static_folder):
+    """Fingerprint and precompress every asset; returns the new manifest."""
+    dist = os.path.join(static_folder, DIST)
+    manifest = {}
+    for root, dirs, files in os.walk(static_folder):
+        if os.path.abspath(root) == os.path.abspath(dist):
+            dirs[:] = []
+            continue
+        dirs.sort()
+        for filename in sorted(files):
+            if not filename.endswith(_EXTENSIONS):
+                continue
+            source = os.path.join(root, filename)
+            name = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                data = f.read()
+            stem, extension = os.path.splitext(name)
+            fingerprinted = f'{stem}.{hashlib.sha256(data).hexdigest()[:12]}{extension}'
+            target = os.path.join(dist, fingerprinted)
+            manifest[name] = fingerprinted
+            if os.path.exists(target):
+                continue  # same content was built before
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            _write(target, data)
+            _write(target + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                _write(target + '.br', brotli.compress(data, quality=11))
+
+    os.makedirs(dist, exist_ok=True)
+    _write(os.path.join(dist, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+
+def prune(static_folder, manifest):
+    """Delete built files that ``manifest`` no longer refers to; returns how many."""
+    dist = os.path.join(static_folder, DIST)
+    keep = {MANIFEST}
+    for fingerprinted in manifest.values():
+        keep.update({fingerprinted, fingerprinted + '.gz', fingerprinted + '.br'})
+    removed = 0
+    for root, _, files in os.walk(dist):
+        for filename in files:
+            path = os.path.join(root, filename)
+            if os.path.relpath(path, dist).replace(os.sep, '/') not in keep:
+                os.unlink(path)
+                removed += 1
+    return removed
+
+
+assets_cli = AppGroup('assets', help='Build the fingerprinted static assets.')
+
+
+@assets_cli.command('build')
+@click.option('--no-vendor', is_flag=True, help='Do not download missing vendored libraries.')
+@click.option('--prune', 'prune_old', is_flag=True,
+              help='Remove builds of older versions (keep them during rolling deploys).')
+def build_command(no_vendor, prune_old):
+    """Vendor libraries, fingerprint and precompress assets, write the manifest."""
+    static_folder = current_app.static_folder
+    if not no_vendor:
+        fetched, failed = vendor(static_folder)
+        for name in fetched:
+            click.echo(f'Vendored {name}')
+        for name, exc in failed.items():
+            click.echo(f'Could not download {name} ({exc}); pages keep loading it from the CDN.')
+    manifest = build(static_folder)
+    click.echo(f'Built {len(manifest)} assets'
+               + ('' if brotli is not None else ' (gzip only: install brotli for .br files)') + '.')
+    if prune_old:
+        click.echo(f'Pruned {prune(static_folder, manifest)} old files.')
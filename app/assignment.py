@@ -0,0 +1,372 @@
+"""Workload-aware automatic assignment of complaints to staff.
+
+A complaint goes to the staff member with the lightest open workload
+among those who handle its category. Workload is the number of open
+(unresolved, live) complaints a person holds, each weighted by its
+priority through ``ASSIGNMENT_PRIORITY_WEIGHTS``. All workloads come from
+one grouped query over the open-complaints partial index, whatever the
+number of staff.
+
+``ASSIGNMENT_SKILLS`` maps a category to the usernames that handle it.
+Staff listed under no category are generalists. They take the categories
+that have nobody listed, or whose listed people no longer exist.
+
+The engine is used in three places:
+
+* on create, in ``student.new_complaint``, when ``AUTO_ASSIGN_ON_CREATE`` is set;
+* in batch, with ``flask assign rebalance``;
+* in ``flask assign simulate``, which replays past complaints and compares
+  the resulting queue lengths with what actually happened.
+
+Assigning works like the admin's assign button: a Pending complaint moves
+to In Progress, and every assignment leaves a history row. Other statuses,
+such as Escalated, are kept.
+"""
+import heapq
+import statistics
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import func, insert, select, update
+
+from app import db
+from app import stats
+from app.models import Complaint, ComplaintHistory, User
+from app.tasks import ESCALATED
+
+DEFAULT_WEIGHTS = {'High': 3, 'Medium': 2, 'Low': 1}
+
+AUTO_ASSIGN_NOTE = 'Auto-assigned to {username} by workload.'
+
+_CHUNK = 500
+
+
+class Balancer:
+    """In-memory workload table that picks the least loaded eligible staff member."""
+
+    def __init__(self, staff, skills=None, weights=None, loads=None, counts=None):
+        self.staff = dict(staff)  # {id: username}
+        self.weights = weights or DEFAULT_WEIGHTS
+        self.loads = Counter({staff_id: 0 for staff_id in self.staff})
+        self.loads.update(loads or {})
+        self.counts = Counter({staff_id: 0 for staff_id in self.staff})
+        self.counts.update(counts or {})
+
+        by_name = {username: staff_id for staff_id, username in self.staff.items()}
+        self.skills = {}
+        listed = set()
+        for category, usernames in (skills or {}).items():
+            ids = [by_name[name] for name in usernames if name in by_name]
+            if ids:
+                self.skills[category] = ids
+                listed.update(ids)
+        self.generalists = [staff_id for staff_id in self.staff if staff_id not in listed] or list(self.staff)
+
+    def weight(self, priority):
+        return self.weights.get(priority, 1)
+
+    def candidates(self, category):
+        return self.skills.get(category, self.generalists)
+
+    def pick(self, category, exclude=None):
+        """Id of the least loaded staff member for ``category``, or ``None``.
+
+        Ties go to the one holding fewer complaints, then the lowest id.
+        """
+        candidates = [staff_id for staff_id in self.candidates(category) if staff_id != exclude]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda staff_id: (self.loads[staff_id], self.counts[staff_id], staff_id))
+
+    def add(self, staff_id, priority):
+        self.loads[staff_id] += self.weight(priority)
+        self.counts[staff_id] += 1
+
+    def remove(self, staff_id, priority):
+        if staff_id in self.staff:
+            self.loads[staff_id] -= self.weight(priority)
+            self.counts[staff_id] -= 1
+
+
+def _open_filter():
+    return (Complaint.is_deleted == False, Complaint.status != 'Resolved')
+
+
+def staff_members():
+    """``{id: username}`` of every staff account."""
+    return dict(db.session.execute(
+        select(User.id, User.username).where(User.role == 'staff').order_by(User.id)
+    ).all())
+
+
+def open_workloads():
+    """``{staff_id: {priority: open complaints}}`` from one grouped query."""
+    rows = db.session.execute(
+        select(Complaint.assigned_to, Complaint.priority, func.count(Complaint.id))
+        .where(*_open_filter(), Complaint.assigned_to.isnot(None))
+        .group_by(Complaint.assigned_to, Complaint.priority)
+    ).all()
+    workloads = defaultdict(dict)
+    for staff_id, priority, count in rows:
+        workloads[staff_id][priority] = count
+    return workloads
+
+
+def open_counts():
+    """``{staff_id: open complaints}`` for the admin dashboard's assign dropdowns.
+
+    On a large table the grouped count is most of the dashboard's time and
+    the figure is only a hint, so it is kept in the stats cache for up to
+    ``STATS_CACHE_TTL`` seconds.
+    """
+    return stats.cached('open_counts', lambda: {
+        staff_id: sum(priorities.values()) for staff_id, priorities in open_workloads().items()
+    })
+
+
+def build_balancer(staff=None):
+    """A ``Balancer`` loaded with the current staff and their open workloads."""
+    config = current_app.config
+    staff = staff_members() if staff is None else staff
+    weights = config.get('ASSIGNMENT_PRIORITY_WEIGHTS') or DEFAULT_WEIGHTS
+    loads, counts = Counter(), Counter()
+    for staff_id, priorities in open_workloads().items():
+        if staff_id in staff:
+            for priority, count in priorities.items():
+                loads[staff_id] += weights.get(priority, 1) * count
+                counts[staff_id] += count
+    return Balancer(staff, config.get('ASSIGNMENT_SKILLS') or {}, weights, loads, counts)
+
+
+def auto_assign(complaint):
+    """Assign a new, unsaved complaint to the least loaded eligible staff member.
+
+    The complaint moves to In Progress and gets a history row, as when an
+    admin assigns it. Returns the staff id, or ``None`` when there is no
+    staff to assign to. The caller commits.
+    """
+    balancer = build_balancer()
+    staff_id = balancer.pick(complaint.category)
+    if staff_id is not None:
+        old_status = complaint.status or 'Pending'
+        complaint.assigned_to = staff_id
+        complaint.status = _assigned_status(old_status)
+        complaint.history.append(ComplaintHistory(
+            old_status=old_status, new_status=complaint.status, changed_by=None,
+            notes=AUTO_ASSIGN_NOTE.format(username=balancer.staff[staff_id])))
+    return staff_id
+
+
+def _assigned_status(status):
+    return 'In Progress' if status == 'Pending' else status
+
+
+@dataclass
+class RebalanceReport:
+    dry_run: bool
+    assigned: Counter = field(default_factory=Counter)  # {username: complaints}
+    skipped: int = 0  # no eligible staff member
+
+    @property
+    def total(self):
+        return sum(self.assigned.values())
+
+
+def rebalance(include_escalated=False, dry_run=False, now=None):
+    """Assign every open unassigned complaint; returns a ``RebalanceReport``.
+
+    With ``include_escalated`` escalated complaints are also moved to
+    someone other than their current assignee; those nobody else can take
+    are left where they are and counted as skipped. Complaints
+    are handled highest priority first, oldest first, so urgent ones get
+    the lightest queues. The writes are one ``UPDATE ... WHERE id IN`` per
+    staff member and new status, and a single history insert.
+    """
+    now = now or datetime.utcnow()
+    balancer = build_balancer()
+    report = RebalanceReport(dry_run=dry_run)
+
+    targets = Complaint.assigned_to.is_(None)
+    if include_escalated:
+        targets = targets | (Complaint.status == ESCALATED)
+    rows = db.session.execute(
+        select(Complaint.id, Complaint.category, Complaint.priority, Complaint.status, Complaint.assigned_to)
+        .where(*_open_filter(), targets)
+        .order_by(Complaint.date_posted, Complaint.id)
+        .with_for_update()
+    ).all()
+    rows.sort(key=lambda row: -balancer.weight(row.priority))  # stable: oldest first within a priority
+
+    moves = defaultdict(list)  # {(staff_id, new status): [complaint ids]}
+    history = []
+    deltas = Counter()
+    for row in rows:
+        staff_id = balancer.pick(row.category, exclude=row.assigned_to)
+        if staff_id is None:
+            report.skipped += 1
+            continue
+        if row.assigned_to is not None:
+            balancer.remove(row.assigned_to, row.priority)
+        balancer.add(staff_id, row.priority)
+        new_status = _assigned_status(row.status)
+        moves[staff_id, new_status].append(row.id)
+        report.assigned[balancer.staff[staff_id]] += 1
+        if new_status != row.status:
+            deltas[stats.stat_key(row.status, row.category, False)] -= 1
+            deltas[stats.stat_key(new_status, row.category, False)] += 1
+        history.append({'complaint_id': row.id, 'date_changed': now, 'old_status': row.status,
+                        'new_status': new_status, 'changed_by': None,
+                        'notes': AUTO_ASSIGN_NOTE.format(username=balancer.staff[staff_id])})
+
+    if dry_run or not history:
+        db.session.rollback()
+        return report
+    try:
+        for (staff_id, new_status), ids in moves.items():
+            for start in range(0, len(ids), _CHUNK):
+                db.session.execute(update(Complaint.__table__)
+                                   .where(Complaint.id.in_(ids[start:start + _CHUNK]))
+                                   .values(assigned_to=staff_id, status=new_status))
+        db.session.execute(insert(ComplaintHistory.__table__), history)
+        stats.apply_deltas(db.session.connection(), deltas)
+        stats.invalidate_on_commit(db.session)  # the dropdowns' open counts change too
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return report
+
+
+@dataclass
+class QueueStats:
+    """Distribution of per-staff open queue lengths, sampled at every arrival."""
+    strategy: str
+    samples: list = field(default_factory=list)
+    spreads: list = field(default_factory=list)  # longest minus shortest queue
+
+    def percentile(self, values, pct):
+        if not values:
+            return 0
+        values = sorted(values)
+        return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+    def summary(self):
+        return {
+            'p50': self.percentile(self.samples, 50),
+            'p95': self.percentile(self.samples, 95),
+            'max': max(self.samples, default=0),
+            'mean_spread': statistics.fmean(self.spreads) if self.spreads else 0.0,
+        }
+
+
+def _resolution_times(since):
+    """``{complaint_id: first time it was marked Resolved}`` from the history."""
+    return dict(db.session.execute(
+        select(ComplaintHistory.complaint_id, func.min(ComplaintHistory.date_changed))
+        .join(Complaint, Complaint.id == ComplaintHistory.complaint_id)
+        .where(ComplaintHistory.new_status == 'Resolved', Complaint.date_posted >= since)
+        .group_by(ComplaintHistory.complaint_id)
+    ).all())
+
+
+def simulate(since, service_time=timedelta(days=3)):
+    """Replay the complaints posted since ``since`` and compare assignment strategies.
+
+    Each complaint arrives at its ``date_posted`` and leaves its queue when
+    it was first marked Resolved. A complaint that is resolved but has no
+    history row is assumed to take ``service_time``. Returns a list of
+    ``QueueStats``, one for the historical assignees and one for this engine.
+    The engine starts from empty queues and ignores today's workloads.
+    """
+    staff = staff_members()
+    if not staff:
+        return []
+    config = current_app.config
+    engine = Balancer(staff, config.get('ASSIGNMENT_SKILLS') or {},
+                      config.get('ASSIGNMENT_PRIORITY_WEIGHTS') or DEFAULT_WEIGHTS)
+    resolved_at = _resolution_times(since)
+    strategies = {'historical': (QueueStats('historical'), Counter(), []),
+                  'workload': (QueueStats('workload'), Counter(), [])}
+
+    rows = db.session.execute(
+        select(Complaint.id, Complaint.date_posted, Complaint.category, Complaint.priority,
+               Complaint.status, Complaint.assigned_to)
+        .where(Complaint.is_deleted == False, Complaint.date_posted >= since)
+        .order_by(Complaint.date_posted, Complaint.id)
+        .execution_options(yield_per=1000)
+    )
+    for row in rows:
+        done = resolved_at.get(row.id)
+        if done is None and row.status == 'Resolved':
+            done = row.date_posted + service_time
+
+        for name, (queue_stats, queues, pending) in strategies.items():
+            # Complaints resolved before this arrival leave their queues first
+            while pending and pending[0][0] <= row.date_posted:
+                _, _, staff_id, priority = heapq.heappop(pending)
+                queues[staff_id] -= 1
+                if name == 'workload':
+                    engine.remove(staff_id, priority)
+
+            if name == 'historical':
+                staff_id = row.assigned_to if row.assigned_to in staff else None
+            else:
+                staff_id = engine.pick(row.category)
+                if staff_id is not None:
+                    engine.add(staff_id, row.priority)
+            if staff_id is None:
+                continue
+            queues[staff_id] += 1
+            if done is not None:
+                heapq.heappush(pending, (done, row.id, staff_id, row.priority))
+            lengths = [queues[member] for member in staff]
+            queue_stats.samples.extend(lengths)
+            queue_stats.spreads.append(max(lengths) - min(lengths))
+    db.session.rollback()
+    return [queue_stats for queue_stats, _, _ in strategies.values()]
+
+
+assign_cli = AppGroup('assign', help='Route complaints to staff by skill and workload.')
+
+
+@assign_cli.command('workload')
+def workload_command():
+    """Show each staff member's open complaints and weighted load."""
+    balancer = build_balancer()
+    db.session.rollback()
+    for staff_id, username in balancer.staff.items():
+        click.echo(f'{username}: {balancer.counts[staff_id]} open, load {balancer.loads[staff_id]}')
+
+
+@assign_cli.command('rebalance')
+@click.option('--escalated', is_flag=True, help='Also move escalated complaints to a different staff member.')
+@click.option('--dry-run', is_flag=True, help='Only report what would be assigned.')
+def rebalance_command(escalated, dry_run):
+    """Assign open unassigned complaints to the least loaded eligible staff."""
+    report = rebalance(include_escalated=escalated, dry_run=dry_run)
+    verb = 'Would assign' if dry_run else 'Assigned'
+    click.echo(f'{verb} {report.total} complaints' + (f', {report.skipped} without eligible staff' if report.skipped
+                                                        else '') + '.')
+    for username, count in sorted(report.assigned.items()):
+        click.echo(f'  {username}: {count}')
+
+
+@assign_cli.command('simulate')
+@click.option('--days', type=int, default=90, show_default=True, help='Replay complaints posted in the last N days.')
+@click.option('--service-days', type=float, default=3.0, show_default=True,
+              help='Assumed handling time of resolved complaints without history.')
+def simulate_command(days, service_days):
+    """Replay past complaints and compare queue lengths per strategy."""
+    results = simulate(datetime.utcnow() - timedelta(days=days), timedelta(days=service_days))
+    if not results:
+        click.echo('No staff accounts to simulate.')
+        return
+    click.echo(f"{'strategy':<10} | {'p50':>4} | {'p95':>4} | {'max':>4} | {'mean spread':>11}")
+    for queue_stats in results:
+        summary = queue_stats.summary()
+        click.echo(f"{queue_stats.strategy:<10} | {summary['p50']:>4} | {summary['p95']:>4} | "
+                   f"{summary['max']:>4} | {summary['mean_spread']:>11.2f}")
@@ -1,6 +1,8 @@
 import re
 from flask import Blueprint, render_template, url_for, flash, redirect, request, current_app
-from app import db, bcrypt
+from app import db
+from app import passwords
+from app.passwords import PasswordHasherBusy
 from app.models import User
 from flask_login import login_user, current_user, logout_user, login_required
 
@@ -46,7 +48,11 @@ def register():
             return redirect(url_for('auth.register'))
 
         # Create new user
-        hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
+        try:
+            hashed_password = passwords.hash_password(password)
+        except PasswordHasherBusy:
+            flash('The server is busy right now. Please try again in a moment.', 'warning')
+            return render_template('auth/register.html', title='Register'), 503
         user = User(username=username, email=email, password=hashed_password, role='student')
         db.session.add(user)
         db.session.commit()
@@ -70,7 +76,21 @@ def login():
         password = request.form.get('password')
         user = User.query.filter_by(email=email).first()
 
-        if user and bcrypt.check_password_hash(user.password, password):
+        try:
+            valid = user is not None and passwords.check_password(user.password, password)
+        except PasswordHasherBusy:
+            flash('The server is busy right now. Please try again in a moment.', 'warning')
+            return render_template('auth/login.html', title='Login'), 503
+
+        if valid:
+            # Bring hashes made with an old work factor up to BCRYPT_LOG_ROUNDS
+            if passwords.needs_rehash(user.password):
+                try:
+                    user.password = passwords.hash_password(password)
+                    db.session.commit()
+                except PasswordHasherBusy:
+                    pass  # Try again on the next login
+
             remember_val = bool(request.form.get('remember'))
             login_user(user, remember=remember_val)
             next_page = request.args.get('next')
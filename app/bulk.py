@@ -0,0 +1,174 @@
+"""Set-based bulk operations for the admin dashboard.
+
+An admin can assign, re-status or soft delete many complaints in one POST,
+chosen by id or by the dashboard filters. Each operation is a single
+transaction that:
+
+* takes the write lock and then reads the targets once (``FOR UPDATE``
+  where the database supports it),
+* writes all history rows with one ``executemany`` insert,
+* changes the complaints with ``UPDATE ... WHERE id IN`` in chunks, and
+* applies the matching counter deltas.
+
+No complaint is loaded into the session. The caller gets back the outcome
+for every id it asked about.
+"""
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import false, insert, select, update
+
+from app import db
+from app import search as complaint_search
+from app import stats
+from app.models import Complaint, ComplaintHistory, User
+from app.tasks import ESCALATED
+
+ACTIONS = ('assign', 'status', 'delete')
+STATUSES = ('Pending', 'In Progress', 'Resolved', ESCALATED)
+
+# Per-id outcomes
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+NOT_FOUND = 'not_found'
+
+_CHUNK = 500  # ids per IN (...) list, well below SQLite's bound parameter limit
+
+
+class BulkError(ValueError):
+    """The request cannot be applied as a whole; nothing was written."""
+
+
+@dataclass
+class BulkResult:
+    """Outcome of one bulk operation, per complaint id in request order."""
+    action: str
+    results: dict = field(default_factory=dict)
+
+    @property
+    def counts(self):
+        return Counter(self.results.values())
+
+    def as_dict(self):
+        return {'action': self.action, 'counts': dict(self.counts),
+                'results': {str(complaint_id): outcome for complaint_id, outcome in self.results.items()}}
+
+
+def _chunks(ids):
+    for start in range(0, len(ids), _CHUNK):
+        yield ids[start:start + _CHUNK]
+
+
+def _max_items():
+    return current_app.config.get('BULK_MAX_ITEMS', 1000)
+
+
+def select_ids(status=None, category=None, search=None):
+    """Ids of the live complaints matching the dashboard filters.
+
+    Raises ``BulkError`` when more than ``BULK_MAX_ITEMS`` complaints match.
+    """
+    query = Complaint.query.filter(Complaint.is_deleted == False)
+    if status:
+        query = query.filter_by(status=status)
+    if category:
+        query = query.filter_by(category=category)
+    if search:
+        query = complaint_search.apply(query, search)
+    limit = _max_items()
+    ids = [row.id for row in query.with_entities(Complaint.id).limit(limit + 1)]
+    if len(ids) > limit:
+        raise BulkError(f'The filter matches more than {limit} complaints; narrow it down first.')
+    return ids
+
+
+def _changes(action, staff_id, status):
+    """Return ``(values, note)`` for the UPDATE, validating the parameters."""
+    if action == 'assign':
+        try:
+            staff = db.session.get(User, int(staff_id)) if staff_id else None
+        except (TypeError, ValueError):
+            staff = None
+        if staff is None or staff.role != 'staff':
+            raise BulkError('Invalid staff selected.')
+        return {'assigned_to': staff.id, 'status': 'In Progress'}, f'Assigned to {staff.username}.'
+    if action == 'status':
+        if status not in STATUSES:
+            raise BulkError('Invalid status selected.')
+        return {'status': status}, f'Status set to {status}.'
+    if action == 'delete':
+        return {'is_deleted': True}, 'Deleted.'
+    raise BulkError('Unknown bulk action.')
+
+
+def _load_targets(ids):
+    # SQLite ignores FOR UPDATE and runs a SELECT outside any transaction.
+    # An UPDATE that matches no row still takes the write lock, so no other
+    # writer can change the rows between this read and our own UPDATE.
+    db.session.execute(update(Complaint.__table__).where(false()).values(id=Complaint.id))
+    rows = {}
+    for chunk in _chunks(ids):
+        rows.update((row.id, row) for row in db.session.execute(
+            select(Complaint.id, Complaint.status, Complaint.category, Complaint.assigned_to)
+            .where(Complaint.id.in_(chunk), Complaint.is_deleted == False)
+            .with_for_update()
+        ))
+    return rows
+
+
+def apply(action, ids, actor_id, staff_id=None, status=None, now=None):
+    """Apply ``action`` to the complaints in ``ids``; returns a ``BulkResult``.
+
+    Deleted or missing complaints are reported as ``not_found`` and complaints
+    already in the requested state as ``unchanged``; neither gets a history row.
+    """
+    try:
+        ids = list(dict.fromkeys(int(complaint_id) for complaint_id in ids))
+    except (TypeError, ValueError):
+        raise BulkError('Complaint ids must be integers.')
+    if not ids:
+        raise BulkError('No complaints selected.')
+    if len(ids) > _max_items():
+        raise BulkError(f'At most {_max_items()} complaints can be changed at once.')
+    values, note = _changes(action, staff_id, status)
+    now = now or datetime.utcnow()
+
+    result = BulkResult(action)
+    history = []
+    deltas = Counter()
+    try:
+        targets = _load_targets(ids)
+        for complaint_id in ids:
+            row = targets.get(complaint_id)
+            if row is None:
+                result.results[complaint_id] = NOT_FOUND
+                continue
+            current = {'assigned_to': row.assigned_to, 'status': row.status, 'is_deleted': False}
+            if all(current[name] == value for name, value in values.items()):
+                result.results[complaint_id] = UNCHANGED
+                continue
+            result.results[complaint_id] = UPDATED
+            new_status = values.get('status', row.status)
+            history.append({'complaint_id': complaint_id, 'date_changed': now, 'old_status': row.status,
+                            'new_status': new_status, 'notes': note, 'changed_by': actor_id})
+            deltas[stats.stat_key(row.status, row.category, False)] -= 1
+            deltas[stats.stat_key(new_status, row.category, values.get('is_deleted', False))] += 1
+
+        changed = [entry['complaint_id'] for entry in history]
+        if changed:
+            db.session.execute(insert(ComplaintHistory.__table__), history)
+            for chunk in _chunks(changed):
+                db.session.execute(update(Complaint.__table__)
+                                   .where(Complaint.id.in_(chunk), Complaint.is_deleted == False)
+                                   .values(**values))
+            stats.apply_deltas(db.session.connection(), deltas)
+            stats.invalidate_on_commit(db.session)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    current_app.logger.info('Bulk %s by user %s: %s', action, actor_id, dict(result.counts))
+    return result
@@ -0,0 +1,139 @@
+"""Compression and conditional GET for dynamic responses.
+
+Every response whose type is in ``COMPRESS_MIMETYPES`` gets
+``Vary: Accept-Encoding`` and, when the client accepts it, is compressed
+with brotli (if the ``brotli`` package is installed) or gzip. Bodies under
+``COMPRESS_MIN_SIZE`` bytes are left alone.
+
+Before compressing, complete ``200`` responses to ``GET``/``HEAD`` get a
+weak ETag over the uncompressed body, so a page that renders identically
+costs a ``304`` with no body. Streamed responses cannot be hashed up
+front; they are compressed chunk by chunk, each chunk flushed so the client
+sees rows as soon as they are produced.
+
+Files sent with ``send_file`` (uploads, static assets) are skipped: they
+have their own validators, byte ranges, and precompressed copies.
+
+Pages holding the CSRF token are compressed as well: ``csrf_masking``
+renders the token under a fresh random mask in every response, so BREACH
+has no repeated secret to guess at, and the ETag is computed without the
+mask.
+"""
+import hashlib
+import zlib
+
+from flask import current_app, request
+
+from app.csrf_masking import etag_body
+
+try:
+    import brotli
+except ImportError:  # fall back to gzip only
+    brotli = None
+
+DEFAULT_MIMETYPES = frozenset({
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+    'application/javascript', 'application/json', 'application/x-ndjson', 'image/svg+xml',
+})
+
+
+def init_app(app):
+    app.after_request(_compress)
+
+
+def _available():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate(accept_encodings):
+    """The encoding to use for a request's ``Accept-Encoding``, or ``None``."""
+    encoding = accept_encodings.best_match(_available())
+    return encoding if encoding and accept_encodings[encoding] else None
+
+
+class _Gzip:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def _compressor(encoding):
+    config = current_app.config
+    if encoding == 'br':
+        return _Brotli(config.get('COMPRESS_BR_QUALITY', 4))
+    return _Gzip(config.get('COMPRESS_GZIP_LEVEL', 6))
+
+
+def _stream(chunks, compressor):
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compressor.compress(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def _compress(response):
+    config = current_app.config
+    if (response.direct_passthrough
+            or response.mimetype not in config.get('COMPRESS_MIMETYPES', DEFAULT_MIMETYPES)
+            or 'Content-Encoding' in response.headers
+            or 'Content-Range' in response.headers
+            or response.cache_control.no_transform):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    if response.status_code != 200:
+        return response
+
+    if not response.is_streamed and request.method in ('GET', 'HEAD'):
+        if 'ETag' not in response.headers:
+            # Not over the CSRF token's mask, which differs in every response
+            digest = hashlib.blake2b(etag_body(response.get_data()), digest_size=16).hexdigest()
+            response.set_etag(digest, weak=True)
+        response.make_conditional(request)
+        if response.status_code == 304:
+            return response
+
+    encoding = negotiate(request.accept_encodings)
+    if encoding is None:
+        return response
+    compressor = _compressor(encoding)
+
+    if response.is_streamed:
+        response.response = _stream(response.response, compressor)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < config.get('COMPRESS_MIN_SIZE', 500):
+            return response
+        response.set_data(compressor.compress(data) + compressor.finish())
+    response.headers['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,83 @@
+"""CSRF tokens masked afresh in every response.
+
+Compressed pages that hold a secret next to text an attacker can inject
+(a search term echoed back, say) leak the secret through their size, one
+guessed character at a time (BREACH). Flask-WTF renders the same token
+payload in every page of a session, so ``csrf_token()`` here renders a
+random pad drawn once per response followed by the token XORed with it.
+All copies in one page are identical, so they still compress well, but
+no two responses share the bytes.
+
+``MaskedCSRFProtect`` unmasks the submitted value before Flask-WTF checks
+it, and ``etag_body`` lets the conditional GET hash a page without the
+mask, so an unchanged form still answers ``304``.
+"""
+import base64
+import os
+
+from flask import current_app, g, session
+from flask_wtf.csrf import CSRFProtect, generate_csrf
+
+
+def mask(token):
+    """``token`` XORed with a random pad of the same length, pad first, base64url encoded."""
+    data = token.encode('ascii')
+    pad = os.urandom(len(data))
+    return base64.urlsafe_b64encode(pad + bytes(a ^ b for a, b in zip(pad, data))).decode('ascii')
+
+
+def unmask(value):
+    """The token behind a ``mask`` value.
+
+    Anything else is returned unchanged, so a plain Flask-WTF token (sent
+    in the ``X-CSRFToken`` header, say) still validates.
+    """
+    try:
+        data = base64.b64decode(value.encode('ascii'), altchars=b'-_', validate=True)
+    except (UnicodeEncodeError, ValueError):
+        return value
+    if not data or len(data) % 2:
+        return value
+    half = len(data) // 2
+    return bytes(a ^ b for a, b in zip(data[:half], data[half:])).decode('latin-1')
+
+
+def masked_token():
+    """The masked CSRF token for this response; the pad is drawn once per response."""
+    token = g.get('_masked_csrf_token')
+    if token is None:
+        token = g._masked_csrf_token = mask(generate_csrf())
+    return token
+
+
+def etag_body(body):
+    """``body`` with this response's masked token swapped for the session's raw one.
+
+    For hashing only: the result stays the same while the page and the
+    session do, and changes with the session, whose new token a page
+    cached under the old one would not carry.
+    """
+    token = g.get('_masked_csrf_token')
+    if not token:
+        return body
+    raw = session.get(current_app.config['WTF_CSRF_FIELD_NAME'], '')
+    return body.replace(token.encode('ascii'), raw.encode('ascii'))
+
+
+def _forget_token(exception=None):
+    g.pop('_masked_csrf_token', None)
+
+
+class MaskedCSRFProtect(CSRFProtect):
+    """``CSRFProtect`` that renders masked tokens and unmasks them on submit."""
+
+    def init_app(self, app):
+        super().init_app(app)
+        # Registered after Flask-WTF's own, so these win
+        app.jinja_env.globals['csrf_token'] = masked_token
+        app.context_processor(lambda: {'csrf_token': masked_token})
+        app.teardown_request(_forget_token)
+
+    def _get_csrf_token(self):
+        token = super()._get_csrf_token()
+        return unmask(token) if token else token
@@ -0,0 +1,168 @@
+"""Streaming CSV/NDJSON export of complaints and their status history.
+
+Rows are read with ``yield_per``, with the author, assignee and editor
+usernames joined in. They are written to the client in chunks of about
+``EXPORT_CHUNK_SIZE`` bytes. Nothing holds more than one chunk of rows,
+so memory stays flat however large the export is.
+
+Complaint exports take the admin dashboard's filters (status, category,
+search) and leave out deleted complaints. An incremental pull passes a
+``since`` time (``If-Modified-Since`` over HTTP). It then gets every
+complaint updated at or after that time, deleted ones included, so the
+consumer can drop them. The history export returns the entries made at
+or after ``since``. Over HTTP the ``Last-Modified`` handed back for the
+next pull lies ``EXPORT_SAFETY_MARGIN`` seconds before the export began,
+so rows are regularly sent twice; consumers should upsert by id.
+
+CSV cells that a spreadsheet would read as a formula (text starting with
+``=``, ``+``, ``-``, ``@``, a tab or a carriage return) are prefixed with
+``'``. NDJSON values are written as they are.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+
+from app import db
+from app import search as complaint_search
+from app.models import Complaint, ComplaintHistory, User
+
+FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+DATASETS = ('complaints', 'history')
+
+COMPLAINT_FIELDS = ('id', 'title', 'category', 'priority', 'status', 'location', 'description',
+                    'date_posted', 'date_updated', 'author', 'assignee', 'image_file', 'is_deleted')
+HISTORY_FIELDS = ('id', 'complaint_id', 'date_changed', 'old_status', 'new_status', 'notes', 'changed_by')
+
+_YIELD_PER = 1000
+
+# Leading characters that make spreadsheets evaluate a cell
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _complaint_query(status=None, category=None, search=None, since=None):
+    author = aliased(User)
+    assignee = aliased(User)
+    query = (
+        select(Complaint.id, Complaint.title, Complaint.category, Complaint.priority, Complaint.status,
+               Complaint.location, Complaint.description, Complaint.date_posted, Complaint.date_updated,
+               author.username, assignee.username, Complaint.image_file, Complaint.is_deleted)
+        .join(author, author.id == Complaint.user_id)
+        .outerjoin(assignee, assignee.id == Complaint.assigned_to)
+    )
+    if since is not None:
+        query = query.where(Complaint.date_updated >= since)
+    else:
+        query = query.where(Complaint.is_deleted == False)
+    if status:
+        query = query.where(Complaint.status == status)
+    if category:
+        query = query.where(Complaint.category == category)
+    if search:
+        query = complaint_search.apply(query, search).order_by(None)
+    return query.order_by(Complaint.id)
+
+
+def _history_query(since=None):
+    editor = aliased(User)
+    query = (
+        select(ComplaintHistory.id, ComplaintHistory.complaint_id, ComplaintHistory.date_changed,
+               ComplaintHistory.old_status, ComplaintHistory.new_status, ComplaintHistory.notes,
+               editor.username)
+        .outerjoin(editor, editor.id == ComplaintHistory.changed_by)
+    )
+    if since is not None:
+        query = query.where(ComplaintHistory.date_changed >= since)
+    return query.order_by(ComplaintHistory.id)
+
+
+def build_query(dataset, since=None, **filters):
+    """The ``SELECT`` for ``dataset``; the dashboard filters apply to complaints only."""
+    if dataset == 'history':
+        return HISTORY_FIELDS, _history_query(since)
+    return COMPLAINT_FIELDS, _complaint_query(since=since, **filters)
+
+
+def has_changes(dataset, since, **filters):
+    """Whether any row of ``dataset`` changed at or after ``since``."""
+    _, query = build_query(dataset, since, **filters)
+    return db.session.execute(query.limit(1)).first() is not None
+
+
+def _value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _csv_value(value):
+    value = _value(value)
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def generate(dataset, fmt, since=None, **filters):
+    """Yield the export as byte chunks of roughly ``EXPORT_CHUNK_SIZE``."""
+    fields, query = build_query(dataset, since, **filters)
+    chunk_size = current_app.config.get('EXPORT_CHUNK_SIZE', 64 * 1024)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == 'csv' else None
+    if writer:
+        writer.writerow(fields)
+
+    for row in db.session.execute(query.execution_options(yield_per=_YIELD_PER)):
+        if writer:
+            writer.writerow([_csv_value(value) for value in row])
+        else:
+            buffer.write(json.dumps(dict(zip(fields, map(_value, row))), separators=(',', ':')))
+            buffer.write('\n')
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+export_cli = AppGroup('export', help='Export complaints and their history.')
+
+
+def _write(output, chunks):
+    for chunk in chunks:
+        output.write(chunk)
+    output.flush()
+
+
+_format_option = click.option('--format', 'fmt', type=click.Choice(sorted(FORMATS)), default='csv',
+                              show_default=True)
+_output_option = click.option('--output', type=click.File('wb'), default='-',
+                              help='File to write (default: stdout).')
+
+
+@export_cli.command('complaints')
+@_format_option
+@click.option('--status', default=None, help='Only complaints with this status.')
+@click.option('--category', default=None, help='Only complaints in this category.')
+@click.option('--search', default=None, help='Only complaints matching this text.')
+@click.option('--since', type=click.DateTime(), default=None,
+              help='Incremental: complaints changed at or after this UTC time, deleted ones included.')
+@_output_option
+def complaints_command(fmt, status, category, search, since, output):
+    """Stream complaints with author and assignee usernames."""
+    _write(output, generate('complaints', fmt, since=since, status=status, category=category, search=search))
+
+
+@export_cli.command('history')
+@_format_option
+@click.option('--since', type=click.DateTime(), default=None, help='Only entries made at or after this UTC time.')
+@_output_option
+def history_command(fmt, since, output):
+    """Stream the complaint status history."""
+    _write(output, generate('history', fmt, since=since))
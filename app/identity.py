@@ -0,0 +1,137 @@
+"""Per-worker cache of logged-in user identities.
+
+``load_user`` runs on every authenticated request, yet the role decorators
+and templates only need a user's id, username, email and role. Those are
+kept here as immutable ``UserIdentity`` snapshots in a bounded LRU with a
+TTL, so most page views never touch the ``user`` table.
+
+Entries are dropped once this process commits a change to a user's
+username, email, role or password. The changed ids are noted at flush time
+but only evicted after the commit: another request thread could otherwise
+cache the old row again before the commit lands. Other worker processes
+pick the change up once their entry expires, so ``USER_CACHE_TTL`` bounds
+how long a role change can take to reach every worker.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from flask import current_app, has_app_context
+from flask_login import UserMixin
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import User
+
+# Changing any of these invalidates the cached identity
+_IDENTITY_ATTRIBUTES = ('username', 'email', 'role', 'password')
+
+
+@dataclass(frozen=True)
+class UserIdentity(UserMixin):
+    """Read-only stand-in for ``User`` used as ``current_user``."""
+    id: int
+    username: str
+    email: str
+    role: str
+
+
+class IdentityCache:
+    """Thread-safe LRU of ``UserIdentity`` snapshots with a time-to-live."""
+
+    def __init__(self, maxsize=1024, ttl=300, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                identity, expires = entry
+                if expires > self.clock():
+                    self._entries.move_to_end(user_id)
+                    self.hits += 1
+                    return identity
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+
+    def put(self, identity):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[identity.id] = (identity, self.clock() + self.ttl)
+            self._entries.move_to_end(identity.id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id):
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions, 'invalidations': self.invalidations}
+
+
+def init_app(app):
+    app.extensions['identity_cache'] = IdentityCache(
+        maxsize=app.config.get('USER_CACHE_SIZE', 1024),
+        ttl=app.config.get('USER_CACHE_TTL', 300),
+    )
+
+
+def get_cache():
+    return current_app.extensions['identity_cache']
+
+
+def load_identity(user_id):
+    """Return the ``UserIdentity`` for ``user_id``, from the cache when possible."""
+    cache = get_cache()
+    identity = cache.get(user_id)
+    if identity is None:
+        row = db.session.execute(
+            select(User.id, User.username, User.email, User.role).where(User.id == user_id)
+        ).first()
+        if row is None:
+            return None
+        identity = UserIdentity(*row)
+        cache.put(identity)
+    return identity
+
+
+@event.listens_for(Session, 'after_flush')
+def _note_changed_users(session, flush_context):
+    changed = {obj.id for obj in session.dirty
+               if isinstance(obj, User) and any(inspect(obj).attrs[name].history.has_changes()
+                                                for name in _IDENTITY_ATTRIBUTES)}
+    changed |= {obj.id for obj in session.deleted if isinstance(obj, User)}
+    if changed:
+        session.info.setdefault('stale_identities', set()).update(changed)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_users(session):
+    changed = session.info.pop('stale_identities', None)
+    cache = current_app.extensions.get('identity_cache') if has_app_context() else None
+    if changed and cache is not None:
+        for user_id in changed:
+            cache.invalidate(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back_users(session):
+    session.info.pop('stale_identities', None)
@@ -0,0 +1,166 @@
+"""Downscaled variants of uploaded images.
+
+After an upload is saved, a thumbnail and a medium-sized JPEG are rendered
+next to it (``<name>.thumb.jpg``, ``<name>.medium.jpg``) with the EXIF
+orientation applied and all metadata dropped. Rendering runs on a small
+per-process pool of worker processes so requests do not wait for it.
+
+Templates ask for ``upload_url(filename, 'medium')`` and
+``upload_srcset(filename)``; until a variant exists (or if Pillow is not
+installed) they get the original upload instead.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import click
+from flask import current_app, url_for
+from flask.cli import AppGroup
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; uploads are then served as-is
+    Image = ImageOps = None
+
+# Variant name -> width in pixels, smallest first
+DEFAULT_VARIANTS = {'thumb': 320, 'medium': 1024}
+
+
+def variant_name(filename, variant):
+    stem, _ = os.path.splitext(filename)
+    return f'{stem}.{variant}.jpg'
+
+
+def render_variants(source, variants, quality=80):
+    """Write the variants of the image at ``source``; returns the names written.
+
+    Runs in a pool process, so it only touches the filesystem. Variants at
+    least as wide as the original are skipped: the original is smaller.
+    """
+    folder, filename = os.path.split(source)
+    written = []
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode != 'RGB':
+            # JPEG has no alpha; flatten transparent PNGs onto white
+            rgba = image.convert('RGBA')
+            image = Image.new('RGB', rgba.size, 'white')
+            image.paste(rgba, mask=rgba.getchannel('A'))
+        for variant, width in variants.items():
+            if image.width <= width:
+                continue
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.Resampling.LANCZOS)
+            target = os.path.join(folder, variant_name(filename, variant))
+            partial = target + '.part'
+            # No exif/icc arguments, so no metadata is carried over
+            resized.save(partial, 'JPEG', quality=quality, optimize=True, progressive=True)
+            os.replace(partial, target)
+            written.append(os.path.basename(target))
+    return written
+
+
+class _Pool:
+    """A process pool created lazily in each worker, after any fork."""
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    # Forking a threaded server process is unsafe; start clean ones
+                    self._executor = ProcessPoolExecutor(self.max_workers,
+                                                         mp_context=multiprocessing.get_context('spawn'))
+                    self._pid = os.getpid()
+        return self._executor.submit(fn, *args)
+
+
+def init_app(app):
+    app.extensions['image_pool'] = _Pool(max(1, app.config.get('IMAGE_WORKERS', 1)))
+
+    @app.context_processor
+    def _image_helpers():
+        return {'upload_url': upload_url, 'upload_srcset': upload_srcset}
+
+
+def _variants():
+    return current_app.config.get('IMAGE_VARIANTS', DEFAULT_VARIANTS)
+
+
+def _exists(filename):
+    return os.path.exists(os.path.join(current_app.config['UPLOAD_FOLDER'], filename))
+
+
+def schedule_variants(filename):
+    """Queue rendering of the variants of an uploaded file.
+
+    With ``IMAGE_WORKERS = 0`` they are rendered immediately instead.
+    """
+    if Image is None:
+        return None
+    source = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+    args = (source, _variants(), current_app.config.get('IMAGE_QUALITY', 80))
+    if not current_app.config.get('IMAGE_WORKERS', 1):
+        try:
+            return render_variants(*args)
+        except (OSError, ValueError) as exc:  # not an image Pillow can read
+            current_app.logger.error('Could not render variants of %s: %s', filename, exc)
+            return []
+
+    logger = current_app.logger
+    future = current_app.extensions['image_pool'].submit(render_variants, *args)
+
+    def _log_failure(done):
+        if done.exception() is not None:
+            logger.error('Could not render variants of %s: %s', filename, done.exception())
+
+    future.add_done_callback(_log_failure)
+    return future
+
+
+def upload_url(filename, variant=None):
+    """URL of an upload, or of its ``variant`` once that has been rendered."""
+    if variant and _exists(variant_name(filename, variant)):
+        filename = variant_name(filename, variant)
+    return url_for('student.uploaded_file', filename=filename)
+
+
+def upload_srcset(filename):
+    """``srcset`` listing the rendered variants of an upload, or ``''``."""
+    return ', '.join(
+        f"{url_for('student.uploaded_file', filename=variant_name(filename, variant))} {width}w"
+        for variant, width in _variants().items()
+        if _exists(variant_name(filename, variant))
+    )
+
+
+images_cli = AppGroup('images', help='Manage resized variants of uploaded images.')
+
+
+@images_cli.command('backfill')
+def backfill_command():
+    """Render missing variants for every upload."""
+    if Image is None:
+        raise click.ClickException('Pillow is not installed.')
+    folder = current_app.config['UPLOAD_FOLDER']
+    variants = _variants()
+    suffixes = tuple(f'.{variant}.jpg' for variant in variants)
+    rendered = 0
+    for filename in sorted(os.listdir(folder)) if os.path.isdir(folder) else []:
+        if filename.endswith(suffixes) or filename.endswith('.part'):
+            continue
+        missing = {v: w for v, w in variants.items() if not _exists(variant_name(filename, v))}
+        if not missing:
+            continue
+        try:
+            rendered += len(render_variants(os.path.join(folder, filename), missing,
+                                            current_app.config.get('IMAGE_QUALITY', 80)))
+        except OSError as exc:
+            click.echo(f'{filename}: {exc}')
+    click.echo(f'Rendered {rendered} image variants.')
@@ -0,0 +1,161 @@
+"""Prometheus metrics at ``/metrics``, shared by every worker process.
+
+Recording and exposition are prometheus_client's multiprocess mode: each
+worker writes its values to its own files in ``PROMETHEUS_MULTIPROC_DIR``
+and a scrape merges them with ``MultiProcessCollector``. Counters and
+histograms keep the counts of workers that have exited; the connections
+gauge only sums live workers, once gunicorn's ``child_exit`` hook has
+called ``multiprocess.mark_process_dead``. The complaint backlog is read
+from the counters table at scrape time.
+
+prometheus_client picks the directory when it is imported, so
+``init_app`` sets ``PROMETHEUS_MULTIPROC_DIR`` from ``METRICS_DIR`` before
+importing it, and the metric objects are created once per process: two
+sets would overwrite each other's values in the same files.
+
+Metrics are off unless ``METRICS_ENABLED`` is set. The directory must be
+emptied when the server (not a worker) starts. Setting ``METRICS_TOKEN``
+makes the endpoint require ``Authorization: Bearer <token>``.
+"""
+import hmac
+import os
+import threading
+import time
+
+from flask import Response, abort, current_app, g, got_request_exception, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app import db
+
+_process_metrics = None
+_lock = threading.Lock()
+
+
+class ProcessMetrics:
+    """The metric objects of this process, created once by ``_metrics_for``."""
+
+    def __init__(self, buckets):
+        from prometheus_client import Counter, Gauge, Histogram
+
+        # registry=None: a scrape reads the files, not these objects
+        self.requests = Counter('campussync_http_requests_total', 'Requests served, by endpoint and status code.',
+                                ['endpoint', 'status'], registry=None)
+        self.duration = Histogram('campussync_http_request_duration_seconds', 'Time to build a response, by endpoint.',
+                                  ['endpoint'], buckets=buckets or Histogram.DEFAULT_BUCKETS, registry=None)
+        self.connections_opened = Counter('campussync_db_connections_opened_total', 'New DBAPI connections opened.',
+                                          registry=None)
+        self.checkouts = Counter('campussync_db_checkouts_total', 'Connections checked out of the pool.',
+                                 registry=None)
+        self.in_use = Gauge('campussync_db_connections_in_use', 'Connections checked out of the pool right now.',
+                            multiprocess_mode='livesum', registry=None)
+        self.db_errors = Counter('campussync_db_errors_total', 'Database errors: "locked", "pool_timeout" or "other".',
+                                 ['kind'], registry=None)
+        self.uploads = Counter('campussync_uploads_total', 'Uploaded files, "stored" or "duplicate" of a stored one.',
+                               ['result'], registry=None)
+        self.upload_bytes = Counter('campussync_upload_bytes_total', 'Bytes received in uploaded files.',
+                                    registry=None)
+
+
+def _metrics_for(directory, buckets):
+    global _process_metrics
+    with _lock:
+        if _process_metrics is None:
+            current = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', directory)
+            if os.path.abspath(current) != os.path.abspath(directory):
+                raise RuntimeError(f'METRICS_DIR is {directory} but PROMETHEUS_MULTIPROC_DIR is {current}')
+            os.makedirs(directory, exist_ok=True)
+            from prometheus_client import values
+            if not values.ValueClass._multiprocess:
+                raise RuntimeError('prometheus_client was imported before PROMETHEUS_MULTIPROC_DIR was set')
+            _process_metrics = ProcessMetrics(buckets)
+    return _process_metrics
+
+
+def _metrics():
+    return current_app.extensions.get('metrics') if has_app_context() else None
+
+
+def record_upload(size, duplicate):
+    """Count an uploaded file of ``size`` bytes."""
+    metrics = _metrics()
+    if metrics is not None:
+        metrics.uploads.labels('duplicate' if duplicate else 'stored').inc()
+        metrics.upload_bytes.inc(size)
+
+
+def init_app(app):
+    if not app.config.get('METRICS_ENABLED'):
+        return
+    directory = app.config.get('METRICS_DIR') or os.path.join(app.instance_path, 'metrics')
+    metrics = _metrics_for(directory, app.config.get('METRICS_BUCKETS'))
+    app.extensions['metrics'] = metrics
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'connect')
+    def _connected(dbapi_connection, connection_record):
+        metrics.connections_opened.inc()
+
+    @event.listens_for(engine, 'checkout')
+    def _checked_out(dbapi_connection, connection_record, connection_proxy):
+        metrics.checkouts.inc()
+        metrics.in_use.inc()
+
+    @event.listens_for(engine, 'checkin')
+    def _checked_in(dbapi_connection, connection_record):
+        metrics.in_use.dec()
+
+    @event.listens_for(engine, 'handle_error')
+    def _failed(context):
+        metrics.db_errors.labels('locked' if 'locked' in str(context.original_exception) else 'other').inc()
+
+    # Pool timeouts never reach the engine's handle_error
+    def _request_failed(sender, exception, **extra):
+        if isinstance(exception, PoolTimeoutError):
+            metrics.db_errors.labels('pool_timeout').inc()
+
+    got_request_exception.connect(_request_failed, app, weak=False)
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop('_metrics_started', None)
+        if started is not None:
+            endpoint = request.endpoint or 'unmatched'
+            metrics.duration.labels(endpoint).observe(time.perf_counter() - started)
+            metrics.requests.labels(endpoint, str(response.status_code)).inc()
+        return response
+
+    app.add_url_rule('/metrics', 'metrics', _metrics_view)
+
+
+class _BacklogCollector:
+    """Live complaints by status, read from the counters table at scrape time."""
+
+    def collect(self):
+        from prometheus_client.core import GaugeMetricFamily
+        from app import stats
+        status_counts, _ = stats.dashboard_counts()
+        backlog = GaugeMetricFamily('campussync_complaints', 'Live complaints by status, from the counters table.',
+                                    labels=['status'])
+        for status, count in status_counts.items():
+            backlog.add_metric([status], count)
+        yield backlog
+
+
+def _metrics_view():
+    from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest, multiprocess
+
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        abort(403)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=os.environ['PROMETHEUS_MULTIPROC_DIR'])
+    registry.register(_BacklogCollector())
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST,
+                    headers={'Cache-Control': 'no-store'})
@@ -4,7 +4,9 @@ from flask_login import UserMixin
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Served from the per-worker identity cache; see app/identity.py
+    from app.identity import load_identity
+    return load_identity(int(user_id))
 
 class User(db.Model, UserMixin):
     id = db.Column(db.Integer, primary_key=True)
@@ -20,16 +22,38 @@ class User(db.Model, UserMixin):
     def __repr__(self):
         return f"User('{self.username}', '{self.email}', '{self.role}')"
 
+# Matches the partial indexes below to the listings, which only show live complaints
+LIVE_COMPLAINTS = {'sqlite_where': db.text('is_deleted = 0'), 'postgresql_where': db.text('NOT is_deleted')}
+OPEN_COMPLAINTS = {'sqlite_where': db.text("is_deleted = 0 AND status != 'Resolved'"),
+                   'postgresql_where': db.text("NOT is_deleted AND status != 'Resolved'")}
+
 class Complaint(db.Model):
+    __table_args__ = (
+        # One partial composite index per dashboard access path, each ending in
+        # date_posted so ORDER BY date_posted DESC is read straight off the index
+        db.Index('ix_complaint_live_date_posted', 'date_posted', **LIVE_COMPLAINTS),  # admin
+        db.Index('ix_complaint_live_status_date', 'status', 'date_posted', **LIVE_COMPLAINTS),  # admin, status filter
+        db.Index('ix_complaint_live_category_date', 'category', 'date_posted', **LIVE_COMPLAINTS),  # admin, category filter
+        db.Index('ix_complaint_live_user_date', 'user_id', 'date_posted', **LIVE_COMPLAINTS),  # student
+        db.Index('ix_complaint_live_assignee_date', 'assigned_to', 'date_posted', **LIVE_COMPLAINTS),  # staff
+        db.Index('ix_complaint_live_assignee_status_date', 'assigned_to', 'status', 'date_posted',
+                 **LIVE_COMPLAINTS),  # staff archive, per-status counts
+        db.Index('ix_complaint_open_assignee_priority', 'assigned_to', 'priority', 'date_posted',
+                 **OPEN_COMPLAINTS),  # staff active queue
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
-    category = db.Column(db.String(50), nullable=False)  # e.g. Roads, Water, Electricity, Sanitation
+    category = db.Column(db.String(50), nullable=False, index=True)  # e.g. Roads, Water, Electricity, Sanitation
     description = db.Column(db.Text, nullable=False)
     priority = db.Column(db.String(20), nullable=False, default='Low')  # Low, Medium, High
     location = db.Column(db.String(100), nullable=False)
     image_file = db.Column(db.String(100), nullable=True)  # UUID filename
-    date_posted = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
-    status = db.Column(db.String(20), nullable=False, default='Pending')  # Pending, In Progress, Resolved
+    date_posted = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    # Bumped by every UPDATE, ORM or set-based; drives incremental exports
+    date_updated = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow,
+                             index=True)
+    status = db.Column(db.String(20), nullable=False, default='Pending', index=True)  # Pending, In Progress, Resolved
 
     # Foreign Keys
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -38,5 +62,77 @@ class Complaint(db.Model):
     # Soft delete for admin
     is_deleted = db.Column(db.Boolean, default=False, nullable=False)
 
+    # Status changes, oldest first
+    history = db.relationship('ComplaintHistory', backref='complaint', lazy=True,
+                              order_by='ComplaintHistory.date_changed')
+
     def __repr__(self):
         return f"Complaint('{self.title}', '{self.date_posted}', '{self.status}')"
+
+class ComplaintHistory(db.Model):
+    __tablename__ = 'complaint_history'
+
+    id = db.Column(db.Integer, primary_key=True)
+    complaint_id = db.Column(db.Integer, db.ForeignKey('complaint.id'), nullable=False)
+    date_changed = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    old_status = db.Column(db.String(20), nullable=False)
+    new_status = db.Column(db.String(20), nullable=False)
+    notes = db.Column(db.Text, nullable=True)
+    changed_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)  # None for system changes
+
+    def __repr__(self):
+        return f"ComplaintHistory({self.complaint_id}, '{self.old_status}' -> '{self.new_status}')"
+
+class ComplaintStat(db.Model):
+    """Running complaint counters, one row per (status, category, is_deleted)."""
+    __tablename__ = 'complaint_stat'
+
+    status = db.Column(db.String(20), primary_key=True)
+    category = db.Column(db.String(50), primary_key=True)
+    is_deleted = db.Column(db.Boolean, primary_key=True, default=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"ComplaintStat('{self.status}', '{self.category}', {self.is_deleted}, {self.count})"
+
+class JobLease(db.Model):
+    """Which process may run a scheduled job, until ``expires_at``."""
+    __tablename__ = 'job_lease'
+
+    name = db.Column(db.String(50), primary_key=True)
+    owner = db.Column(db.String(100), nullable=False)  # host:pid
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"JobLease('{self.name}', '{self.owner}', '{self.expires_at}')"
+
+class JobRun(db.Model):
+    """One execution of a scheduled job."""
+    __tablename__ = 'job_run'
+    __table_args__ = (
+        db.Index('ix_job_run_job_started', 'job', 'started_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    job = db.Column(db.String(50), nullable=False)
+    trigger = db.Column(db.String(20), nullable=False)  # schedule, manual
+    owner = db.Column(db.String(100), nullable=False)
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    duration = db.Column(db.Float, nullable=True)  # seconds
+    status = db.Column(db.String(20), nullable=False, default='running')  # running, success, failed
+    summary = db.Column(db.String(200), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+
+    def __repr__(self):
+        return f"JobRun('{self.job}', '{self.started_at}', '{self.status}')"
+
+class Upload(db.Model):
+    """How many complaints reference each stored upload."""
+    __tablename__ = 'upload'
+
+    filename = db.Column(db.String(100), primary_key=True)  # <sha256>.<ext>
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"Upload('{self.filename}', {self.ref_count})"
@@ -0,0 +1,166 @@
+"""Keyset (cursor) pagination for complaint listings.
+
+Listings are ordered newest first on ``(date_posted, id)``. Instead of a
+page number the URL carries an opaque cursor naming the last (or first)
+row already shown, so every page is an index seek of ``per_page + 1`` rows
+and no ``COUNT(*)`` is needed: page N costs the same as page 1.
+
+Relevance-ranked search results are the exception. Their order only exists
+after the whole match set has been scored, so their cursors carry an offset
+into that set instead of a row key.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from flask import request, url_for
+from flask_paginate import Pagination
+from markupsafe import Markup
+from sqlalchemy import tuple_
+
+from app.models import Complaint
+
+CURSOR_PARAMETER = 'cursor'
+
+
+def encode_cursor(payload):
+    """Serialise a cursor payload into an opaque, URL-safe token."""
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(token):
+    """Inverse of ``encode_cursor``; returns ``None`` for missing or garbled tokens."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+    except (binascii.Error, ValueError):
+        return None
+    if not isinstance(payload, dict) or not isinstance(payload.get('p'), int) or payload['p'] < 1:
+        return None
+    return payload
+
+
+def _key_cursor(complaint, page, direction):
+    return encode_cursor({'p': page, 'd': direction,
+                          'k': [complaint.date_posted.isoformat(), complaint.id]})
+
+
+def _offset_cursor(offset, page):
+    return encode_cursor({'p': page, 'o': offset})
+
+
+class KeysetPagination(Pagination):
+    """A ``flask_paginate.Pagination`` driven by cursors instead of page numbers.
+
+    Renders previous / current / next links only, since arbitrary pages
+    cannot be reached without walking the cursors. ``total`` is optional;
+    without it the page info line is omitted.
+    """
+
+    def __init__(self, items, page, per_page, next_cursor=None, prev_cursor=None, total=None, **kwargs):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.cursor_parameter = kwargs.pop('cursor_parameter', CURSOR_PARAMETER)
+        kwargs.setdefault('css_framework', 'bootstrap5')
+        kwargs.setdefault('record_name', 'complaints')
+        super().__init__(page=page, per_page=per_page, total=total or 0, **kwargs)
+        self.total = total
+        self.has_prev = prev_cursor is not None
+        self.has_next = next_cursor is not None
+        self.total_pages = page + 1 if self.has_next else page
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def page_href(self, page):
+        args = {k: v for k, v in self.args.items() if k not in (self.page_parameter, self.cursor_parameter)}
+        if page is not None and page > 1:
+            args[self.cursor_parameter] = self.next_cursor if page > self.page else self.prev_cursor
+        return url_for(self.endpoint, **args)
+
+    @property
+    def links(self):
+        if not (self.has_prev or self.has_next):
+            return ''
+        return Markup(''.join([
+            self.link_css_fmt.format(self.link_size, self.alignment),
+            self.prev_page,
+            self.current_page_fmt.format(self.page),
+            self.next_page,
+            self.css_end_fmt,
+        ]))
+
+    @property
+    def info(self):
+        if self.total is None:
+            return ''
+        return super().info
+
+
+def paginate(query, per_page=10, total=None, ranked=False, cursor_parameter=CURSOR_PARAMETER):
+    """Return the page of ``query`` selected by the request's cursor.
+
+    ``query`` must not be ordered yet (apart from a relevance ordering when
+    ``ranked`` is set); newest-first ordering is added here. ``total`` may be
+    an exact or approximate row count from a cheap source such as the
+    statistics counters.
+    """
+    cursor = decode_cursor(request.args.get(cursor_parameter))
+    query = query.order_by(Complaint.date_posted.desc(), Complaint.id.desc())
+    if ranked:
+        return _paginate_by_offset(query, cursor, per_page, total, cursor_parameter)
+
+    page = 1
+    direction = 'n'
+    if cursor and cursor.get('d') in ('n', 'p') and isinstance(cursor.get('k'), list):
+        try:
+            date_posted = datetime.fromisoformat(cursor['k'][0])
+            complaint_id = int(cursor['k'][1])
+        except (IndexError, TypeError, ValueError):
+            pass
+        else:
+            page, direction = cursor['p'], cursor['d']
+            key = tuple_(Complaint.date_posted, Complaint.id)
+            if direction == 'n':
+                query = query.filter(key < (date_posted, complaint_id))
+            else:
+                # Walk backwards from the cursor, then restore newest-first order
+                query = query.filter(key > (date_posted, complaint_id)).order_by(None).order_by(
+                    Complaint.date_posted.asc(), Complaint.id.asc())
+
+    rows = query.limit(per_page + 1).all()
+    more = len(rows) > per_page
+    items = rows[:per_page]
+    if direction == 'n':
+        has_next, has_prev = more, page > 1
+    else:
+        items.reverse()
+        has_next, has_prev = True, more
+        if not more:
+            page = 1
+
+    next_cursor = _key_cursor(items[-1], page + 1, 'n') if has_next and items else None
+    prev_cursor = _key_cursor(items[0], page - 1, 'p') if has_prev and items else None
+    return KeysetPagination(items, page, per_page, next_cursor, prev_cursor, total,
+                            cursor_parameter=cursor_parameter)
+
+
+def _paginate_by_offset(query, cursor, per_page, total, cursor_parameter):
+    page, offset = 1, 0
+    if cursor and isinstance(cursor.get('o'), int) and cursor['o'] >= 0:
+        page, offset = cursor['p'], cursor['o']
+
+    rows = query.offset(offset).limit(per_page + 1).all()
+    items = rows[:per_page]
+    next_cursor = _offset_cursor(offset + per_page, page + 1) if len(rows) > per_page else None
+    prev_cursor = _offset_cursor(max(offset - per_page, 0), page - 1) if offset > 0 else None
+    return KeysetPagination(items, page, per_page, next_cursor, prev_cursor, total,
+                            cursor_parameter=cursor_parameter)
@@ -0,0 +1,84 @@
+"""Password hashing on a bounded worker pool.
+
+bcrypt is deliberately slow (~250 ms at the default cost) and releases the
+GIL while it runs. Running it on a small per-process thread pool caps how
+many hashes a worker computes at once, so a burst of logins cannot take
+every request thread. A request whose hash has not started after
+``BCRYPT_QUEUE_TIMEOUT`` seconds in the queue gives up with
+``PasswordHasherBusy`` instead of queueing forever; once a hash has
+started, it is always waited for.
+
+Hashes store their own cost, so a login whose hash was made with a cost
+other than ``BCRYPT_LOG_ROUNDS`` can be transparently rehashed.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from flask import current_app
+
+from app import bcrypt
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when a job waited longer than the queue timeout for a free hashing thread."""
+
+
+class _Pool:
+    """A thread pool created lazily in each process, so it survives a fork."""
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='bcrypt')
+                    self._pid = os.getpid()
+        return self._executor.submit(fn, *args)
+
+
+def init_app(app):
+    app.extensions['password_pool'] = _Pool(
+        app.config.get('BCRYPT_MAX_CONCURRENCY') or os.cpu_count() or 1
+    )
+
+
+def _run(fn, *args):
+    future = current_app.extensions['password_pool'].submit(fn, *args)
+    try:
+        return future.result(timeout=current_app.config.get('BCRYPT_QUEUE_TIMEOUT', 5))
+    except TimeoutError:
+        # Only the queue wait is bounded: a job that is already hashing
+        # got its thread in time, and cancelling it would waste the work
+        if future.cancel():
+            raise PasswordHasherBusy() from None
+        return future.result()
+
+
+def hash_password(password):
+    """Hash ``password`` at the configured cost; returns the hash as text."""
+    rounds = current_app.config.get('BCRYPT_LOG_ROUNDS', 12)
+    return _run(bcrypt.generate_password_hash, password, rounds).decode('utf-8')
+
+
+def check_password(pw_hash, password):
+    """Check ``password`` against a stored bcrypt hash."""
+    return _run(bcrypt.check_password_hash, pw_hash, password)
+
+
+def hash_rounds(pw_hash):
+    """The cost factor recorded in a ``$2b$<cost>$...`` hash, or ``None``."""
+    parts = pw_hash.split('$')
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def needs_rehash(pw_hash):
+    """Whether ``pw_hash`` was made with a cost other than ``BCRYPT_LOG_ROUNDS``."""
+    return hash_rounds(pw_hash) != current_app.config.get('BCRYPT_LOG_ROUNDS', 12)
@@ -0,0 +1,185 @@
+"""Opt-in per-request profiling: timings, slow log and sampled cProfile dumps.
+
+With ``PROFILING_ENABLED`` set, every request records its total time, the
+time spent rendering templates, and the number and time of the SQL
+statements it ran (from the engine's cursor events). They are sent back
+in a ``Server-Timing`` header, which browser dev tools show next to the
+request:
+
+    Server-Timing: total;dur=41.2, sql;dur=12.7;desc="5 queries", render;dur=20.3
+
+Requests slower than ``PROFILING_SLOW_REQUEST_MS`` and statements slower
+than ``PROFILING_SLOW_QUERY_MS`` are written to the ``campussync.slow``
+logger as one JSON object per line. Each line has the endpoint and the
+statement with its literals and ``IN`` lists folded, so the lines group
+by query shape. ``PROFILING_SLOW_LOG`` sends them to a file as well.
+
+``PROFILING_SAMPLE_EVERY = N`` runs one request in N under cProfile and
+saves the stats in ``PROFILING_DIR``. Open a dump with
+``python -m pstats <file>``.
+
+SQL time is measured around the cursor's ``execute``. Rows that the driver
+fetches later (SQLite steps through a result as it is read) count towards
+the total, not ``sql``. The total of a streamed response only covers the
+time up to the first byte.
+"""
+import cProfile
+import itertools
+import json
+import logging
+import os
+import re
+import time
+from datetime import datetime
+
+from flask import before_render_template, current_app, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+
+from app import db
+
+slow_log = logging.getLogger('campussync.slow')
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_SPACES = re.compile(r'\s+')
+
+
+def normalize_sql(statement):
+    """``statement`` with literals as ``?``, ``IN`` lists folded and whitespace collapsed."""
+    statement = _LITERALS.sub('?', statement)
+    statement = _IN_LISTS.sub('IN (...)', statement)
+    return _SPACES.sub(' ', statement).strip()
+
+
+class RequestProfile:
+    """What one request spent its time on, in seconds."""
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.started = clock()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.render_time = 0.0
+        self.slowest_sql = None  # (seconds, statement)
+        self._render_started = []
+
+    def add_query(self, statement, duration):
+        self.sql_count += 1
+        self.sql_time += duration
+        if self.slowest_sql is None or duration > self.slowest_sql[0]:
+            self.slowest_sql = (duration, statement)
+
+    def elapsed(self):
+        return self.clock() - self.started
+
+    def server_timing(self, total):
+        return (f'total;dur={total * 1000:.1f}, '
+                f'sql;dur={self.sql_time * 1000:.1f};desc="{self.sql_count} queries", '
+                f'render;dur={self.render_time * 1000:.1f}')
+
+
+def current_profile():
+    """The ``RequestProfile`` of the request being served, if it is profiled."""
+    return g.get('_profile') if has_request_context() else None
+
+
+def init_app(app):
+    if not app.config.get('PROFILING_ENABLED'):
+        return
+    config = app.config
+    slow_query = config.get('PROFILING_SLOW_QUERY_MS', 100) / 1000
+    slow_log_path = config.get('PROFILING_SLOW_LOG')
+    if slow_log_path and not any(getattr(handler, 'baseFilename', None) == os.path.abspath(slow_log_path)
+                                 for handler in slow_log.handlers):
+        slow_log.addHandler(logging.FileHandler(slow_log_path))
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('profiling_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info['profiling_started'].pop()
+        profile = current_profile()
+        if profile is not None:
+            profile.add_query(statement, duration)
+        if duration >= slow_query:
+            _log_slow('query', duration, sql=normalize_sql(statement))
+
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+    app.extensions['profiling_samples'] = itertools.count(1)
+    app.before_request(_start)
+    app.after_request(_finish)
+    app.teardown_request(_stop_profiler)
+
+
+def _before_render(sender, template, context, **extra):
+    profile = current_profile()
+    if profile is not None:
+        profile._render_started.append(profile.clock())
+
+
+def _after_render(sender, template, context, **extra):
+    profile = current_profile()
+    if profile is not None and profile._render_started:
+        started = profile._render_started.pop()
+        if not profile._render_started:  # a render nested in another is already counted
+            profile.render_time += profile.clock() - started
+
+
+def _start():
+    g._profile = RequestProfile()
+    every = current_app.config.get('PROFILING_SAMPLE_EVERY', 0)
+    if every and next(current_app.extensions['profiling_samples']) % every == 0:
+        g._profiler = cProfile.Profile()
+        g._profiler.enable()
+
+
+def _finish(response):
+    profile = g.pop('_profile', None)
+    if profile is None:
+        return response
+    profiler = g.pop('_profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        _dump(current_app, profiler)
+
+    total = profile.elapsed()
+    config = current_app.config
+    if config.get('PROFILING_SERVER_TIMING', True):
+        response.headers['Server-Timing'] = profile.server_timing(total)
+    if total >= config.get('PROFILING_SLOW_REQUEST_MS', 500) / 1000:
+        fields = {'method': request.method, 'path': request.path, 'status': response.status_code,
+                  'sql_count': profile.sql_count, 'sql_ms': round(profile.sql_time * 1000, 1),
+                  'render_ms': round(profile.render_time * 1000, 1)}
+        if profile.slowest_sql is not None:
+            fields['slowest_sql_ms'] = round(profile.slowest_sql[0] * 1000, 1)
+            fields['slowest_sql'] = normalize_sql(profile.slowest_sql[1])
+        _log_slow('request', total, **fields)
+    return response
+
+
+def _stop_profiler(exc):
+    # After an unhandled exception _finish never ran; don't leave the thread profiled
+    profiler = g.pop('_profiler', None)
+    if profiler is not None:
+        profiler.disable()
+
+
+def _log_slow(kind, duration, **fields):
+    record = {'time': datetime.utcnow().isoformat(timespec='milliseconds'), 'type': kind,
+              'endpoint': request.endpoint if has_request_context() else None,
+              'ms': round(duration * 1000, 1)}
+    record.update(fields)
+    slow_log.warning(json.dumps(record))
+
+
+def _dump(app, profiler):
+    directory = app.config.get('PROFILING_DIR') or os.path.join(app.instance_path, 'profiles')
+    os.makedirs(directory, exist_ok=True)
+    name = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{request.endpoint or 'none'}-{os.getpid()}.pstats"
+    profiler.dump_stats(os.path.join(directory, name))
@@ -0,0 +1,57 @@
+"""Count the SQL statements an engine executes, for query budgets in tests."""
+from sqlalchemy import event
+
+from app import db
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised by ``max_queries`` when a block runs more statements than allowed."""
+
+
+class QueryCounter:
+    """Context manager recording every statement sent to ``engine``.
+
+    Defaults to the Flask-SQLAlchemy engine of the current app.
+    """
+
+    def __init__(self, engine=None):
+        self.engine = engine
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        if self.engine is None:
+            self.engine = db.engine
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+        return False
+
+
+class max_queries(QueryCounter):
+    """Like ``QueryCounter`` but fails if more than ``limit`` statements ran.
+
+        with max_queries(5):
+            client.get('/admin/dashboard')
+    """
+
+    def __init__(self, limit, engine=None):
+        super().__init__(engine)
+        self.limit = limit
+
+    def __exit__(self, exc_type, exc, tb):
+        super().__exit__(exc_type, exc, tb)
+        if exc_type is None and self.count > self.limit:
+            listing = '\n'.join(f'  {i}. {s}' for i, s in enumerate(self.statements, 1))
+            raise QueryBudgetExceeded(
+                f'{self.count} statements executed, budget is {self.limit}:\n{listing}'
+            )
+        return False
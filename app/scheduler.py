@@ -0,0 +1,357 @@
+"""Small in-process job scheduler that is safe to run in every worker.
+
+Every worker process runs a scheduler thread, but a job only runs in the
+process holding its lease: a ``job_lease`` row claimed with a conditional
+``UPDATE`` (or the first ``INSERT``) that succeeds for exactly one process
+until the lease expires or is released. When a job is due is worked out
+from the shared ``job_run`` history, so restarts and worker churn neither
+skip nor repeat runs.
+
+Triggers are written as ``every 15m`` / ``every 24h`` or as five-field cron
+expressions (``minute hour day month weekday``, UTC).
+"""
+import os
+import socket
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import JobLease, JobRun
+
+_INTERVAL_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+class Interval:
+    """Run every ``seconds`` seconds; due immediately if the job never ran."""
+
+    def __init__(self, seconds):
+        if seconds <= 0:
+            raise ValueError('interval must be positive')
+        self.seconds = seconds
+
+    def first_run(self, now):
+        return now
+
+    def next_after(self, moment):
+        return moment + timedelta(seconds=self.seconds)
+
+    def __str__(self):
+        for unit, size in sorted(_INTERVAL_UNITS.items(), key=lambda item: -item[1]):
+            if self.seconds % size == 0:
+                return f'every {self.seconds // size}{unit}'
+
+
+class Cron:
+    """Five-field cron expression supporting ``*``, lists, ranges and steps."""
+
+    _RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f'cron expression needs 5 fields: {expression!r}')
+        self.expression = expression
+        # Weekday 7 is Sunday as well as 0
+        fields[4] = ','.join('0' if part == '7' else part for part in fields[4].split(','))
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse(field, low, high) for field, (low, high) in zip(fields, self._RANGES))
+        self._any_day = fields[2] == '*'
+        self._any_weekday = fields[4] == '*'
+
+    @staticmethod
+    def _parse(field, low, high):
+        values = set()
+        for part in field.split(','):
+            step = 1
+            if '/' in part:
+                part, step = part.split('/', 1)
+                step = int(step)
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start, end = (int(v) for v in part.split('-', 1))
+            else:
+                start = int(part)
+                end = high if step > 1 else start
+            if not low <= start <= end <= high or step < 1:
+                raise ValueError(f'cron field out of range: {field!r}')
+            values.update(range(start, end + 1, step))
+        return frozenset(values)
+
+    def _day_matches(self, moment):
+        weekday = (moment.weekday() + 1) % 7  # cron counts from Sunday
+        if self._any_day or self._any_weekday:
+            return moment.day in self.days and weekday in self.weekdays
+        # Like cron, a restricted day and weekday match if either does
+        return moment.day in self.days or weekday in self.weekdays
+
+    def first_run(self, now):
+        return self.next_after(now)
+
+    def next_after(self, moment):
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year, month = divmod(candidate.month, 12)
+                candidate = candidate.replace(year=candidate.year + year, month=month + 1, day=1, hour=0, minute=0)
+            elif not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+            elif candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f'cron expression never matches: {self.expression!r}')
+
+    def __str__(self):
+        return self.expression
+
+
+def parse_trigger(spec):
+    """Build a trigger from ``every <n><s|m|h|d>`` or a cron expression."""
+    if spec.startswith('every '):
+        amount = spec[len('every '):].strip()
+        if amount[-1:] not in _INTERVAL_UNITS or not amount[:-1].isdigit():
+            raise ValueError(f'bad interval: {spec!r}')
+        return Interval(int(amount[:-1]) * _INTERVAL_UNITS[amount[-1]])
+    return Cron(spec)
+
+
+def process_owner():
+    """Identifies this process in leases and run history."""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def acquire_lease(name, owner, seconds, now=None):
+    """Claim the lease ``name`` for ``seconds``; returns whether it was granted."""
+    now = now or datetime.utcnow()
+    table = JobLease.__table__
+    expires_at = now + timedelta(seconds=seconds)
+    try:
+        result = db.session.execute(
+            update(table).where(table.c.name == name, table.c.expires_at <= now)
+            .values(owner=owner, expires_at=expires_at)
+        )
+        if result.rowcount == 0:
+            # Either someone else holds it or the row does not exist yet
+            if db.session.execute(select(table.c.name).where(table.c.name == name)).first():
+                db.session.rollback()
+                return False
+            db.session.execute(insert(table).values(name=name, owner=owner, expires_at=expires_at))
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()  # another process inserted it first
+        return False
+    return True
+
+
+def release_lease(name, owner, now=None):
+    table = JobLease.__table__
+    db.session.execute(
+        update(table).where(table.c.name == name, table.c.owner == owner)
+        .values(expires_at=now or datetime.utcnow())
+    )
+    db.session.commit()
+
+
+@dataclass
+class Job:
+    name: str
+    trigger: object
+    func: object
+    lease_seconds: int = 3600  # longest the job is expected to run
+    description: str = ''
+
+
+class Scheduler:
+    """Registry of jobs plus the per-process thread that runs the due ones."""
+
+    def __init__(self, tick=30):
+        self.tick = tick
+        self.jobs = {}
+        self._thread = None
+        self._pid = None
+        self._started_at = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def register(self, name, trigger, func, lease_seconds=3600, description=''):
+        if isinstance(trigger, str):
+            trigger = parse_trigger(trigger)
+        self.jobs[name] = Job(name, trigger, func, lease_seconds, description or (func.__doc__ or '').strip())
+        return func
+
+    def job(self, name, trigger, **kwargs):
+        """Decorator form of ``register``."""
+        def decorator(func):
+            return self.register(name, trigger, func, **kwargs)
+        return decorator
+
+    def last_runs(self):
+        """``{job: started_at}`` of the latest run of every job."""
+        rows = db.session.execute(
+            select(JobRun.job, func.max(JobRun.started_at)).group_by(JobRun.job)
+        ).all()
+        return dict(rows)
+
+    def next_run(self, job, last_started, now):
+        if last_started is None:
+            return job.trigger.first_run(self._started_at or now)
+        return job.trigger.next_after(last_started)
+
+    def run_pending(self, now=None):
+        """Run every due job whose lease this process obtains; returns the runs."""
+        now = now or datetime.utcnow()
+        runs = []
+        last_runs = self.last_runs()
+        for job in self.jobs.values():
+            if self.next_run(job, last_runs.get(job.name), now) <= now:
+                run = self.run(job.name, trigger='schedule', now=now)
+                if run is not None:
+                    runs.append(run)
+        return runs
+
+    def run(self, name, trigger='manual', now=None):
+        """Run job ``name`` under its lease; ``None`` if another process holds it."""
+        job = self.jobs[name]
+        owner = process_owner()
+        now = now or datetime.utcnow()
+        if not acquire_lease(name, owner, job.lease_seconds, now):
+            return None
+        try:
+            if trigger == 'schedule':
+                # Another process may have run it between our check and the lease
+                last = db.session.execute(
+                    select(func.max(JobRun.started_at)).where(JobRun.job == name)
+                ).scalar()
+                if self.next_run(job, last, now) > now:
+                    return None
+            return self._execute(job, trigger, owner, now)
+        finally:
+            release_lease(name, owner, now)
+
+    def _execute(self, job, trigger, owner, now):
+        run = JobRun(job=job.name, trigger=trigger, owner=owner, started_at=now)
+        db.session.add(run)
+        db.session.commit()
+
+        started = time.perf_counter()
+        try:
+            result = job.func()
+        except Exception:
+            db.session.rollback()
+            run.status = 'failed'
+            run.error = traceback.format_exc()
+            current_app.logger.exception('Job %s failed', job.name)
+        else:
+            run.status = 'success'
+            if result is not None:
+                run.summary = str(result)[:200]
+        run.duration = time.perf_counter() - started
+        run.finished_at = run.started_at + timedelta(seconds=run.duration)
+        db.session.commit()
+        return run
+
+    def start(self, app):
+        """Start the scheduler thread of this process, once per process."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._started_at = datetime.utcnow()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, args=(app,), name='scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self, app):
+        while not self._stop.wait(self.tick):
+            with app.app_context():
+                try:
+                    self.run_pending()
+                except Exception:
+                    app.logger.exception('Scheduler tick failed')
+                finally:
+                    db.session.remove()
+
+
+def init_app(app):
+    scheduler = Scheduler(tick=app.config.get('SCHEDULER_TICK', 30))
+    app.extensions['scheduler'] = scheduler
+
+    if app.config.get('SCHEDULER_ENABLED', True):
+        # Started lazily so the thread belongs to the worker, not a
+        # pre-fork master process or a one-off CLI command
+        @app.before_request
+        def _start_scheduler():
+            scheduler.start(app)
+
+
+def get_scheduler():
+    return current_app.extensions['scheduler']
+
+
+jobs_cli = AppGroup('jobs', help='Inspect and run scheduled jobs.')
+
+
+@jobs_cli.command('list')
+def list_command():
+    """List registered jobs with their last and next runs."""
+    scheduler = get_scheduler()
+    now = datetime.utcnow()
+    for job in scheduler.jobs.values():
+        run = db.session.execute(
+            select(JobRun).where(JobRun.job == job.name).order_by(JobRun.started_at.desc()).limit(1)
+        ).scalar()
+        next_run = scheduler.next_run(job, run.started_at if run else None, now)
+        last = (f'{run.started_at:%Y-%m-%d %H:%M} {run.status}'
+                + (f' in {run.duration:.2f}s' if run.duration is not None else '')) if run else 'never'
+        click.echo(f'{job.name}  [{job.trigger}]  last: {last}  next: {next_run:%Y-%m-%d %H:%M}')
+        if job.description:
+            click.echo(f'    {job.description.splitlines()[0]}')
+
+
+@jobs_cli.command('run')
+@click.argument('name')
+def run_command(name):
+    """Run a job now, under its lease."""
+    scheduler = get_scheduler()
+    if name not in scheduler.jobs:
+        raise click.BadParameter(f'unknown job {name!r}', param_hint='NAME')
+    run = scheduler.run(name)
+    if run is None:
+        click.echo(f'{name} is running in another process.')
+        raise SystemExit(1)
+    click.echo(f'{name}: {run.status} in {run.duration:.2f}s' + (f' ({run.summary})' if run.summary else ''))
+    if run.status == 'failed':
+        click.echo(run.error)
+        raise SystemExit(1)
+
+
+@jobs_cli.command('history')
+@click.argument('name', required=False)
+@click.option('--limit', default=20, show_default=True)
+def history_command(name, limit):
+    """Show recent job runs, newest first."""
+    query = select(JobRun).order_by(JobRun.started_at.desc(), JobRun.id.desc()).limit(limit)
+    if name:
+        query = query.where(JobRun.job == name)
+    for run in db.session.execute(query).scalars():
+        duration = f'{run.duration:.2f}s' if run.duration is not None else '-'
+        click.echo(f'{run.started_at:%Y-%m-%d %H:%M:%S}  {run.job}  {run.trigger}  {run.status}  {duration}'
+                   f'  {run.owner}' + (f'  {run.summary}' if run.summary else ''))
@@ -0,0 +1,31 @@
+"""``flask schema create``: build the database tables outside the import path.
+
+``run.py`` used to call ``db.create_all()`` when imported, so every worker
+checked the whole schema on boot. Now a deploy runs this command once
+before starting the server. It only creates what is missing (tables,
+indexes, the full-text index) and leaves existing tables untouched. Changes
+to existing tables go through the scripts in ``migrations/``.
+"""
+import time
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import inspect
+
+from app import db
+
+schema_cli = AppGroup('schema', help='Create the database schema.')
+
+
+@schema_cli.command('create')
+def create_command():
+    """Create any missing tables and indexes."""
+    started = time.perf_counter()
+    existing = set(inspect(db.engine).get_table_names())
+    db.create_all()
+    created = sorted(table.name for table in db.metadata.sorted_tables if table.name not in existing)
+    if created:
+        click.echo(f"Created {len(created)} tables: {', '.join(created)}")
+    else:
+        click.echo('All tables already exist.')
+    click.echo(f'Done in {time.perf_counter() - started:.2f}s.')
@@ -0,0 +1,134 @@
+"""Full-text complaint search backed by an SQLite FTS5 index.
+
+``complaint_fts`` is an external-content FTS5 table over the title,
+description and location of every complaint, kept in sync by triggers.
+Searches are prefix matches ranked by bm25. When the database has no FTS
+index (not SQLite, or SQLite built without FTS5) the dashboards fall back
+to ``LIKE`` matching over the same three columns.
+"""
+import re
+import weakref
+
+from markupsafe import Markup, escape
+from sqlalchemy import DDL, event, func, literal_column, or_, select, table, column
+
+from app import db
+from app.models import Complaint
+
+FTS_TABLE = 'complaint_fts'
+
+# Kept in step with the FTS revision in migrations/versions
+FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS complaint_fts USING fts5("
+    "title, description, location, content='complaint', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS complaint_fts_ai AFTER INSERT ON complaint BEGIN "
+    "INSERT INTO complaint_fts(rowid, title, description, location) "
+    "VALUES (new.id, new.title, new.description, new.location); END",
+    "CREATE TRIGGER IF NOT EXISTS complaint_fts_ad AFTER DELETE ON complaint BEGIN "
+    "INSERT INTO complaint_fts(complaint_fts, rowid, title, description, location) "
+    "VALUES ('delete', old.id, old.title, old.description, old.location); END",
+    "CREATE TRIGGER IF NOT EXISTS complaint_fts_au AFTER UPDATE OF title, description, location ON complaint BEGIN "
+    "INSERT INTO complaint_fts(complaint_fts, rowid, title, description, location) "
+    "VALUES ('delete', old.id, old.title, old.description, old.location); "
+    "INSERT INTO complaint_fts(rowid, title, description, location) "
+    "VALUES (new.id, new.title, new.description, new.location); END",
+]
+
+# Private-use markers wrapped around matches by snippet(), swapped for <mark>
+# only after the surrounding text has been HTML-escaped
+_MARK_OPEN, _MARK_CLOSE = '\ue000', '\ue001'
+SNIPPET_TOKENS = 12
+
+_fts_table = table(FTS_TABLE, column('rowid'))
+_fts_column = literal_column(FTS_TABLE)
+
+_availability = weakref.WeakKeyDictionary()
+
+
+def _sqlite_has_fts5(ddl, target, bind, **kw):
+    if bind.dialect.name != 'sqlite':
+        return False
+    options = bind.exec_driver_sql('PRAGMA compile_options').scalars().all()
+    return 'ENABLE_FTS5' in options
+
+
+for _statement in FTS_DDL:
+    event.listen(Complaint.__table__, 'after_create',
+                 DDL(_statement).execute_if(callable_=_sqlite_has_fts5))
+event.listen(Complaint.__table__, 'before_drop',
+             DDL('DROP TABLE IF EXISTS complaint_fts').execute_if(dialect='sqlite'))
+
+
+def fts_enabled():
+    """Whether the bound database has the FTS index (checked once per engine)."""
+    engine = db.engine
+    if engine not in _availability:
+        available = False
+        if engine.dialect.name == 'sqlite':
+            with engine.connect() as conn:
+                available = conn.exec_driver_sql(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+                ).first() is not None
+        _availability[engine] = available
+    return _availability[engine]
+
+
+def _terms(search):
+    return re.findall(r'\w+', search or '')
+
+
+def match_expression(search):
+    """Turn free text into an FTS5 query: every word, as a prefix, must match."""
+    return ' '.join(f'"{term}"*' for term in _terms(search))
+
+
+def apply(query, search):
+    """Restrict a ``Complaint`` query to matches for ``search``.
+
+    With FTS the matches are ordered by relevance; callers add their own
+    ordering afterwards as a tie-breaker.
+    """
+    if not _terms(search):
+        return query
+
+    if not fts_enabled():
+        pattern = f'%{search}%'
+        return query.filter(or_(Complaint.title.ilike(pattern),
+                                Complaint.description.ilike(pattern),
+                                Complaint.location.ilike(pattern)))
+
+    matches = (
+        select(_fts_table.c.rowid.label('complaint_id'),
+               func.bm25(_fts_column).label('rank'))
+        .select_from(_fts_table)
+        .where(_fts_column.op('MATCH')(match_expression(search)))
+        .subquery('fts_match')
+    )
+    return query.join(matches, matches.c.complaint_id == Complaint.id).order_by(matches.c.rank)
+
+
+def snippets(complaint_ids, search):
+    """Return ``{complaint_id: Markup}`` highlighting ``search`` in each complaint.
+
+    Only called for the complaints on the current page, so the cost is
+    bounded by the page size. Empty without FTS.
+    """
+    complaint_ids = list(complaint_ids)
+    if not complaint_ids or not _terms(search) or not fts_enabled():
+        return {}
+
+    rows = db.session.execute(
+        select(_fts_table.c.rowid,
+               func.snippet(_fts_column, -1, _MARK_OPEN, _MARK_CLOSE, '…', SNIPPET_TOKENS))
+        .select_from(_fts_table)
+        .where(_fts_column.op('MATCH')(match_expression(search)),
+               _fts_table.c.rowid.in_(complaint_ids))
+    ).all()
+    return {complaint_id: _highlight(text) for complaint_id, text in rows}
+
+
+def _highlight(text):
+    escaped = str(escape(text))
+    return Markup(escaped.replace(_MARK_OPEN, '<mark>').replace(_MARK_CLOSE, '</mark>'))
+
@@ -0,0 +1,292 @@
+"""Synthetic data for load testing and benchmarks.
+
+``flask seed synthetic`` fills an empty database with users, complaints
+and status history at production scale. The data is fully reproducible:
+the same ``--seed`` and ``--anchor`` always give the same rows.
+
+The distributions are meant to look like a real campus deployment:
+
+* categories and priorities are skewed towards the common cases;
+* complaints are mostly recent, and older ones are more often resolved;
+* a few staff members carry most of the work in each category;
+* every status change leaves a history row;
+* a small share of complaints is soft deleted.
+
+Rows are generated in batches and inserted with ``executemany``, one
+large transaction per ``--commit-every`` complaints. Each demo password
+is hashed once and the hash is shared by every account of that role.
+The complaint counters and the full-text index are filled in bulk
+afterwards instead of row by row.
+"""
+import bisect
+import itertools
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import func, select
+
+from app import db
+from app import passwords
+from app import search as complaint_search
+from app import stats
+from app.models import Complaint, ComplaintHistory, User
+from app.tasks import ESCALATED
+
+CATEGORIES = {'Electricity': 25, 'Water Supply': 20, 'Roads & Streets': 15,
+              'Sanitation & Garbage': 15, 'Public Transport': 10, 'Other': 15}
+PRIORITIES = {'Low': 50, 'Medium': 35, 'High': 15}
+DEMO_PASSWORDS = {'admin': 'admin123', 'staff': 'staff123', 'student': 'student123'}
+
+_PROBLEMS = {
+    'Electricity': ['Power outage', 'Flickering lights', 'Broken socket', 'Fan not working', 'Exposed wiring'],
+    'Water Supply': ['No water', 'Leaking tap', 'Low pressure', 'Dirty water', 'Burst pipe'],
+    'Roads & Streets': ['Pothole', 'Broken pavement', 'Blocked path', 'Missing signage', 'Street light out'],
+    'Sanitation & Garbage': ['Overflowing bin', 'Blocked drain', 'Dirty washroom', 'Missed collection', 'Bad odour'],
+    'Public Transport': ['Late shuttle', 'Crowded bus', 'Missed stop', 'Broken seat', 'Rude driver'],
+    'Other': ['Noise complaint', 'Lost property', 'Broken furniture', 'Wi-Fi down', 'Pest sighting'],
+}
+_PLACES = ['Block A', 'Block B', 'Block C', 'Library', 'Canteen', 'Hostel 1', 'Hostel 2', 'Main Gate',
+           'Sports Complex', 'Auditorium', 'Lab Wing', 'Parking Lot']
+_DETAILS = ['Reported several times already.', 'Started this morning.', 'Affects the whole floor.',
+            'Students are unable to use the area.', 'Please send someone soon.', 'It gets worse in the evening.']
+
+_STAFF_PER_CATEGORY = 3  # people who handle most of a category
+
+COMPLAINT_COLUMNS = ('id', 'title', 'category', 'description', 'priority', 'location', 'image_file',
+                     'date_posted', 'date_updated', 'status', 'user_id', 'assigned_to', 'is_deleted')
+HISTORY_COLUMNS = ('complaint_id', 'date_changed', 'old_status', 'new_status', 'notes', 'changed_by')
+
+# Status changes leading to each final status
+_PATHS = {'Pending': (), 'In Progress': ('In Progress',), 'Resolved': ('In Progress', 'Resolved'),
+          ESCALATED: ('In Progress', ESCALATED)}
+
+
+# random.choice() and choices() are most of the generation time at a
+# million rows; these draw from a single random() call instead
+def _weighted(rng, weights):
+    population = list(weights)
+    cumulative = list(itertools.accumulate(weights.values()))
+    total = cumulative[-1]
+    random_ = rng.random
+    return lambda: population[bisect.bisect(cumulative, random_() * total)]
+
+
+def _uniform(rng, population):
+    population = list(population)
+    size = len(population)
+    random_ = rng.random
+    return lambda: population[int(random_() * size)]
+
+
+class Generator:
+    """Deterministic source of synthetic users, complaints and history rows."""
+
+    def __init__(self, seed=0, anchor=None, days=365):
+        self.rng = random.Random(seed)
+        self.anchor = anchor or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.days = days
+        self.category = _weighted(self.rng, CATEGORIES)
+        self.priority = _weighted(self.rng, PRIORITIES)
+
+    def users(self, students, staff, password_hashes):
+        rows = [{'id': 1, 'username': 'admin', 'email': 'admin@asmedu.org',
+                 'password': password_hashes['admin'], 'role': 'admin'}]
+        for i in range(staff):
+            rows.append({'id': len(rows) + 1, 'username': f'staff{i + 1}', 'email': f'staff{i + 1}@asmedu.org',
+                         'password': password_hashes['staff'], 'role': 'staff'})
+        for i in range(students):
+            rows.append({'id': len(rows) + 1, 'username': f'student{i + 1}', 'email': f'student{i + 1}@asmedu.org',
+                         'password': password_hashes['student'], 'role': 'student'})
+        return rows
+
+    def assign_teams(self, staff_ids):
+        """``{category: pick()}``: a small core team does most of each category."""
+        teams = {}
+        for category in CATEGORIES:
+            core = self.rng.sample(staff_ids, min(_STAFF_PER_CATEGORY, len(staff_ids)))
+            teams[category] = _weighted(self.rng, {member: 20 if member in core else 1 for member in staff_ids})
+        return teams
+
+    def complaints(self, count, student_ids, staff_ids, first_id=1):
+        """Yield ``(complaint, history)``: a ``COMPLAINT_COLUMNS`` tuple and a list of ``HISTORY_COLUMNS`` tuples."""
+        rng = self.rng
+        random_ = rng.random
+        teams = self.assign_teams(staff_ids) if staff_ids else {}
+        problems = {category: _uniform(rng, choices) for category, choices in _PROBLEMS.items()}
+        place_of, detail_of, student_of = _uniform(rng, _PLACES), _uniform(rng, _DETAILS), _uniform(rng, student_ids)
+        for complaint_id in range(first_id, first_id + count):
+            category = self.category()
+            # Skewed towards recent complaints: half are under ~3 months old
+            age_days = self.days * random_() ** 2
+            posted = self.anchor - timedelta(days=age_days)
+
+            assignee = None
+            status = 'Pending'
+            if staff_ids and random_() < min(0.97, 0.3 + age_days / 5):
+                assignee = teams[category]()
+                status = 'In Progress'
+                if random_() < min(0.95, age_days / 30):
+                    status = 'Resolved'
+                elif age_days > 7 and random_() < 0.2:
+                    status = ESCALATED
+
+            history = []
+            changed = posted
+            old_status = 'Pending'
+            for new_status in _PATHS[status]:
+                changed = min(self.anchor, changed + timedelta(hours=rng.expovariate(1 / 48)))
+                history.append((complaint_id, changed, old_status, new_status, None,
+                                assignee if new_status != ESCALATED else None))
+                old_status = new_status
+
+            problem = problems[category]()
+            place = place_of()
+            yield (complaint_id, f'{problem} at {place}', category, f'{problem} near {place}. {detail_of()}',
+                   self.priority(), place, None, posted, changed, status, student_of(), assignee,
+                   random_() < 0.02), history
+
+
+class _Inserter:
+    """``executemany`` of row tuples into ``table``.
+
+    On SQLite the rows go straight to the DBAPI cursor, with datetimes
+    formatted the way SQLAlchemy stores them. That skips the per-value bind
+    processing, which would otherwise cost as much as the inserts themselves.
+    """
+
+    def __init__(self, connection, table, columns):
+        self.connection = connection
+        self.columns = columns
+        self.dates = [i for i, name in enumerate(columns) if isinstance(table.c[name].type, db.DateTime)]
+        if connection.dialect.name == 'sqlite':
+            self.sql = (f'INSERT INTO {table.name} ({", ".join(columns)}) '
+                        f'VALUES ({", ".join("?" * len(columns))})')
+        else:
+            self.sql = None
+            self.statement = table.insert()
+
+    def __call__(self, rows):
+        if not rows:
+            return
+        if self.sql is None:
+            self.connection.execute(self.statement, [dict(zip(self.columns, row)) for row in rows])
+            return
+        dates = self.dates
+        converted = []
+        for row in rows:
+            row = list(row)
+            for i in dates:
+                row[i] = row[i].isoformat(' ', 'microseconds')
+            converted.append(tuple(row))
+        self.connection.exec_driver_sql(self.sql, converted)
+
+
+def seed_synthetic(users=1000, staff=25, complaints=10000, seed=0, anchor=None, days=365,
+                   batch_size=5000, commit_every=200000, progress=None):
+    """Insert a synthetic data set into an empty database; returns row counts.
+
+    ``progress`` is called with the number of complaints inserted so far
+    after every commit.
+    """
+    if db.session.execute(select(func.count(User.id))).scalar():
+        raise click.ClickException('The database already has users; seed into an empty database.')
+
+    fts = complaint_search.fts_enabled()  # checked up front: it may use a connection of its own
+    generator = Generator(seed, anchor, days)
+    hashes = {role: passwords.hash_password(password) for role, password in DEMO_PASSWORDS.items()}
+    user_rows = generator.users(users, staff, hashes)
+    db.session.execute(User.__table__.insert(), user_rows)
+    staff_ids = [row['id'] for row in user_rows if row['role'] == 'staff']
+    student_ids = [row['id'] for row in user_rows if row['role'] == 'student'] or [1]
+
+    # Maintaining the secondary indexes and the full-text index row by row
+    # costs more than the inserts; drop them now and build them once at the end
+    connection = db.session.connection()
+    indexes = list(Complaint.__table__.indexes) + list(ComplaintHistory.__table__.indexes)
+    for index in indexes:
+        index.drop(connection)
+    if fts:
+        db.session.execute(db.text('DROP TRIGGER IF EXISTS complaint_fts_ai'))
+    db.session.commit()
+
+    deltas = Counter()
+    counts = Counter(users=len(user_rows))
+    complaint_batch, history_batch = [], []
+
+    def insert_batch():
+        connection = db.session.connection()
+        _Inserter(connection, Complaint.__table__, COMPLAINT_COLUMNS)(complaint_batch)
+        _Inserter(connection, ComplaintHistory.__table__, HISTORY_COLUMNS)(history_batch)
+        # In the rows' own transaction: a failure later on leaves no complaint uncounted
+        stats.apply_deltas(connection, deltas)
+        counts['complaints'] += len(complaint_batch)
+        counts['history'] += len(history_batch)
+        complaint_batch.clear()
+        history_batch.clear()
+        deltas.clear()
+
+    try:
+        for complaint, history in generator.complaints(complaints, student_ids, staff_ids):
+            complaint_batch.append(complaint)
+            history_batch.extend(history)
+            deltas[stats.stat_key(complaint[9], complaint[2], complaint[12])] += 1
+            if len(complaint_batch) < batch_size:
+                continue
+            insert_batch()
+            if counts['complaints'] % commit_every < batch_size:
+                db.session.commit()
+                if progress:
+                    progress(counts['complaints'])
+
+        insert_batch()
+        db.session.commit()
+    finally:
+        db.session.rollback()
+        connection = db.session.connection()
+        if connection.dialect.name == 'sqlite':
+            # Index builds sort the whole table; give them room (256 MiB) for this connection only
+            cache_size = connection.exec_driver_sql('PRAGMA cache_size').scalar()
+            connection.exec_driver_sql('PRAGMA cache_size = -262144')
+        for index in indexes:
+            index.create(connection)
+        if fts:
+            for statement in complaint_search.FTS_DDL:
+                db.session.execute(db.text(statement))
+            db.session.execute(db.text(f"INSERT INTO {complaint_search.FTS_TABLE}({complaint_search.FTS_TABLE}) "
+                                       "VALUES ('rebuild')"))
+        if connection.dialect.name == 'sqlite':
+            connection.exec_driver_sql(f'PRAGMA cache_size = {int(cache_size)}')
+        db.session.commit()
+    if progress:
+        progress(counts['complaints'])
+    return counts
+
+
+seed_cli = AppGroup('seed', help='Fill the database with demo or synthetic data.')
+
+
+@seed_cli.command('synthetic')
+@click.option('--users', type=int, default=1000, show_default=True, help='Student accounts.')
+@click.option('--staff', type=int, default=25, show_default=True, help='Staff accounts.')
+@click.option('--complaints', type=int, default=10000, show_default=True)
+@click.option('--seed', type=int, default=0, show_default=True, help='Random seed; same seed, same data.')
+@click.option('--anchor', type=click.DateTime(), default=None,
+              help='Newest possible posting time (default: today 00:00 UTC).')
+@click.option('--days', type=int, default=365, show_default=True, help='How far back complaints go.')
+@click.option('--batch-size', type=int, default=5000, show_default=True, help='Rows per executemany.')
+@click.option('--commit-every', type=int, default=200000, show_default=True, help='Complaints per transaction.')
+def synthetic_command(users, staff, complaints, seed, anchor, days, batch_size, commit_every):
+    """Seed an empty database with synthetic users, complaints and history."""
+    started = time.perf_counter()
+
+    def progress(done):
+        click.echo(f'  {done} complaints ({time.perf_counter() - started:.1f}s)')
+
+    counts = seed_synthetic(users, staff, complaints, seed, anchor, days, batch_size, commit_every, progress)
+    click.echo(f"Seeded {counts['users']} users, {counts['complaints']} complaints and "
+               f"{counts['history']} history rows in {time.perf_counter() - started:.1f}s.")
+    click.echo('Passwords: ' + ', '.join(f'{role} / {password}' for role, password in DEMO_PASSWORDS.items()))
@@ -0,0 +1,37 @@
+"""Connection profile for running on SQLite under several worker processes.
+
+Every new DBAPI connection gets the ``SQLITE_PRAGMAS`` from the config.
+The important ones are ``journal_mode=WAL``, which lets readers keep going
+while one process writes, and ``busy_timeout``, which makes a writer wait
+for the lock instead of failing with ``database is locked``.
+``synchronous=NORMAL`` is safe in WAL mode: a power cut can lose the last
+transactions but never corrupts the database.
+
+Other databases are left untouched.
+"""
+from sqlalchemy import event
+
+from app import db
+
+
+def init_app(app):
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+        finally:
+            cursor.close()
+
+
+def current_pragmas(names):
+    """``{name: value}`` as seen by a pooled connection, for checks and tests."""
+    with db.engine.connect() as connection:
+        return {name: connection.exec_driver_sql(f'PRAGMA {name}').scalar() for name in names}
@@ -1,8 +1,11 @@
-from flask import Blueprint, render_template, url_for, flash, redirect, request, abort
+from flask import Blueprint, render_template, url_for, flash, redirect, request, abort, current_app
 from flask_login import current_user, login_required
 from app import db
-from app.models import Complaint
+from app.models import Complaint, User
 from functools import wraps
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+from app.pagination import paginate
 
 staff = Blueprint('staff', __name__)
 
@@ -16,17 +19,65 @@ def staff_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# Order in which open complaints are worked through
+PRIORITIES = ('High', 'Medium', 'Low')
+
+def _status_counts(staff_id):
+    """Per-status totals for a staff member's complaints in one grouped query."""
+    rows = db.session.query(Complaint.status, func.count(Complaint.id)).filter(
+        Complaint.assigned_to == staff_id,
+        Complaint.is_deleted == False
+    ).group_by(Complaint.status).all()
+    return {status: count for status, count in rows}
+
+def _active_queue(staff_id, limit, open_total):
+    """Open complaints, highest priority first and oldest first within a priority.
+
+    One index seek per priority level, stopping once ``limit`` rows are found.
+    """
+    base = Complaint.query.filter(
+        Complaint.assigned_to == staff_id,
+        Complaint.is_deleted == False,
+        Complaint.status != 'Resolved'
+    ).options(
+        joinedload(Complaint.author).load_only(User.username)
+    )
+
+    queue = []
+    for priority in PRIORITIES:
+        if len(queue) >= limit:
+            break
+        queue.extend(base.filter(Complaint.priority == priority)
+                     .order_by(Complaint.date_posted.asc(), Complaint.id.asc())
+                     .limit(limit - len(queue)).all())
+
+    # Complaints with an unexpected priority go last
+    if len(queue) < min(limit, open_total):
+        queue.extend(base.filter(Complaint.priority.notin_(PRIORITIES))
+                     .order_by(Complaint.date_posted.asc(), Complaint.id.asc())
+                     .limit(limit - len(queue)).all())
+    return queue
+
 @staff.route("/")
 @staff.route("/dashboard")
 @staff_required
 def dashboard():
-    """Staff dashboard - view assigned complaints."""
-    complaints = Complaint.query.filter(
+    """Staff dashboard - open task queue plus a paginated archive of resolved tasks."""
+    status_counts = _status_counts(current_user.id)
+    open_total = sum(count for status, count in status_counts.items() if status != 'Resolved')
+
+    queue_limit = current_app.config['STAFF_QUEUE_LIMIT']
+    queue = _active_queue(current_user.id, queue_limit, open_total)
+
+    archive = paginate(Complaint.query.filter(
         Complaint.assigned_to == current_user.id,
-        Complaint.is_deleted == False
-    ).order_by(Complaint.date_posted.desc()).all()
+        Complaint.is_deleted == False,
+        Complaint.status == 'Resolved'
+    ), per_page=current_app.config['STAFF_ARCHIVE_PER_PAGE'], total=status_counts.get('Resolved', 0))
 
-    return render_template('staff/dashboard.html', title='Staff Tasks', complaints=complaints)
+    return render_template('staff/dashboard.html', title='Staff Tasks', queue=queue,
+                           open_total=open_total, status_counts=status_counts,
+                           archive=archive.items, pagination=archive)
 
 @staff.route("/update/<int:complaint_id>", methods=['GET', 'POST'])
 @staff_required
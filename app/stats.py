@@ -0,0 +1,338 @@
+"""Incrementally maintained complaint counters for the admin dashboard.
+
+Every flush that creates, edits, re-statuses, soft deletes or removes a
+``Complaint`` adjusts the matching ``complaint_stat`` rows in the same
+transaction, so the dashboard reads a handful of counter rows instead of
+scanning the complaint table. Code that bypasses the ORM unit of work
+(set-based ``UPDATE`` statements) must call ``apply_deltas`` and
+``invalidate_on_commit`` itself.
+
+The chart data served by ``/admin/api/stats`` is additionally kept in a
+short-lived per-process ``BreakdownCache``, one entry per time window.
+A commit that changed any counter clears this process's entries; other
+workers serve theirs until ``STATS_CACHE_TTL`` runs out. The entries are
+cleared after the commit, not at flush time: another request thread could
+otherwise refill the cache from the old data before the commit lands.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app, has_app_context
+from flask.cli import AppGroup
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import Complaint, ComplaintStat
+
+# Statuses always shown on the dashboard, even when their count is zero
+DASHBOARD_STATUSES = ('Pending', 'In Progress', 'Resolved')
+
+_TRACKED = ('status', 'category', 'is_deleted')
+
+
+def stat_key(status, category, is_deleted):
+    """Normalise a counter key to ``(status, category, is_deleted)``."""
+    return (status, category, bool(is_deleted))
+
+
+def apply_deltas(connection, deltas):
+    """Add each ``{(status, category, is_deleted): delta}`` to the counters."""
+    rows = [{'status': s, 'category': c, 'is_deleted': d, 'count': n}
+            for (s, c, d), n in deltas.items() if n]
+    if not rows:
+        return
+
+    table = ComplaintStat.__table__
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.status, table.c.category, table.c.is_deleted],
+            set_={'count': table.c.count + stmt.excluded['count']}
+        )
+        connection.execute(stmt, rows)
+        return
+
+    # Generic fallback: update in place, insert the rows that did not exist yet
+    for row in rows:
+        result = connection.execute(
+            table.update()
+            .where(table.c.status == row['status'],
+                   table.c.category == row['category'],
+                   table.c.is_deleted == row['is_deleted'])
+            .values(count=table.c.count + row['count'])
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**row))
+
+
+def _previous_key(complaint):
+    """Counter key for the complaint as it was last persisted."""
+    state = inspect(complaint)
+    values = []
+    for name in _TRACKED:
+        history = state.attrs[name].history
+        if history.deleted:
+            values.append(history.deleted[0])
+        elif history.unchanged:
+            values.append(history.unchanged[0])
+        else:
+            values.append(getattr(complaint, name))
+    return stat_key(*values)
+
+
+def _current_key(complaint):
+    return stat_key(complaint.status, complaint.category, complaint.is_deleted)
+
+
+def collect_deltas(session):
+    """Counter deltas implied by the pending changes of ``session``."""
+    deltas = Counter()
+    for obj in session.new:
+        if isinstance(obj, Complaint):
+            deltas[_current_key(obj)] += 1
+    for obj in session.dirty:
+        if isinstance(obj, Complaint):
+            old, new = _previous_key(obj), _current_key(obj)
+            if old != new:
+                deltas[old] -= 1
+                deltas[new] += 1
+    for obj in session.deleted:
+        if isinstance(obj, Complaint):
+            deltas[_previous_key(obj)] -= 1
+    return deltas
+
+
+@event.listens_for(Session, 'after_flush')
+def _update_counters(session, flush_context):
+    deltas = collect_deltas(session)
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+        invalidate_on_commit(session)
+
+
+def invalidate_on_commit(session):
+    """Clear this process's cache once ``session``'s transaction commits."""
+    session.info['stats_stale'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed(session):
+    if session.info.pop('stats_stale', False):
+        invalidate_breakdowns()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back(session):
+    session.info.pop('stats_stale', None)
+
+
+def _load_old_value(target, value, oldvalue, initiator):
+    return value
+
+
+# Make the tracked attributes load their committed value before being
+# overwritten, so the flush hook always knows which counter to decrement.
+for _name in _TRACKED:
+    event.listen(getattr(Complaint, _name), 'set', _load_old_value,
+                 retval=True, active_history=True)
+
+
+def dashboard_counts():
+    """Return ``(status_counts, category_counts)`` for live complaints.
+
+    Reads the counters table only, so the cost does not depend on the
+    number of complaints.
+    """
+    rows = db.session.execute(
+        select(ComplaintStat.status, ComplaintStat.category, ComplaintStat.count)
+        .where(ComplaintStat.is_deleted == False, ComplaintStat.count != 0)
+    ).all()
+    return _fold(rows)
+
+
+def _fold(rows):
+    status_counts = {status: 0 for status in DASHBOARD_STATUSES}
+    category_counts = {}
+    for status, category, count in rows:
+        status_counts[status] = status_counts.get(status, 0) + count
+        category_counts[category] = category_counts.get(category, 0) + count
+    return status_counts, category_counts
+
+
+def window_counts(since):
+    """Like ``dashboard_counts`` but only for complaints posted at or after ``since``.
+
+    The counters carry no dates, so this groups the live complaints in the
+    window; the ``date_posted`` partial index keeps it to a range scan.
+    """
+    rows = db.session.execute(
+        select(Complaint.status, Complaint.category, func.count(Complaint.id))
+        .where(Complaint.is_deleted == False, Complaint.date_posted >= since)
+        .group_by(Complaint.status, Complaint.category)
+    ).all()
+    return _fold(rows)
+
+
+@dataclass(frozen=True)
+class Breakdown:
+    """Serialised chart data for one time window, with its entity tag."""
+    body: bytes
+    etag: str
+
+
+class BreakdownCache:
+    """Thread-safe map whose entries expire after ``ttl``.
+
+    Holds the chart ``Breakdown`` for each window, keyed by ``days``, and
+    the assign dropdowns' open counts (see ``assignment.open_counts``).
+    """
+
+    def __init__(self, ttl=30, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > self.clock():
+                self.hits += 1
+                return entry[0]
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, self.clock() + self.ttl)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def init_app(app):
+    app.extensions['stats_cache'] = BreakdownCache(ttl=app.config.get('STATS_CACHE_TTL', 30))
+
+
+def invalidate_breakdowns():
+    cache = current_app.extensions.get('stats_cache') if has_app_context() else None
+    if cache is not None:
+        cache.clear()
+
+
+def cached(key, compute):
+    """The per-process cache's fresh entry for ``key``, or ``compute()`` stored under it."""
+    cache = current_app.extensions['stats_cache']
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.put(key, value)
+    return value
+
+
+def breakdown(days=None, now=None):
+    """Chart data for live complaints, all time or posted in the last ``days`` days.
+
+    Served from the per-process cache when a fresh entry exists.
+    """
+    return cached(days, lambda: _breakdown(days, now))
+
+
+def _breakdown(days, now):
+    if days is None:
+        status_counts, category_counts = dashboard_counts()
+    else:
+        now = now or datetime.utcnow()
+        status_counts, category_counts = window_counts(now - timedelta(days=days))
+    body = json.dumps({
+        'days': days,
+        'total': sum(status_counts.values()),
+        'status': status_counts,
+        'category': dict(sorted(category_counts.items())),
+    }, separators=(',', ':')).encode('utf-8')
+    return Breakdown(body, hashlib.blake2b(body, digest_size=16).hexdigest())
+
+
+def live_count(status=None, category=None):
+    """Number of live complaints matching the optional filters, from the counters."""
+    query = select(func.coalesce(func.sum(ComplaintStat.count), 0)).where(ComplaintStat.is_deleted == False)
+    if status:
+        query = query.where(ComplaintStat.status == status)
+    if category:
+        query = query.where(ComplaintStat.category == category)
+    return db.session.execute(query).scalar()
+
+
+def _actual_counts():
+    rows = db.session.execute(
+        select(Complaint.status, Complaint.category, Complaint.is_deleted, func.count(Complaint.id))
+        .group_by(Complaint.status, Complaint.category, Complaint.is_deleted)
+    ).all()
+    return {stat_key(s, c, d): n for s, c, d, n in rows}
+
+
+def _stored_counts():
+    rows = db.session.execute(
+        select(ComplaintStat.status, ComplaintStat.category, ComplaintStat.is_deleted, ComplaintStat.count)
+        .where(ComplaintStat.count != 0)
+    ).all()
+    return {stat_key(s, c, d): n for s, c, d, n in rows}
+
+
+def rebuild():
+    """Recompute every counter from the complaint table. Returns the row count."""
+    actual = _actual_counts()
+    db.session.execute(ComplaintStat.__table__.delete())
+    if actual:
+        db.session.execute(ComplaintStat.__table__.insert(), [
+            {'status': s, 'category': c, 'is_deleted': d, 'count': n}
+            for (s, c, d), n in actual.items()
+        ])
+    db.session.commit()
+    return len(actual)
+
+
+def find_mismatches():
+    """Compare counters with a full scan; returns ``{key: (stored, actual)}``."""
+    actual = _actual_counts()
+    stored = _stored_counts()
+    return {key: (stored.get(key, 0), actual.get(key, 0))
+            for key in set(actual) | set(stored)
+            if stored.get(key, 0) != actual.get(key, 0)}
+
+
+stats_cli = AppGroup('stats', help='Maintain the complaint statistics counters.')
+
+
+@stats_cli.command('rebuild')
+def rebuild_command():
+    """Rebuild the complaint counters from scratch."""
+    rows = rebuild()
+    click.echo(f'Rebuilt complaint statistics ({rows} counter rows).')
+
+
+@stats_cli.command('check')
+def check_command():
+    """Verify the complaint counters against the complaint table."""
+    mismatches = find_mismatches()
+    if not mismatches:
+        click.echo('Complaint statistics are consistent.')
+        return
+    for (status, category, is_deleted), (stored, actual) in sorted(mismatches.items()):
+        click.echo(f'{status} / {category} / deleted={is_deleted}: stored {stored}, actual {actual}')
+    raise SystemExit(1)
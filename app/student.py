@@ -1,11 +1,13 @@
 import os
-import uuid
-from flask import Blueprint, render_template, url_for, flash, redirect, request, current_app, abort, send_from_directory
+from flask import Blueprint, render_template, url_for, flash, redirect, request, current_app, abort
 from flask_login import current_user, login_required
 from werkzeug.utils import secure_filename
 from app import db
+from app import assignment
+from app import uploads
 from app.models import Complaint
-from flask_paginate import Pagination, get_page_parameter
+from app import search as complaint_search
+from app.pagination import paginate
 from functools import wraps
 
 student = Blueprint('student', __name__)
@@ -25,24 +27,18 @@ def _allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in current_app.config.get('ALLOWED_EXTENSIONS', set())
 
 def save_picture(form_picture):
-    """Save uploaded image with unique filename."""
+    """Save uploaded image under its content hash; identical images are stored once."""
     filename = secure_filename(form_picture.filename)
     if filename == '' or not _allowed_file(filename):
         return None
     _, f_ext = os.path.splitext(filename)
-    unique_filename = str(uuid.uuid4()) + f_ext
-    upload_folder = current_app.config['UPLOAD_FOLDER']
-    os.makedirs(upload_folder, exist_ok=True)
-    picture_path = os.path.join(upload_folder, unique_filename)
-    form_picture.save(picture_path)
-    return unique_filename
+    return uploads.store(form_picture, f_ext)
 
 @student.route("/")
 @student.route("/dashboard")
 @student_required
 def dashboard():
 
-    page = request.args.get(get_page_parameter(), type=int, default=1)
     per_page = 10
 
     # Search functionality
@@ -51,15 +47,16 @@ def dashboard():
 
     query = Complaint.query.filter(Complaint.user_id == current_user.id, Complaint.is_deleted == False)
 
-    if search:
-        query = query.filter(Complaint.title.contains(search))
     if category_filter:
         query = query.filter(Complaint.category == category_filter)
 
-    complaints = query.order_by(Complaint.date_posted.desc()).paginate(page=page, per_page=per_page, error_out=False)
-    pagination = Pagination(page=page, total=complaints.total, per_page=per_page, css_framework='bootstrap5')
+    if search:
+        query = complaint_search.apply(query, search)
+    pagination = paginate(query, per_page=per_page, ranked=bool(search))
+    snippets = complaint_search.snippets((c.id for c in pagination.items), search)
 
-    return render_template('student/dashboard.html', title='My Complaints', complaints=complaints, pagination=pagination)
+    return render_template('student/dashboard.html', title='My Complaints', complaints=pagination.items,
+                           pagination=pagination, search=search, snippets=snippets)
 
 @student.route("/complaint/new", methods=['GET', 'POST'])
 @student_required
@@ -84,6 +81,8 @@ def new_complaint():
         complaint = Complaint(title=title, category=category, priority=priority,
                               location=location, description=description,
                               image_file=picture_file, user_id=current_user.id)
+        if current_app.config.get('AUTO_ASSIGN_ON_CREATE'):
+            assignment.auto_assign(complaint)
         db.session.add(complaint)
         db.session.commit()
 
@@ -135,5 +134,5 @@ def view_complaint(complaint_id):
 @student.route("/uploads/<filename>")
 @login_required
 def uploaded_file(filename):
-    """Serve uploaded files."""
-    return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
+    """Serve uploaded files, with long-lived caching and byte ranges."""
+    return uploads.send_upload(filename)
@@ -1,36 +1,189 @@
+"""Set-based auto-escalation of complaints left unresolved for too long.
+
+Overdue complaints are escalated in batches of ``ESCALATION_BATCH_SIZE``
+ids. Each batch is one short transaction made of three statements: an
+``INSERT ... SELECT`` writing the history rows, an ``UPDATE ... WHERE id IN``
+changing the status, and the matching counter deltas. No complaint is
+loaded into the session, so memory stays flat however many are overdue.
+
+How long a complaint may stay open is ``ESCALATION_THRESHOLD_DAYS``,
+overridden per category and/or priority by ``ESCALATION_THRESHOLDS``.
+"""
+import time
+from collections import Counter
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import and_, case, func, insert, literal, null, select, update
+
+from app import db
+from app import stats
 from app.models import Complaint, ComplaintHistory
 
-def auto_escalate_complaints(app):
-    """Auto-escalate complaints older than 3 days that are not resolved."""
-    with app.app_context():
-        three_days_ago = datetime.utcnow() - timedelta(days=3)
-        pending_complaints = Complaint.query.filter(
-            ~Complaint.status.in_(['Resolved', 'Escalated']),
-            Complaint.date_posted <= three_days_ago,
-            Complaint.is_deleted == False
+ESCALATED = 'Escalated'
+
+# Complaints in these statuses are never escalated
+_CLOSED_STATUSES = ('Resolved', ESCALATED)
+
+ESCALATION_NOTE = 'System auto-escalation (unresolved past its threshold).'
+
+
+@dataclass
+class EscalationReport:
+    """Outcome and timings of one escalation run."""
+    dry_run: bool
+    escalated: int = 0
+    batches: int = 0
+    elapsed: float = 0.0  # seconds
+    slowest_batch: float = 0.0  # seconds; bounds how long the write lock was held
+    by_category: Counter = field(default_factory=Counter)
+
+
+def _cutoff(now, default_days, thresholds):
+    """Return ``(cutoff, latest)``: the per-row cutoff expression and its upper bound.
+
+    Rules naming both a category and a priority win over category-only
+    rules, which win over priority-only rules.
+    """
+    specific = []
+    for (category, priority), days in thresholds.items():
+        conditions = []
+        if category is not None:
+            conditions.append(Complaint.category == category)
+        if priority is not None:
+            conditions.append(Complaint.priority == priority)
+        if not conditions:
+            default_days = days
+            continue
+        specific.append(((category is not None, priority is not None), and_(*conditions), now - timedelta(days=days)))
+    specific.sort(key=lambda rule: rule[0], reverse=True)
+
+    default = now - timedelta(days=default_days)
+    latest = max([default] + [rule[2] for rule in specific])
+    if not specific:
+        return literal(default, db.DateTime), latest
+    whens = [(condition, literal(cutoff, db.DateTime)) for _, condition, cutoff in specific]
+    return case(*whens, else_=literal(default, db.DateTime)), latest
+
+
+def overdue_filter(now=None):
+    """SQL condition selecting the live, open complaints that are past their threshold."""
+    config = current_app.config
+    cutoff, latest = _cutoff(now or datetime.utcnow(),
+                             config.get('ESCALATION_THRESHOLD_DAYS', 3),
+                             config.get('ESCALATION_THRESHOLDS') or {})
+    return and_(
+        Complaint.is_deleted == False,
+        Complaint.status.notin_(_CLOSED_STATUSES),
+        Complaint.date_posted <= latest,  # plain range the date index can serve
+        Complaint.date_posted <= cutoff,
+    )
+
+
+def _escalate_batch(ids, overdue, now):
+    """Escalate the still-overdue complaints among ``ids``; returns their categories."""
+    in_batch = and_(Complaint.id.in_(ids), overdue)
+
+    # Writing the history first takes the write lock, so the rows grouped
+    # below are exactly the rows the UPDATE is about to change
+    db.session.execute(insert(ComplaintHistory.__table__).from_select(
+        ['complaint_id', 'date_changed', 'old_status', 'new_status', 'notes', 'changed_by'],
+        select(Complaint.id, literal(now, db.DateTime), Complaint.status,
+               literal(ESCALATED), literal(ESCALATION_NOTE), null()).where(in_batch)
+    ))
+    groups = db.session.execute(
+        select(Complaint.status, Complaint.category, func.count(Complaint.id))
+        .where(in_batch).group_by(Complaint.status, Complaint.category)
+    ).all()
+    db.session.execute(update(Complaint.__table__).where(in_batch).values(status=ESCALATED))
+
+    deltas = Counter()
+    categories = Counter()
+    for status, category, count in groups:
+        deltas[stats.stat_key(status, category, False)] -= count
+        deltas[stats.stat_key(ESCALATED, category, False)] += count
+        categories[category] += count
+    stats.apply_deltas(db.session.connection(), deltas)
+    stats.invalidate_on_commit(db.session)
+    return categories
+
+
+def escalate_overdue(now=None, dry_run=False, batch_size=None):
+    """Escalate every overdue complaint; returns an ``EscalationReport``.
+
+    With ``dry_run`` nothing is written and the report holds the number of
+    complaints that would be escalated.
+    """
+    now = now or datetime.utcnow()
+    batch_size = batch_size or current_app.config.get('ESCALATION_BATCH_SIZE', 500)
+    overdue = overdue_filter(now)
+    report = EscalationReport(dry_run=dry_run)
+    started = time.perf_counter()
+
+    if dry_run:
+        rows = db.session.execute(
+            select(Complaint.category, func.count(Complaint.id)).where(overdue).group_by(Complaint.category)
         ).all()
+        report.by_category.update(dict(rows))
+        report.escalated = sum(report.by_category.values())
+    else:
+        last_id = 0
+        while True:
+            ids = db.session.execute(
+                select(Complaint.id).where(overdue, Complaint.id > last_id)
+                .order_by(Complaint.id).limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                break
+            last_id = ids[-1]
+
+            batch_started = time.perf_counter()
+            try:
+                categories = _escalate_batch(ids, overdue, now)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            report.slowest_batch = max(report.slowest_batch, time.perf_counter() - batch_started)
+            report.batches += 1
+            report.by_category.update(categories)
+            report.escalated += sum(categories.values())
+        db.session.commit()  # end the read transaction of the last id lookup
+
+    report.elapsed = time.perf_counter() - started
+    current_app.logger.info(
+        'Escalation%s: %d complaints, %d batches, %.3fs (slowest batch %.3fs)',
+        ' (dry run)' if dry_run else '', report.escalated, report.batches,
+        report.elapsed, report.slowest_batch,
+    )
+    return report
+
+
+def escalation_job():
+    """Escalate complaints left unresolved past their threshold."""
+    report = escalate_overdue()
+    return f'{report.escalated} escalated in {report.batches} batches'
+
+
+def init_app(app):
+    app.extensions['scheduler'].register('escalate', app.config.get('ESCALATION_SCHEDULE', '0 2 * * *'),
+                                         escalation_job)
+
+
+tasks_cli = AppGroup('tasks', help='Run background maintenance tasks by hand.')
+
 
-        for c in pending_complaints:
-            old_status = c.status
-            c.status = 'Escalated'
-            history = ComplaintHistory(
-                complaint_id=c.id,
-                old_status=old_status,
-                new_status='Escalated',
-                notes='System auto-escalation (> 3 days).',
-                changed_by=None
-            )
-            app.db.session.add(history)
-        app.db.session.commit()
-
-def schedule_escalation(app, scheduler):
-    """Schedule auto-escalation to run daily."""
-    scheduler.add_job(
-        func=auto_escalate_complaints,
-        args=[app],
-        trigger="interval",
-        hours=24,
-        id='escalation_job',
-        replace_existing=True
-    )
\ No newline at end of file
+@tasks_cli.command('escalate')
+@click.option('--dry-run', is_flag=True, help='Only report how many complaints would be escalated.')
+@click.option('--batch-size', type=int, default=None, help='Complaints per transaction.')
+def escalate_command(dry_run, batch_size):
+    """Escalate complaints left unresolved past their threshold."""
+    report = escalate_overdue(dry_run=dry_run, batch_size=batch_size)
+    verb = 'Would escalate' if dry_run else 'Escalated'
+    click.echo(f'{verb} {report.escalated} complaints in {report.elapsed:.2f}s'
+               + ('' if dry_run else f' ({report.batches} batches, slowest {report.slowest_batch:.3f}s)') + '.')
+    for category, count in sorted(report.by_category.items()):
+        click.echo(f'  {category}: {count}')
@@ -0,0 +1,296 @@
+"""Content-addressed storage for uploaded images.
+
+An upload is streamed to a temporary file in ``UPLOAD_FOLDER`` in chunks
+while its SHA-256 is computed, then renamed to ``<sha256>.<ext>``. The same
+photo submitted twice is therefore stored once.
+
+The ``upload`` table counts the complaints referencing each file. It is
+kept up to date by a flush hook, the same way ``app.stats`` keeps the
+dashboard counters. Files are never removed on the request path: ``flask
+uploads gc`` deletes unreferenced files (and their resized variants) once
+they are older than a grace period, which covers uploads whose complaint
+has not been committed yet.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass
+from urllib.parse import quote
+
+import click
+from flask import abort, current_app, request, send_file
+from flask.cli import AppGroup
+from werkzeug.security import safe_join
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app import db
+from app import images
+from app import metrics
+from app.models import Complaint, Upload
+
+CHUNK_SIZE = 64 * 1024
+_TEMP_PREFIX = '.upload-'
+
+# Extensions that name the same format are stored under one spelling
+_CANONICAL_EXTENSIONS = {'jpeg': 'jpg'}
+
+# <sha256>.<ext> or <sha256>.<variant>.jpg
+_CONTENT_ADDRESSED = re.compile(r'^([0-9a-f]{64}(?:\.[a-z]+)?)\.[a-z0-9]+$')
+
+
+def store(file_storage, extension):
+    """Stream ``file_storage`` into the upload folder; returns the stored filename."""
+    extension = extension.lower().lstrip('.')
+    extension = _CANONICAL_EXTENSIONS.get(extension, extension)
+    folder = current_app.config['UPLOAD_FOLDER']
+    os.makedirs(folder, exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(dir=folder, prefix=_TEMP_PREFIX, delete=False) as partial:
+        try:
+            while True:
+                chunk = file_storage.stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                partial.write(chunk)
+                size += len(chunk)
+        except BaseException:
+            partial.close()
+            os.unlink(partial.name)
+            raise
+
+    filename = f'{digest.hexdigest()}.{extension}'
+    path = os.path.join(folder, filename)
+    duplicate = os.path.exists(path)
+    if duplicate:
+        os.unlink(partial.name)
+        os.utime(path)  # restart the GC grace period for the reused file
+    else:
+        os.chmod(partial.name, 0o644)
+        os.replace(partial.name, path)
+        images.schedule_variants(filename)
+    metrics.record_upload(size, duplicate)
+    return filename
+
+
+def _etag(filename, stat):
+    """Strong validator: the content hash in the name, else mtime and size."""
+    match = _CONTENT_ADDRESSED.match(filename)
+    if match:
+        return match.group(1)
+    return f'{int(stat.st_mtime)}-{stat.st_size}'
+
+
+def send_upload(filename):
+    """Response serving an upload; callers have already checked access.
+
+    Upload names never change meaning, so responses may be cached for
+    ``UPLOAD_MAX_AGE`` without revalidation. With ``UPLOAD_SEND_MODE`` set
+    to ``x-accel`` or ``x-sendfile`` the body is left for the front proxy
+    to send, using the ``X-Accel-Redirect`` / ``X-Sendfile`` header.
+    """
+    folder = current_app.config['UPLOAD_FOLDER']
+    path = safe_join(folder, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    stat = os.stat(path)
+    etag = _etag(filename, stat)
+    max_age = current_app.config.get('UPLOAD_MAX_AGE', 365 * 86400)
+    mode = current_app.config.get('UPLOAD_SEND_MODE', 'direct')
+
+    if mode == 'direct':
+        response = send_file(path, etag=etag, max_age=max_age, conditional=True)
+    else:
+        response = current_app.response_class(
+            mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response.set_etag(etag)
+        response.last_modified = stat.st_mtime
+        if mode == 'x-accel':
+            response.headers['X-Accel-Redirect'] = current_app.config.get(
+                'UPLOAD_ACCEL_PREFIX', '/protected-uploads/') + quote(filename)
+        elif mode == 'x-sendfile':
+            response.headers['X-Sendfile'] = path
+        else:
+            raise ValueError(f'unknown UPLOAD_SEND_MODE {mode!r}')
+        # Validators are checked here; byte ranges are left to the proxy
+        response = response.make_conditional(request, accept_ranges=False)
+        if response.status_code == 304:
+            # Otherwise the proxy would answer the 304 with the whole file
+            response.headers.pop('X-Accel-Redirect', None)
+            response.headers.pop('X-Sendfile', None)
+
+    # Uploads are only visible to logged-in users, so keep them out of shared caches
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.cache_control.max_age = max_age
+    response.cache_control.immutable = True
+    return response
+
+
+def apply_refcounts(connection, deltas):
+    """Add each ``{filename: delta}`` to the reference counts."""
+    rows = [{'filename': f, 'ref_count': n} for f, n in deltas.items() if n]
+    if not rows:
+        return
+
+    table = Upload.__table__
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.filename],
+            set_={'ref_count': table.c.ref_count + stmt.excluded['ref_count']}
+        )
+        connection.execute(stmt, rows)
+        return
+
+    for row in rows:
+        result = connection.execute(
+            table.update().where(table.c.filename == row['filename'])
+            .values(ref_count=table.c.ref_count + row['ref_count'])
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**row))
+
+
+def _previous_image(complaint):
+    history = inspect(complaint).attrs.image_file.history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return complaint.image_file
+
+
+def collect_refcounts(session):
+    """Reference count deltas implied by the pending changes of ``session``."""
+    deltas = Counter()
+    for obj in session.new:
+        if isinstance(obj, Complaint) and obj.image_file:
+            deltas[obj.image_file] += 1
+    for obj in session.dirty:
+        if isinstance(obj, Complaint):
+            old, new = _previous_image(obj), obj.image_file
+            if old != new:
+                if old:
+                    deltas[old] -= 1
+                if new:
+                    deltas[new] += 1
+    for obj in session.deleted:
+        if isinstance(obj, Complaint):
+            old = _previous_image(obj)
+            if old:
+                deltas[old] -= 1
+    return deltas
+
+
+@event.listens_for(Session, 'after_flush')
+def _update_refcounts(session, flush_context):
+    deltas = collect_refcounts(session)
+    if deltas:
+        apply_refcounts(session.connection(), deltas)
+
+
+def _load_old_value(target, value, oldvalue, initiator):
+    return value
+
+
+# Load the committed filename before it is replaced, as app.stats does
+event.listen(Complaint.image_file, 'set', _load_old_value, retval=True, active_history=True)
+
+
+def recount():
+    """Recompute every reference count from the complaint table."""
+    rows = db.session.execute(
+        select(Complaint.image_file, func.count(Complaint.id))
+        .where(Complaint.image_file.isnot(None)).group_by(Complaint.image_file)
+    ).all()
+    db.session.execute(Upload.__table__.delete())
+    if rows:
+        db.session.execute(Upload.__table__.insert(),
+                           [{'filename': f, 'ref_count': n} for f, n in rows])
+    db.session.commit()
+    return len(rows)
+
+
+@dataclass
+class CollectionReport:
+    dry_run: bool
+    files: int = 0
+    bytes: int = 0
+
+
+def _original_of(filename, variants):
+    """The upload a resized variant belongs to (as a stem), else ``None``."""
+    for variant in variants:
+        suffix = f'.{variant}.jpg'
+        if filename.endswith(suffix):
+            return filename[:-len(suffix)]
+    return None
+
+
+def collect_garbage(grace=None, dry_run=False, now=None):
+    """Delete unreferenced uploads older than ``grace`` seconds, with their variants."""
+    folder = current_app.config['UPLOAD_FOLDER']
+    grace = current_app.config.get('UPLOAD_GC_GRACE', 3600) if grace is None else grace
+    cutoff = (now or time.time()) - grace
+    variants = current_app.config.get('IMAGE_VARIANTS', images.DEFAULT_VARIANTS)
+    report = CollectionReport(dry_run=dry_run)
+    if not os.path.isdir(folder):
+        return report
+
+    referenced = set(db.session.execute(select(Upload.filename).where(Upload.ref_count > 0)).scalars())
+    referenced_stems = {os.path.splitext(f)[0] for f in referenced}
+
+    for entry in os.scandir(folder):
+        if not entry.is_file():
+            continue
+        stat = entry.stat()
+        if stat.st_mtime > cutoff:
+            continue
+        stem = _original_of(entry.name, variants)
+        if stem is not None:
+            keep = stem in referenced_stems
+        else:
+            keep = entry.name in referenced and not entry.name.startswith(_TEMP_PREFIX)
+        if keep:
+            continue
+        if not dry_run:
+            os.unlink(entry.path)
+        report.files += 1
+        report.bytes += stat.st_size
+
+    if not dry_run:
+        db.session.execute(Upload.__table__.delete().where(Upload.ref_count <= 0))
+        db.session.commit()
+    return report
+
+
+uploads_cli = AppGroup('uploads', help='Maintain the uploaded image store.')
+
+
+@uploads_cli.command('gc')
+@click.option('--dry-run', is_flag=True, help='Only report what would be removed.')
+@click.option('--grace', type=int, default=None, help='Keep files younger than this many seconds.')
+def gc_command(dry_run, grace):
+    """Remove uploads no complaint references any more."""
+    report = collect_garbage(grace=grace, dry_run=dry_run)
+    verb = 'Would remove' if dry_run else 'Removed'
+    click.echo(f'{verb} {report.files} files, reclaiming {report.bytes / (1024 * 1024):.1f} MB '
+               f'({report.bytes} bytes).')
+
+
+@uploads_cli.command('recount')
+def recount_command():
+    """Recompute upload reference counts from the complaints."""
+    rows = recount()
+    click.echo(f'Recounted references to {rows} uploads.')
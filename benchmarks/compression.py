@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Response compression benchmark for CampusSync.
+
+Renders each dashboard repeatedly with no compression, gzip and brotli and
+reports the bytes sent and the CPU time per request, plus the bytes of a
+revalidation that ends in ``304 Not Modified``.
+
+    python benchmarks/compression.py --complaints 500 --repeat 50
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db, compression  # noqa: E402
+from app.models import User, Complaint  # noqa: E402
+from config import Config  # noqa: E402
+
+CATEGORIES = ['Electricity', 'Water Supply', 'Infrastructure', 'Sanitation', 'Internet', 'Other']
+STATUSES = ['Pending', 'In Progress', 'Resolved']
+
+
+def build_app(db_path):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+        WTF_CSRF_ENABLED = False
+        SCHEDULER_ENABLED = False
+
+    return create_app(BenchConfig)
+
+
+def seed(app, complaints, staff_count):
+    rng = random.Random(42)
+    with app.app_context():
+        db.create_all()
+        admin = User(username='admin', email='admin@asmedu.org', password='x', role='admin')
+        student = User(username='student', email='student@asmedu.org', password='x', role='student')
+        staff = [User(username=f'staff{i}', email=f'staff{i}@asmedu.org', password='x', role='staff')
+                 for i in range(staff_count)]
+        db.session.add_all([admin, student] + staff)
+        db.session.commit()
+        for i in range(complaints):
+            status = rng.choice(STATUSES)
+            db.session.add(Complaint(
+                title=f'Complaint {i}', category=rng.choice(CATEGORIES), priority=rng.choice(['High', 'Medium', 'Low']),
+                description='Broken fixture reported near the main block. ' * 4, location=f'Block {i % 12}',
+                status=status, user_id=student.id,
+                assigned_to=staff[0].id if status != 'Pending' else None,
+            ))
+        db.session.commit()
+        return {'admin': admin.id, 'staff': staff[0].id, 'student': student.id}
+
+
+def measure(app, user_id, path, encoding, repeat):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+    headers = {'Accept-Encoding': encoding} if encoding else {}
+    client.get(path, headers=headers)  # warm up
+
+    started = time.process_time()
+    for _ in range(repeat):
+        response = client.get(path, headers=headers)
+    cpu = (time.process_time() - started) / repeat
+    revalidated = client.get(path, headers=dict(headers, **{'If-None-Match': response.headers.get('ETag', '')}))
+    return len(response.data), cpu, revalidated.status_code, len(revalidated.data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--complaints', type=int, default=500, help='complaints to seed')
+    parser.add_argument('--staff', type=int, default=25, help='staff accounts (rows in each assign <select>)')
+    parser.add_argument('--repeat', type=int, default=50, help='requests per measurement')
+    args = parser.parse_args()
+
+    encodings = [('identity', None), ('gzip', 'gzip')]
+    if compression.brotli is not None:
+        encodings.append(('br', 'br'))
+    pages = [('admin', '/admin/dashboard'), ('staff', '/staff/dashboard'), ('student', '/dashboard')]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = build_app(os.path.join(tmp, 'bench.db'))
+        users = seed(app, args.complaints, args.staff)
+        print(f'{args.complaints} complaints, {args.staff} staff, {args.repeat} requests per row')
+        print(f"{'page':<18} | {'encoding':<8} | {'bytes':>8} | {'ratio':>5} | {'CPU/request':>11} | {'304 bytes':>9}")
+        for role, path in pages:
+            baseline = None
+            for label, encoding in encodings:
+                size, cpu, status, revalidated = measure(app, users[role], path, encoding, args.repeat)
+                baseline = baseline or size
+                print(f'{path:<18} | {label:<8} | {size:>8} | {size / baseline:>5.2f} | '
+                      f'{cpu * 1000:>8.2f} ms | {revalidated if status == 304 else "-":>9}')
+        with app.app_context():
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Login storm benchmark for CampusSync.
+
+Keeps a number of threads logging in back to back while other threads
+request the student dashboard, and reports dashboard requests/sec for each
+bcrypt pool size. A pool as large as the number of login threads behaves
+like hashing inline on every request thread.
+
+    python benchmarks/login_storm.py --logins 8 --readers 4 --pools 8,2,1
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db, bcrypt  # noqa: E402
+from app.models import User, Complaint  # noqa: E402
+from config import Config  # noqa: E402
+
+
+def build_app(db_path, rounds, pool_size):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+        WTF_CSRF_ENABLED = False
+        BCRYPT_LOG_ROUNDS = rounds
+        BCRYPT_MAX_CONCURRENCY = pool_size
+        BCRYPT_QUEUE_TIMEOUT = 60
+
+    return create_app(BenchConfig)
+
+
+def seed(app, rounds, logins):
+    with app.app_context():
+        db.create_all()
+        pw_hash = bcrypt.generate_password_hash('Password123', rounds).decode('utf-8')
+        users = [User(username=f'user{i}', email=f'user{i}@asmedu.org', password=pw_hash, role='student')
+                 for i in range(logins + 1)]
+        db.session.add_all(users)
+        db.session.commit()
+        for i in range(20):
+            db.session.add(Complaint(title=f'Complaint {i}', category='Other', description='Broken',
+                                     location='Campus', user_id=users[0].id))
+        db.session.commit()
+        return users[0].id
+
+
+def run(app, reader_id, logins, readers, duration):
+    stop = threading.Event()
+    dashboard_latencies = []
+    login_latencies = []
+    lock = threading.Lock()
+
+    def login_loop(i):
+        client = app.test_client()
+        while not stop.is_set():
+            started = time.perf_counter()
+            client.post('/auth/login', data={'email': f'user{i + 1}@asmedu.org', 'password': 'Password123'})
+            client.get('/auth/logout')
+            with lock:
+                login_latencies.append(time.perf_counter() - started)
+
+    def reader_loop():
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(reader_id)
+        while not stop.is_set():
+            started = time.perf_counter()
+            client.get('/dashboard')
+            with lock:
+                dashboard_latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=login_loop, args=(i,)) for i in range(logins)]
+    threads += [threading.Thread(target=reader_loop) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return dashboard_latencies, login_latencies
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=8, help='threads logging in continuously')
+    parser.add_argument('--readers', type=int, default=4, help='threads loading the dashboard')
+    parser.add_argument('--pools', default='8,2,1', help='comma-separated bcrypt pool sizes to compare')
+    parser.add_argument('--rounds', type=int, default=12, help='bcrypt cost')
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds per run')
+    args = parser.parse_args()
+
+    print(f'{args.logins} login threads, {args.readers} dashboard threads, bcrypt cost {args.rounds}, '
+          f'{args.duration:.0f}s per run')
+    print(f"{'pool':>5} | {'dashboard req/s':>15} | {'dashboard p99':>13} | {'logins/s':>8} | {'login p50':>9}")
+    for pool_size in [int(p) for p in args.pools.split(',')]:
+        with tempfile.TemporaryDirectory() as tmp:
+            app = build_app(os.path.join(tmp, 'bench.db'), args.rounds, pool_size)
+            reader_id = seed(app, args.rounds, args.logins)
+            dashboards, logins = run(app, reader_id, args.logins, args.readers, args.duration)
+            with app.app_context():
+                db.engine.dispose()
+        print(f'{pool_size:>5} | {len(dashboards) / args.duration:>15.1f} | '
+              f'{percentile(dashboards, 99) * 1000:>10.1f} ms | {len(logins) / args.duration:>8.1f} | '
+              f'{statistics.median(logins) * 1000 if logins else 0:>6.0f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Route-level benchmark for CampusSync at several data scales.
+
+For each scale it seeds a database with ``flask seed synthetic`` data and
+drives the main routes through the Flask test client: the admin dashboard
+with each filter, search and a deep page, the student and staff
+dashboards, staff assignment, filing a complaint and logging in. For every
+route it records latency percentiles, SQL statements per request and the
+peak Python memory allocated while serving one request.
+
+Results can be written as JSON and compared with an earlier run; the
+script exits with status 1 when a route got slower, ran more statements
+or used more memory than the baseline allows.
+
+    python benchmarks/routes.py --scales 1k,100k --output results.json
+    python benchmarks/routes.py --scales 1k,100k --baseline results.json --threshold 0.25
+
+Seeding a million complaints takes about a minute. Pass ``--db-dir`` to
+keep the seeded databases and reuse them on later runs; each run works on
+a copy, so the writes of one run do not leak into the next.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import select  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app import seed as synthetic  # noqa: E402
+from app.models import Complaint, User  # noqa: E402
+from app.query_counter import QueryCounter  # noqa: E402
+from config import Config  # noqa: E402
+
+# Fixed so that databases seeded on different days are identical
+ANCHOR = datetime(2026, 1, 1)
+SUFFIXES = {'k': 1000, 'm': 1000000}
+
+
+def parse_scale(text):
+    text = text.strip().lower()
+    if text[-1:] in SUFFIXES:
+        return int(float(text[:-1]) * SUFFIXES[text[-1]])
+    return int(text)
+
+
+def scale_label(complaints):
+    for suffix, size in sorted(SUFFIXES.items(), key=lambda item: -item[1]):
+        if complaints >= size and complaints % size == 0:
+            return f'{complaints // size}{suffix.upper() if suffix == "m" else suffix}'
+    return str(complaints)
+
+
+def build_app(db_path, rounds):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+        WTF_CSRF_ENABLED = False
+        SCHEDULER_ENABLED = False
+        IMAGE_WORKERS = 0
+        BCRYPT_LOG_ROUNDS = rounds
+        BCRYPT_QUEUE_TIMEOUT = 60
+
+    return create_app(BenchConfig)
+
+
+def seeded_database(db_dir, complaints, args):
+    """Path of a database seeded for ``complaints``, built only if missing."""
+    path = os.path.join(db_dir, f'routes-{complaints}-seed{args.seed}-r{args.rounds}.db')
+    if os.path.exists(path):
+        return path
+    started = time.perf_counter()
+    building = path + '.building'
+    if os.path.exists(building):
+        os.remove(building)
+    app = build_app(building, args.rounds)
+    with app.app_context():
+        db.create_all()
+        synthetic.seed_synthetic(users=max(100, complaints // 200), staff=args.staff, complaints=complaints,
+                                 seed=args.seed, anchor=ANCHOR)
+        db.session.remove()
+        db.engine.dispose()
+    os.replace(building, path)
+    print(f'  seeded {scale_label(complaints)} complaints in {time.perf_counter() - started:.1f}s', file=sys.stderr)
+    return path
+
+
+class Scenario:
+    """One route to measure: who requests it and how."""
+
+    def __init__(self, name, role, path, method='GET', data=None, anonymous=False):
+        self.name = name
+        self.role = role
+        self.path = path
+        self.method = method
+        self.data = data
+        self.anonymous = anonymous
+
+    def request(self, client, i):
+        path = self.path(i) if callable(self.path) else self.path
+        data = self.data(i) if callable(self.data) else self.data
+        return client.open(path, method=self.method, data=data)
+
+
+def scenarios(live_ids, staff_ids):
+    def assign_path(i):
+        return f'/admin/assign/{live_ids[i % len(live_ids)]}'
+
+    def assign_data(i):
+        return {'staff_id': staff_ids[i % len(staff_ids)]}
+
+    def complaint_data(i):
+        return {'title': f'Benchmark complaint {i}', 'category': 'Electricity', 'priority': 'Medium',
+                'location': 'Block A', 'description': 'Lights in the corridor keep flickering.'}
+
+    return [
+        Scenario('admin.dashboard', 'admin', '/admin/dashboard'),
+        Scenario('admin.dashboard?status', 'admin', '/admin/dashboard?status=Pending'),
+        Scenario('admin.dashboard?category', 'admin', '/admin/dashboard?category=Water+Supply'),
+        Scenario('admin.dashboard?status&category', 'admin',
+                 '/admin/dashboard?status=In+Progress&category=Electricity'),
+        Scenario('admin.dashboard?search', 'admin', '/admin/dashboard?search=leaking+tap'),
+        Scenario('admin.dashboard?page', 'admin', '/admin/dashboard?page=50'),
+        Scenario('student.dashboard', 'student', '/dashboard'),
+        Scenario('staff.dashboard', 'staff', '/staff/dashboard'),
+        Scenario('admin.assign_staff', 'admin', assign_path, method='POST', data=assign_data),
+        Scenario('student.new_complaint', 'student', '/complaint/new', method='POST', data=complaint_data),
+        Scenario('auth.login', 'student', '/auth/login', method='POST', anonymous=True,
+                 data={'email': 'student1@asmedu.org', 'password': synthetic.DEMO_PASSWORDS['student']}),
+    ]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def measure(app, engine, scenario, user_id, repeat):
+    client = app.test_client()
+
+    def fresh_client():
+        if scenario.anonymous:
+            return app.test_client()
+        return client
+
+    if not scenario.anonymous:
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+    scenario.request(fresh_client(), 0)  # warm up
+
+    latencies, queries, statuses = [], [], {}
+    for i in range(1, repeat + 1):
+        target = fresh_client()
+        with QueryCounter(engine) as counter:
+            started = time.perf_counter()
+            response = scenario.request(target, i)
+            latencies.append(time.perf_counter() - started)
+        queries.append(counter.count)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    # tracemalloc slows everything down, so memory gets a request of its own
+    target = fresh_client()
+    tracemalloc.start()
+    scenario.request(target, repeat + 1)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'requests': repeat,
+        'status': {str(code): count for code, count in sorted(statuses.items())},
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'max_ms': round(max(latencies) * 1000, 3),
+        'queries_mean': round(sum(queries) / len(queries), 2),
+        'queries_max': max(queries),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def run_scale(complaints, args, db_dir, work_dir):
+    source = seeded_database(db_dir, complaints, args)
+    db_path = os.path.join(work_dir, 'routes.db')
+    shutil.copyfile(source, db_path)
+    app = build_app(db_path, args.rounds)
+    rng = random.Random(args.seed)
+    results = {}
+    with app.app_context():
+        engine = db.engine
+        staff_ids = db.session.execute(select(User.id).where(User.role == 'staff').order_by(User.id)).scalars().all()
+        candidates = rng.sample(range(1, complaints + 1), min(complaints, args.repeat * 2))
+        live_ids = db.session.execute(
+            select(Complaint.id).where(Complaint.id.in_(candidates), Complaint.is_deleted == False)
+        ).scalars().all()
+    users = {'admin': 1, 'staff': staff_ids[0], 'student': args.staff + 2}
+
+    # Requests run outside any app context: one left pushed here would be
+    # shared by every request, along with the logged-in user cached on g
+    for scenario in scenarios(live_ids, staff_ids):
+        if args.routes and not any(scenario.name.startswith(prefix) for prefix in args.routes):
+            continue
+        results[scenario.name] = row = measure(app, engine, scenario, users[scenario.role], args.repeat)
+        print(f'{scale_label(complaints):>5} | {scenario.name:<34} | {row["p50_ms"]:>8.2f} | '
+              f'{row["p95_ms"]:>8.2f} | {row["p99_ms"]:>8.2f} | {row["queries_max"]:>7} | '
+              f'{row["peak_kib"]:>9.0f} | {",".join(row["status"])}')
+    engine.dispose()
+    os.remove(db_path)
+    return results
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """Describe every measurement that regressed against ``baseline``."""
+    regressions = []
+    for scale, routes in results.items():
+        for name, row in routes.items():
+            before = baseline.get(scale, {}).get(name)
+            if before is None:
+                continue
+            for key in ('p50_ms', 'p95_ms'):
+                if row[key] > before[key] * (1 + threshold) and row[key] - before[key] > min_delta_ms:
+                    regressions.append(f'{scale} {name}: {key} {before[key]:.2f} -> {row[key]:.2f}')
+            if row['queries_max'] > before['queries_max']:
+                regressions.append(f'{scale} {name}: queries {before["queries_max"]} -> {row["queries_max"]}')
+            if row['peak_kib'] > before['peak_kib'] * (1 + threshold):
+                regressions.append(f'{scale} {name}: peak memory {before["peak_kib"]:.0f} KiB -> '
+                                   f'{row["peak_kib"]:.0f} KiB')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', default='1k,100k,1M', help='comma-separated complaint counts (1k, 100k, 1M)')
+    parser.add_argument('--repeat', type=int, default=30, help='timed requests per route')
+    parser.add_argument('--staff', type=int, default=25, help='staff accounts')
+    parser.add_argument('--seed', type=int, default=42, help='seed for the synthetic data')
+    parser.add_argument('--rounds', type=int, default=Config.BCRYPT_LOG_ROUNDS, help='bcrypt work factor')
+    parser.add_argument('--routes', default='', help='comma-separated route name prefixes to run (default: all)')
+    parser.add_argument('--db-dir', help='keep seeded databases here and reuse them')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed relative growth in latency and memory before it counts as a regression')
+    parser.add_argument('--min-delta-ms', type=float, default=2.0,
+                        help='latency changes smaller than this never count as a regression')
+    args = parser.parse_args()
+    args.routes = [prefix for prefix in args.routes.split(',') if prefix]
+    scales = [parse_scale(scale) for scale in args.scales.split(',')]
+
+    report = {
+        'meta': {'created': datetime.utcnow().isoformat(timespec='seconds'), 'python': platform.python_version(),
+                 'sqlite': sqlite3.sqlite_version, 'machine': platform.machine(), 'repeat': args.repeat,
+                 'seed': args.seed, 'rounds': args.rounds},
+        'results': {},
+    }
+    print(f"{'scale':>5} | {'route':<34} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | {'queries':>7} | "
+          f"{'peak KiB':>9} | status")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_dir = args.db_dir or tmp
+        os.makedirs(db_dir, exist_ok=True)
+        for complaints in scales:
+            report['results'][scale_label(complaints)] = run_scale(complaints, args, db_dir, tmp)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+            output.write('\n')
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        for key in ('seed', 'rounds'):
+            if baseline['meta'].get(key) != report['meta'][key]:
+                print(f"Note: the baseline ran with {key}={baseline['meta'].get(key)}, this run with "
+                      f"{key}={report['meta'][key]}.")
+        regressions = compare(report['results'], baseline['results'], args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f'\n{len(regressions)} regressions against {args.baseline}:')
+            for regression in regressions:
+                print(f'  {regression}')
+            sys.exit(1)
+        print(f'\nNo regressions against {args.baseline}.')
+
+
+if __name__ == '__main__':
+    main()
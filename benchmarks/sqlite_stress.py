@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Concurrent read/write stress test for the SQLite profile.
+
+Starts several worker processes, like gunicorn workers, against one
+database file. Each runs dashboard-style reads mixed with complaint inserts
+and status updates. For the old default setup and for the tuned profile in
+``config.py`` it reports throughput, "database is locked" errors and
+latency percentiles.
+
+    python benchmarks/sqlite_stress.py --workers 4 --write-ratio 0.2 --duration 10
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import select  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.models import User, Complaint  # noqa: E402
+from config import Config  # noqa: E402
+
+PROFILES = {
+    # What the app ran with before: pysqlite defaults, rollback journal
+    'default': {'SQLITE_PRAGMAS': {}, 'SQLALCHEMY_ENGINE_OPTIONS': {}},
+    'tuned': {'SQLITE_PRAGMAS': Config.SQLITE_PRAGMAS,
+              'SQLALCHEMY_ENGINE_OPTIONS': Config.SQLALCHEMY_ENGINE_OPTIONS},
+}
+
+
+def build_app(db_path, profile):
+    class StressConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+        SCHEDULER_ENABLED = False
+        SQLITE_PRAGMAS = PROFILES[profile]['SQLITE_PRAGMAS']
+        SQLALCHEMY_ENGINE_OPTIONS = PROFILES[profile]['SQLALCHEMY_ENGINE_OPTIONS']
+
+    return create_app(StressConfig)
+
+
+def seed(db_path, profile, complaints):
+    app = build_app(db_path, profile)
+    with app.app_context():
+        db.create_all()
+        student = User(username='student', email='student@asmedu.org', password='x')
+        db.session.add(student)
+        db.session.commit()
+        db.session.execute(Complaint.__table__.insert(), [
+            {'title': f'Complaint {i}', 'category': 'Other', 'description': 'Broken', 'priority': 'Low',
+             'location': 'Campus', 'status': 'Pending', 'user_id': student.id, 'is_deleted': False}
+            for i in range(complaints)
+        ])
+        db.session.commit()
+        db.engine.dispose()
+        return student.id
+
+
+def worker(db_path, profile, user_id, complaints, write_ratio, duration, seed_value, results):
+    rng = random.Random(seed_value)
+    app = build_app(db_path, profile)
+    reads, writes, errors = [], [], 0
+    with app.app_context():
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            write = rng.random() < write_ratio
+            started = time.perf_counter()
+            try:
+                if write and rng.random() < 0.5:
+                    db.session.add(Complaint(title='Stress', category='Other', description='x', location='y',
+                                             user_id=user_id))
+                elif write:
+                    complaint = db.session.get(Complaint, rng.randint(1, complaints))
+                    complaint.status = rng.choice(['Pending', 'In Progress', 'Resolved'])
+                else:
+                    db.session.execute(
+                        select(Complaint.id, Complaint.title).where(Complaint.is_deleted == False)
+                        .order_by(Complaint.date_posted.desc()).limit(10)
+                    ).all()
+                db.session.commit()
+            except OperationalError as exc:
+                db.session.rollback()
+                if 'locked' not in str(exc):
+                    raise
+                errors += 1
+                continue
+            (writes if write else reads).append(time.perf_counter() - started)
+        db.session.remove()
+        db.engine.dispose()
+    results.put((reads, writes, errors))
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run(profile, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'stress.db')
+        user_id = seed(db_path, profile, args.complaints)
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        processes = [context.Process(target=worker, args=(db_path, profile, user_id, args.complaints,
+                                                          args.write_ratio, args.duration, i, results))
+                     for i in range(args.workers)]
+        for process in processes:
+            process.start()
+        collected = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+    reads = [r for result in collected for r in result[0]]
+    writes = [w for result in collected for w in result[1]]
+    errors = sum(result[2] for result in collected)
+    print(f'{profile:<8} | {(len(reads) + len(writes)) / args.duration:>7.0f} | {errors:>12} | '
+          f'{percentile(reads, 50) * 1000:>8.2f} | {percentile(reads, 99) * 1000:>8.2f} | '
+          f'{percentile(writes, 50) * 1000:>9.2f} | {percentile(writes, 99) * 1000:>9.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4, help='worker processes')
+    parser.add_argument('--write-ratio', type=float, default=0.2, help='share of operations that write')
+    parser.add_argument('--complaints', type=int, default=5000, help='complaints seeded before the run')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per profile')
+    parser.add_argument('--profiles', default='default,tuned', help='comma-separated profiles to run')
+    args = parser.parse_args()
+
+    print(f'{args.workers} workers, {args.write_ratio:.0%} writes, {args.duration:.0f}s per profile')
+    print(f"{'profile':<8} | {'ops/s':>7} | {'lock errors':>12} | {'read p50':>8} | {'read p99':>8} | "
+          f"{'write p50':>9} | {'write p99':>9}   (ms)")
+    for profile in args.profiles.split(','):
+        run(profile, args)
+
+
+if __name__ == '__main__':
+    main()
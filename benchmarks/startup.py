@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for CampusSync under gunicorn.
+
+Measures three things:
+
+* the time to import ``run`` (which builds the app) in a fresh
+  interpreter, and what ``db.create_all()`` used to add to it;
+* the time from launching gunicorn with ``gunicorn.conf.py`` to the first
+  successful response;
+* the memory of each worker after it has served some requests: RSS, PSS
+  (shared pages split between the processes sharing them) and private
+  memory.
+
+Each server mode is run in turn: ``no-preload`` (every worker imports the
+app itself, as before) and ``preload`` (the master imports it once and
+forks). The memory figures come from ``/proc``, so they need Linux.
+
+    python benchmarks/startup.py --workers 4 --requests 200
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+IMPORT_SNIPPET = """
+import time
+started = time.perf_counter()
+import run
+imported = time.perf_counter()
+with run.app.app_context():
+    run.db.create_all()
+print(imported - started, time.perf_counter() - imported)
+"""
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def measure_import(env, runs):
+    imports, schema = [], []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', IMPORT_SNIPPET], cwd=ROOT, env=env, check=True,
+                                capture_output=True, text=True).stdout.split()
+        imports.append(float(output[0]))
+        schema.append(float(output[1]))
+    return min(imports), min(schema)
+
+
+def get(url, timeout=2):
+    request = urllib.request.Request(url, headers={'Connection': 'close'})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        response.read()
+        return response.status
+
+
+def workers_of(master_pid):
+    workers = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as stat:
+                parent = int(stat.read().rsplit(')', 1)[1].split()[1])
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+        if parent == master_pid:
+            workers.append(int(entry))
+    return workers
+
+
+def memory_of(pid):
+    """``(rss, pss, private)`` in KiB, from ``/proc/<pid>/smaps_rollup``."""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as rollup:
+        for line in rollup:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return fields['Rss'], fields['Pss'], fields['Private_Clean'] + fields['Private_Dirty']
+
+
+def run_server(mode, env, args):
+    port = free_port()
+    env = dict(env, GUNICORN_PRELOAD='1' if mode == 'preload' else '0', GUNICORN_WORKERS=str(args.workers),
+               GUNICORN_BIND=f'127.0.0.1:{port}', GUNICORN_ACCESS_LOG='', GUNICORN_MAX_REQUESTS='0')
+    url = f'http://127.0.0.1:{port}/auth/login'
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'run:app'], cwd=ROOT,
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        first_response = None
+        while time.perf_counter() - started < args.boot_timeout:
+            try:
+                if get(url) == 200:
+                    first_response = time.perf_counter() - started
+                    break
+            except (urllib.error.URLError, ConnectionError, socket.timeout):
+                time.sleep(0.01)
+        if first_response is None:
+            raise SystemExit(f'{mode}: no response within {args.boot_timeout}s')
+
+        # Give every worker time to boot, then spread requests over them
+        deadline = time.perf_counter() + args.boot_timeout
+        while len(workers_of(server.pid)) < args.workers and time.perf_counter() < deadline:
+            time.sleep(0.05)
+        for _ in range(args.requests):
+            get(url)
+        memory = [memory_of(pid) for pid in workers_of(server.pid)]
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    return first_response, memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workers')
+    parser.add_argument('--requests', type=int, default=200, help='requests served before measuring memory')
+    parser.add_argument('--import-runs', type=int, default=5, help='fresh interpreters for the import timing')
+    parser.add_argument('--boot-timeout', type=float, default=30.0, help='seconds to wait for the server')
+    parser.add_argument('--modes', default='no-preload,preload', help='comma-separated server modes to run')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL='sqlite:///' + os.path.join(tmp, 'startup.db'), SCHEDULER_ENABLED='0',
+                   METRICS_ENABLED='0', PROFILING_ENABLED='0')
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'run', 'schema', 'create'], cwd=ROOT, env=env,
+                       check=True, capture_output=True)
+
+        imported, schema = measure_import(env, args.import_runs)
+        print(f'import run (builds the app): {imported * 1000:.0f} ms; '
+              f'db.create_all() that run.py used to add: {schema * 1000:.0f} ms')
+        print(f'{args.workers} workers, {args.requests} requests before measuring memory')
+        print(f"{'mode':<11} | {'first response':>14} | {'RSS/worker':>10} | {'PSS/worker':>10} | "
+              f"{'private/worker':>14} | {'PSS total':>9}   (KiB)")
+        for mode in args.modes.split(','):
+            first_response, memory = run_server(mode, env, args)
+            rss, pss, private = (statistics.mean(values) for values in zip(*memory))
+            print(f'{mode:<11} | {first_response * 1000:>11.0f} ms | {rss:>10.0f} | {pss:>10.0f} | '
+                  f'{private:>14.0f} | {sum(m[1] for m in memory):>9.0f}')
+
+
+if __name__ == '__main__':
+    main()
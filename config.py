@@ -6,15 +6,55 @@ class Config:
     # Basic security
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
 
-    # Database: Simple SQLite setup
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(basedir, 'instance', 'campussync.db')
+    # Database: Simple SQLite setup (DATABASE_URL points elsewhere, e.g. a benchmark copy)
+    SQLALCHEMY_DATABASE_URI = (os.environ.get('DATABASE_URL')
+                               or 'sqlite:///' + os.path.join(basedir, 'instance', 'campussync.db'))
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Applied to every new SQLite connection, in order (see app/sqlite_profile.py)
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',      # readers never wait for the writer
+        'busy_timeout': 15000,      # ms a writer waits for the lock before "database is locked"
+        'synchronous': 'NORMAL',    # fsync at checkpoints only; safe with WAL
+        'cache_size': -32000,       # KiB of page cache per connection
+        'mmap_size': 268435456,     # read through a 256 MiB memory map
+        'temp_store': 'MEMORY',
+        'foreign_keys': 'ON',
+    }
+    # One pool per worker process; threads beyond pool_size + max_overflow wait pool_timeout
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': 10,
+        'max_overflow': 10,
+        'pool_timeout': 30,
+        'connect_args': {'timeout': 15},  # seconds; pysqlite's own lock wait
+    }
+
     # File uploads
     UPLOAD_FOLDER = os.path.join(basedir, 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
 
+    # Resized JPEG variants of uploads (name -> width in px), rendered by
+    # IMAGE_WORKERS background processes per worker (0 renders inline)
+    IMAGE_VARIANTS = {'thumb': 320, 'medium': 1024}
+    IMAGE_QUALITY = 80
+    IMAGE_WORKERS = 1
+    UPLOAD_GC_GRACE = 3600  # seconds an unreferenced upload is kept by `flask uploads gc`
+
+    # Serving uploads: 'direct' streams them from the worker; 'x-accel' (nginx)
+    # or 'x-sendfile' (Apache, lighttpd) hands the bytes to the front proxy
+    UPLOAD_SEND_MODE = os.environ.get('UPLOAD_SEND_MODE', 'direct')
+    UPLOAD_ACCEL_PREFIX = '/protected-uploads/'  # internal nginx location for UPLOAD_FOLDER
+    UPLOAD_MAX_AGE = 365 * 24 * 3600  # upload names never change meaning
+
+    # Compression of rendered pages and API responses (brotli if installed, else gzip)
+    COMPRESS_MIN_SIZE = 500  # bytes; smaller bodies are sent as-is
+    COMPRESS_MIMETYPES = {'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+                          'application/javascript', 'application/json', 'application/x-ndjson',
+                          'image/svg+xml'}
+    COMPRESS_GZIP_LEVEL = 6
+    COMPRESS_BR_QUALITY = 4  # 0-11; higher costs much more CPU per request
+
     # CSRF Protection
     WTF_CSRF_ENABLED = True
     WTF_CSRF_TIME_LIMIT = None  # No time limit on CSRF token
@@ -26,6 +66,70 @@ class Config:
     SESSION_COOKIE_SAMESITE = 'Lax'
     PERMANENT_SESSION_LIFETIME = 86400  # 24 hours
 
+    # Password hashing: bcrypt cost, hashes computed at once per worker,
+    # and how long a login waits for a free hashing thread before giving up with a 503
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+    BCRYPT_MAX_CONCURRENCY = int(os.environ.get('BCRYPT_MAX_CONCURRENCY', 2))
+    BCRYPT_QUEUE_TIMEOUT = 5  # seconds
+
+    # Logged-in user identities cached per worker process
+    USER_CACHE_SIZE = 1024
+    USER_CACHE_TTL = 300  # seconds; bounds how stale another worker's copy can be
+
+    # Admin chart data (/admin/api/stats) cached per worker process
+    STATS_CACHE_TTL = 30  # seconds; also the max-age sent to the browser
+    STATS_WINDOW_MAX_DAYS = 365
+
+    # Admin bulk actions: complaints changed by one request at most
+    BULK_MAX_ITEMS = 1000
+
+    # Automatic assignment: category -> usernames of the staff handling it
+    # (staff listed nowhere take the rest), and the load each open complaint adds
+    ASSIGNMENT_SKILLS = {}
+    ASSIGNMENT_PRIORITY_WEIGHTS = {'High': 3, 'Medium': 2, 'Low': 1}
+    AUTO_ASSIGN_ON_CREATE = os.environ.get('AUTO_ASSIGN_ON_CREATE', '0') == '1'
+
+    # Exports are streamed to the client in chunks of about this many bytes
+    EXPORT_CHUNK_SIZE = 64 * 1024
+    # An export's Last-Modified is its start time minus this margin, so the next
+    # incremental pull also covers writes that were stamped before the export
+    # started but committed after it; must exceed the longest write transaction
+    EXPORT_SAFETY_MARGIN = int(os.environ.get('EXPORT_SAFETY_MARGIN', 60))  # seconds
+
+    # Per-request profiling (see app/profiling.py): Server-Timing header,
+    # JSON slow log, and a cProfile dump of one request in PROFILING_SAMPLE_EVERY
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '0') == '1'
+    PROFILING_SERVER_TIMING = True
+    PROFILING_SLOW_REQUEST_MS = int(os.environ.get('PROFILING_SLOW_REQUEST_MS', 500))
+    PROFILING_SLOW_QUERY_MS = int(os.environ.get('PROFILING_SLOW_QUERY_MS', 100))
+    PROFILING_SLOW_LOG = os.environ.get('PROFILING_SLOW_LOG')  # file; the campussync.slow logger either way
+    PROFILING_SAMPLE_EVERY = int(os.environ.get('PROFILING_SAMPLE_EVERY', 0))  # 0: never
+    PROFILING_DIR = os.path.join(basedir, 'instance', 'profiles')
+
+    # Prometheus metrics at /metrics (see app/metrics.py); every worker writes
+    # to its own prometheus_client files in METRICS_DIR, which should be emptied
+    # at server start
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '0') == '1'
+    METRICS_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR') or os.path.join(basedir, 'instance', 'metrics')
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # if set, scrapes must send it as a Bearer token
+    METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+
+    # Staff dashboard: open complaints shown at most, resolved ones per archive page
+    STAFF_QUEUE_LIMIT = 50
+    STAFF_ARCHIVE_PER_PAGE = 10
+
+    # Auto-escalation: days a complaint may stay unresolved, overrides keyed by
+    # (category, priority) with None matching any, e.g. {(None, 'High'): 1}
+    ESCALATION_THRESHOLD_DAYS = 3
+    ESCALATION_THRESHOLDS = {}
+    ESCALATION_BATCH_SIZE = 500  # complaints per transaction
+    ESCALATION_SCHEDULE = '0 2 * * *'  # cron (UTC) or 'every 6h'
+
+    # Background jobs: each worker checks for due jobs every SCHEDULER_TICK
+    # seconds; a database lease makes sure only one of them runs each job
+    SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', '1') == '1'
+    SCHEDULER_TICK = 30
+
     # Email domain restriction for ASM CSIT
     ALLOWED_EMAIL_DOMAIN = 'asmedu.org'
 
@@ -0,0 +1,87 @@
+"""Production gunicorn settings for CampusSync.
+
+gunicorn reads this file by itself when started from the project root:
+
+    flask --app run schema create      # once per deploy, before starting the server
+    gunicorn run:app
+
+The app is imported once in the master (``preload_app``) and the workers
+are forked from it, sharing its memory copy-on-write and skipping the
+import on every boot. Nothing that cannot survive a fork is created at
+import: the scheduler thread and the image and bcrypt pools start lazily
+in each worker, and prometheus_client switches to a worker's own metrics
+files when it sees a new process id. Each worker also disposes the
+SQLAlchemy engines it inherited in ``post_fork``, so it never reuses a
+connection the master opened.
+
+Every setting can be overridden with an environment variable (below) or
+on the command line.
+"""
+import multiprocessing
+import os
+import shutil
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+bind = os.environ.get('GUNICORN_BIND') or f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# gthread: each worker serves GUNICORN_THREADS requests at once, so a slow
+# bcrypt hash or a big export does not hold up the whole process
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+workers = _env_int('GUNICORN_WORKERS', min(multiprocessing.cpu_count() * 2 + 1, 8))
+threads = _env_int('GUNICORN_THREADS', 4)
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+# Recycle workers now and then to cap slow leaks; the jitter keeps them
+# from all restarting at the same moment
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', 100)
+
+timeout = _env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _env_int('GUNICORN_KEEPALIVE', 5)
+
+# Worker heartbeats in RAM instead of on a disk that may stall
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-') or None  # empty: no access log
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def _metrics_dir():
+    if os.environ.get('METRICS_ENABLED', '0') != '1':
+        return None
+    from config import Config
+    return Config.METRICS_DIR
+
+
+def on_starting(server):
+    # Counters left over from a previous server would be added to this one's
+    directory = _metrics_dir()
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+
+
+def post_fork(server, worker):
+    if not preload_app:
+        return
+    from app import db
+    from run import app
+    with app.app_context():
+        for engine in db.engines.values():
+            # close=False: the connections belong to the master; just forget them
+            engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    directory = _metrics_dir()
+    if directory:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid, directory)
@@ -0,0 +1,63 @@
+"""Add FTS5 full-text index over complaints
+
+Revision ID: 2f8a5c3e7b14
+Revises: 9d31c6f0a8e2
+Create Date: 2026-10-17 11:26:08.553071
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2f8a5c3e7b14'
+down_revision = '9d31c6f0a8e2'
+branch_labels = None
+depends_on = None
+
+
+def _fts5_available(bind):
+    if bind.dialect.name != 'sqlite':
+        return False
+    options = [row[0] for row in bind.exec_driver_sql('PRAGMA compile_options')]
+    return 'ENABLE_FTS5' in options
+
+
+def upgrade():
+    # Without FTS5 the application falls back to LIKE search
+    if not _fts5_available(op.get_bind()):
+        return
+
+    op.execute(
+        "CREATE VIRTUAL TABLE complaint_fts USING fts5("
+        "title, description, location, content='complaint', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    op.execute(
+        "CREATE TRIGGER complaint_fts_ai AFTER INSERT ON complaint BEGIN "
+        "INSERT INTO complaint_fts(rowid, title, description, location) "
+        "VALUES (new.id, new.title, new.description, new.location); END"
+    )
+    op.execute(
+        "CREATE TRIGGER complaint_fts_ad AFTER DELETE ON complaint BEGIN "
+        "INSERT INTO complaint_fts(complaint_fts, rowid, title, description, location) "
+        "VALUES ('delete', old.id, old.title, old.description, old.location); END"
+    )
+    op.execute(
+        "CREATE TRIGGER complaint_fts_au AFTER UPDATE OF title, description, location ON complaint BEGIN "
+        "INSERT INTO complaint_fts(complaint_fts, rowid, title, description, location) "
+        "VALUES ('delete', old.id, old.title, old.description, old.location); "
+        "INSERT INTO complaint_fts(rowid, title, description, location) "
+        "VALUES (new.id, new.title, new.description, new.location); END"
+    )
+    # Index the complaints that already exist
+    op.execute("INSERT INTO complaint_fts(complaint_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute('DROP TRIGGER IF EXISTS complaint_fts_au')
+    op.execute('DROP TRIGGER IF EXISTS complaint_fts_ad')
+    op.execute('DROP TRIGGER IF EXISTS complaint_fts_ai')
+    op.execute('DROP TABLE IF EXISTS complaint_fts')
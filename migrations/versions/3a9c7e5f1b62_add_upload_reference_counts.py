@@ -0,0 +1,34 @@
+"""Add upload reference counts
+
+Revision ID: 3a9c7e5f1b62
+Revises: 8e1b3f6d2a49
+Create Date: 2026-10-17 16:20:05.774130
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3a9c7e5f1b62'
+down_revision = '8e1b3f6d2a49'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('upload',
+    sa.Column('filename', sa.String(length=100), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('filename')
+    )
+    # Existing uuid-named uploads keep their names and get counted too
+    op.execute(
+        'INSERT INTO upload (filename, ref_count) '
+        'SELECT image_file, COUNT(*) FROM complaint '
+        'WHERE image_file IS NOT NULL GROUP BY image_file'
+    )
+
+
+def downgrade():
+    op.drop_table('upload')
@@ -0,0 +1,36 @@
+"""Add complaint_stat counters table
+
+Revision ID: 4b7e2d9a1c05
+Revises: cf043a11cb11
+Create Date: 2026-10-17 09:12:31.402118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b7e2d9a1c05'
+down_revision = 'cf043a11cb11'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('complaint_stat',
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('category', sa.String(length=50), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('status', 'category', 'is_deleted')
+    )
+    # Seed the counters from the existing complaints
+    op.execute(
+        'INSERT INTO complaint_stat (status, category, is_deleted, count) '
+        'SELECT status, category, is_deleted, COUNT(*) FROM complaint '
+        'GROUP BY status, category, is_deleted'
+    )
+
+
+def downgrade():
+    op.drop_table('complaint_stat')
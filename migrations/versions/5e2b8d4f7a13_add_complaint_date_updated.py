@@ -0,0 +1,35 @@
+"""Add complaint.date_updated for incremental exports
+
+Revision ID: 5e2b8d4f7a13
+Revises: 3a9c7e5f1b62
+Create Date: 2026-10-17 18:02:41.519308
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2b8d4f7a13'
+down_revision = '3a9c7e5f1b62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # A plain ADD COLUMN: a batch table rebuild would drop the full-text triggers.
+    # SQLite needs a constant default for a NOT NULL column; the backfill replaces it.
+    op.add_column('complaint', sa.Column('date_updated', sa.DateTime(), nullable=False,
+                                         server_default='1970-01-01 00:00:00'))
+    op.execute('UPDATE complaint SET date_updated = date_posted')
+    # The model has no server default, so drop the placeholder where the database
+    # can. SQLite cannot without the rebuild above; there every insert made through
+    # SQLAlchemy sets the column from the model's default, so it goes unused.
+    if op.get_bind().dialect.name != 'sqlite':
+        op.alter_column('complaint', 'date_updated', server_default=None)
+    op.create_index(op.f('ix_complaint_date_updated'), 'complaint', ['date_updated'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_complaint_date_updated'), table_name='complaint')
+    op.drop_column('complaint', 'date_updated')
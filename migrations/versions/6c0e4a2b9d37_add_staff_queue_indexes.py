@@ -0,0 +1,34 @@
+"""Add indexes for the staff task queue and archive
+
+Revision ID: 6c0e4a2b9d37
+Revises: 2f8a5c3e7b14
+Create Date: 2026-10-17 13:41:17.206554
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6c0e4a2b9d37'
+down_revision = '2f8a5c3e7b14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('complaint', schema=None) as batch_op:
+        batch_op.create_index('ix_complaint_live_assignee_status_date', ['assigned_to', 'status', 'date_posted'],
+                              unique=False,
+                              sqlite_where=sa.text('is_deleted = 0'),
+                              postgresql_where=sa.text('NOT is_deleted'))
+        batch_op.create_index('ix_complaint_open_assignee_priority', ['assigned_to', 'priority', 'date_posted'],
+                              unique=False,
+                              sqlite_where=sa.text("is_deleted = 0 AND status != 'Resolved'"),
+                              postgresql_where=sa.text("NOT is_deleted AND status != 'Resolved'"))
+
+
+def downgrade():
+    with op.batch_alter_table('complaint', schema=None) as batch_op:
+        batch_op.drop_index('ix_complaint_open_assignee_priority')
+        batch_op.drop_index('ix_complaint_live_assignee_status_date')
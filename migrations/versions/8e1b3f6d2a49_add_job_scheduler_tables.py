@@ -0,0 +1,47 @@
+"""Add job scheduler lease and run history tables
+
+Revision ID: 8e1b3f6d2a49
+Revises: 6c0e4a2b9d37
+Create Date: 2026-10-17 15:02:44.318209
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e1b3f6d2a49'
+down_revision = '6c0e4a2b9d37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('job_lease',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('owner', sa.String(length=100), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('job_run',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job', sa.String(length=50), nullable=False),
+    sa.Column('trigger', sa.String(length=20), nullable=False),
+    sa.Column('owner', sa.String(length=100), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('duration', sa.Float(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('summary', sa.String(length=200), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('job_run', schema=None) as batch_op:
+        batch_op.create_index('ix_job_run_job_started', ['job', 'started_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('job_run', schema=None) as batch_op:
+        batch_op.drop_index('ix_job_run_job_started')
+    op.drop_table('job_run')
+    op.drop_table('job_lease')
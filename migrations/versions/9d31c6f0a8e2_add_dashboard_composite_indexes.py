@@ -0,0 +1,39 @@
+"""Add partial composite indexes for the dashboard listings
+
+Revision ID: 9d31c6f0a8e2
+Revises: 4b7e2d9a1c05
+Create Date: 2026-10-17 10:04:55.918340
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d31c6f0a8e2'
+down_revision = '4b7e2d9a1c05'
+branch_labels = None
+depends_on = None
+
+# Only live (not soft-deleted) complaints are ever listed
+LIVE_COMPLAINTS = {'sqlite_where': sa.text('is_deleted = 0'), 'postgresql_where': sa.text('NOT is_deleted')}
+
+INDEXES = [
+    ('ix_complaint_live_date_posted', ['date_posted']),
+    ('ix_complaint_live_status_date', ['status', 'date_posted']),
+    ('ix_complaint_live_category_date', ['category', 'date_posted']),
+    ('ix_complaint_live_user_date', ['user_id', 'date_posted']),
+    ('ix_complaint_live_assignee_date', ['assigned_to', 'date_posted']),
+]
+
+
+def upgrade():
+    with op.batch_alter_table('complaint', schema=None) as batch_op:
+        for name, columns in INDEXES:
+            batch_op.create_index(name, columns, unique=False, **LIVE_COMPLAINTS)
+
+
+def downgrade():
+    with op.batch_alter_table('complaint', schema=None) as batch_op:
+        for name, _ in reversed(INDEXES):
+            batch_op.drop_index(name)
@@ -1,12 +1,12 @@
 from app import create_app, db
 
+# Imported once by the gunicorn master before it forks the workers
+# (preload_app), so importing must not touch the database. Create or
+# update the tables with `flask --app run schema create`.
 app = create_app()
 
-# Create database tables on startup
-with app.app_context():
-    db.create_all()
-    print('Database tables created.')
-
 if __name__ == '__main__':
-    # Development server
+    # Development server; creates any missing tables for convenience
+    with app.app_context():
+        db.create_all()
     app.run(debug=True, port=8000)
@@ -0,0 +1,49 @@
+import pytest
+from app import create_app, db
+from app.models import User
+from config import Config
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}  # in-memory databases use a single static connection
+    WTF_CSRF_ENABLED = False  # Disable CSRF for testing
+    BCRYPT_LOG_ROUNDS = 4  # Cheapest cost bcrypt allows
+    SCHEDULER_ENABLED = False  # Tests run jobs explicitly
+    IMAGE_WORKERS = 0  # Render image variants inline
+
+
+@pytest.fixture
+def app():
+    # The database URI must be set before create_app() binds the engine,
+    # otherwise the tests would run against instance/campussync.db
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()  # Use create_all for in-memory testing
+        yield app
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user():
+    """Factory: ``make_user('bob', role='staff')`` adds and commits a user in the current app."""
+    def make(username, role='student', password='hashed'):
+        user = User(username=username, email=f'{username}@asmedu.org', password=password, role=role)
+        db.session.add(user)
+        db.session.commit()
+        return user
+    return make
+
+
+@pytest.fixture
+def login():
+    """``login(client, user)`` signs ``client`` in as ``user`` (a ``User`` or an id)."""
+    def log_in(client, user):
+        with client.session_transaction() as session:
+            session['_user_id'] = str(getattr(user, 'id', user))
+    return log_in
@@ -0,0 +1,105 @@
+import gzip
+import io
+import os
+import shutil
+
+import pytest
+
+from app import assets
+
+BOOTSTRAP_CDN = assets.VENDORED['vendor/bootstrap/bootstrap.min.css']
+CHART_JS = 'vendor/chart.js/chart.umd.js'
+
+
+@pytest.fixture
+def static(app, tmp_path):
+    """A copy of the static folder with stand-ins for the vendored libraries."""
+    folder = tmp_path / 'static'
+    shutil.copytree(app.static_folder, folder, ignore=shutil.ignore_patterns('dist', 'vendor'))
+    for name in assets.VENDORED:
+        os.makedirs(os.path.dirname(folder / name), exist_ok=True)
+        (folder / name).write_text(f'/* {name} */ ' + 'x' * 2000)
+    app.static_folder = str(folder)
+    return folder
+
+
+def test_unbuilt_assets_fall_back_to_static_and_cdn(client):
+    html = client.get('/auth/login').get_data(as_text=True)
+    assert html.count(BOOTSTRAP_CDN) == 1
+    assert '/static/css/style.css' in html
+    assert 'chart' not in html.lower()
+
+
+def test_chart_js_loads_once_and_only_on_the_admin_dashboard(client, make_user, login):
+    login(client, make_user('admin', role='admin'))
+    html = client.get('/admin/dashboard').get_data(as_text=True)
+    assert html.count('chart.umd.js') == 1
+    assert 'cdn.jsdelivr.net/npm/chart.js"' not in html
+
+
+def test_build_fingerprints_and_compresses(static):
+    manifest = assets.build(str(static))
+
+    built = manifest['css/style.css']
+    assert built.startswith('css/style.') and built.endswith('.css') and len(built) == len('css/style..css') + 12
+    assert set(manifest) >= {'js/main.js', CHART_JS}
+    dist = static / 'dist'
+    assert gzip.decompress((dist / (built + '.gz')).read_bytes()) == (static / 'css/style.css').read_bytes()
+    if assets.brotli is not None:
+        assert (dist / (built + '.br')).exists()
+
+    # A change gets a new name; the old build stays until pruned
+    (static / 'css/style.css').write_text('body { color: red; }')
+    rebuilt = assets.build(str(static))
+    assert rebuilt['css/style.css'] != built
+    assert (dist / built).exists()
+    assert assets.prune(str(static), rebuilt) >= 2
+    assert not (dist / built).exists()
+
+
+def test_built_assets_are_precompressed_and_immutable(app, client, static):
+    app.extensions['assets'] = assets.build(str(static))
+    with app.test_request_context():
+        url = assets.asset_url('css/style.css')
+    assert url.startswith('/static/dist/css/style.')
+
+    original = (static / 'css/style.css').read_bytes()
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Content-Type'] == 'text/css; charset=utf-8'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert 'immutable' in response.headers['Cache-Control']
+    assert 'max-age=31536000' in response.headers['Cache-Control']
+    assert gzip.decompress(response.data) == original
+
+    response = client.get(url, headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.data == original
+
+    if assets.brotli is not None:
+        response = client.get(url, headers={'Accept-Encoding': 'gzip, br'})
+        assert response.headers['Content-Encoding'] == 'br'
+        assert assets.brotli.decompress(response.data) == original
+
+    assert client.get('/static/dist/manifest.json').status_code == 404
+
+
+def test_vendor_downloads_only_missing_libraries(static):
+    os.remove(static / CHART_JS)
+    requested = []
+
+    def fetch(url, timeout):
+        requested.append(url)
+        return io.BytesIO(b'/* chart */')
+
+    fetched, failed = assets.vendor(str(static), fetch=fetch)
+    assert fetched == [CHART_JS] and failed == {}
+    assert requested == [assets.VENDORED[CHART_JS]]
+    assert (static / CHART_JS).read_bytes() == b'/* chart */'
+
+    def offline(url, timeout):
+        raise OSError('no network')
+
+    os.remove(static / CHART_JS)
+    fetched, failed = assets.vendor(str(static), fetch=offline)
+    assert fetched == [] and list(failed) == [CHART_JS]
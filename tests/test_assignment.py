@@ -0,0 +1,145 @@
+from datetime import datetime, timedelta
+
+from app import db
+from app import assignment
+from app import stats
+from app.models import Complaint, ComplaintHistory
+from app.query_counter import QueryCounter
+
+
+def _complaint(author, category='Electricity', priority='Low', **kwargs):
+    complaint = Complaint(title='Broken', category=category, priority=priority, description='x',
+                          location='Block A', author=author, **kwargs)
+    db.session.add(complaint)
+    return complaint
+
+
+def test_balancer_prefers_skills_then_lightest_weighted_load():
+    balancer = assignment.Balancer({1: 'ann', 2: 'ben', 3: 'cal'}, skills={'Water Supply': ['ben', 'cal', 'gone']},
+                                   loads={2: 3, 3: 2})
+    # ann is the only generalist; ben and cal share water
+    assert balancer.pick('Electricity') == 1
+    assert balancer.pick('Water Supply') == 3
+    balancer.add(3, 'Medium')
+    assert balancer.pick('Water Supply') == 2
+    assert balancer.pick('Water Supply', exclude=2) == 3
+    assert assignment.Balancer({}).pick('Other') is None
+
+
+def test_workloads_come_from_one_query(app, make_user):
+    student = make_user('alice')
+    staff = [make_user(f'staff{i}', role='staff') for i in range(5)]
+    for i, member in enumerate(staff):
+        for _ in range(i):
+            _complaint(student, priority='High', assignee=member)
+    _complaint(student, assignee=staff[0], status='Resolved')
+    db.session.commit()
+
+    with QueryCounter() as counter:
+        balancer = assignment.build_balancer()
+    assert counter.count == 2  # staff list, grouped workloads
+    assert balancer.counts[staff[4].id] == 4
+    assert balancer.loads[staff[4].id] == 12
+    assert balancer.pick('Other') == staff[0].id
+
+
+def test_new_complaint_is_auto_assigned_when_enabled(app, client, make_user, login):
+    student = make_user('alice')
+    busy = make_user('busy', role='staff')
+    idle = make_user('idle', role='staff')
+    _complaint(student, assignee=busy)
+    db.session.commit()
+    app.config['AUTO_ASSIGN_ON_CREATE'] = True
+
+    login(client, student)
+    response = client.post('/complaint/new', data={'title': 'Dark corridor', 'category': 'Electricity',
+                                                   'priority': 'High', 'location': 'Block B',
+                                                   'description': 'No lights'})
+    assert response.status_code == 302
+    complaint = Complaint.query.filter_by(title='Dark corridor').one()
+    assert complaint.assigned_to == idle.id
+    # Same outcome as the admin's assign button, plus a note saying who picked
+    assert complaint.status == 'In Progress'
+    [entry] = complaint.history
+    assert (entry.old_status, entry.new_status) == ('Pending', 'In Progress')
+    assert entry.notes == 'Auto-assigned to idle by workload.'
+
+
+def test_rebalance_assigns_unassigned_and_moves_escalated(app, make_user):
+    student = make_user('alice')
+    ann = make_user('ann', role='staff')
+    ben = make_user('ben', role='staff')
+    escalated = _complaint(student, assignee=ann, status='Escalated')
+    _complaint(student, priority='High')
+    _complaint(student, priority='Low')
+    _complaint(student, priority='Medium', status='Resolved')
+    db.session.commit()
+
+    dry = assignment.rebalance(dry_run=True)
+    assert dry.total == 2
+    assert Complaint.query.filter(Complaint.assigned_to.is_(None)).count() == 3
+
+    assert assignment.open_counts() == {ann.id: 1}
+    report = assignment.rebalance(include_escalated=True)
+    assert report.total == 3
+    assert assignment.open_counts() == {ann.id: 1, ben.id: 2}
+    db.session.expire_all()
+    assert escalated.assigned_to == ben.id
+    assert escalated.status == 'Escalated'
+    assert Complaint.query.filter_by(status='In Progress').count() == 2
+    assert stats.find_mismatches() == {}
+    # High first, to the idle ben; the escalated one must leave ann; the last Low goes to ann
+    loads = assignment.build_balancer().loads
+    assert loads[ann.id] == 1 and loads[ben.id] == 4
+    assert Complaint.query.filter(Complaint.assigned_to.is_(None), Complaint.status != 'Resolved').count() == 0
+    assert ComplaintHistory.query.filter(ComplaintHistory.notes.like('Auto-assigned%')).count() == 3
+
+
+def test_simulate_compares_with_history(app, make_user):
+    student = make_user('alice')
+    ann = make_user('ann', role='staff')
+    make_user('ben', role='staff')
+    start = datetime.utcnow() - timedelta(days=10)
+    for day in range(6):
+        _complaint(student, assignee=ann, date_posted=start + timedelta(days=day))
+    db.session.commit()
+
+    historical, workload = assignment.simulate(start - timedelta(days=1))
+    assert historical.summary()['max'] == 6
+    assert workload.summary()['max'] == 3
+    assert workload.summary()['mean_spread'] < historical.summary()['mean_spread']
+
+
+def test_assign_commands(app, make_user):
+    student = make_user('alice')
+    make_user('ann', role='staff')
+    _complaint(student)
+    db.session.commit()
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=['assign', 'rebalance'])
+    assert result.exit_code == 0
+    assert 'Assigned 1 complaints.' in result.output
+    result = runner.invoke(args=['assign', 'workload'])
+    assert 'ann: 1 open, load 1' in result.output
+    result = runner.invoke(args=['assign', 'simulate', '--days', '1'])
+    assert result.exit_code == 0
+    assert 'workload' in result.output
+
+
+def test_dashboard_open_counts_are_cached_until_an_assignment(app, client, make_user, login):
+    admin = make_user('admin', role='admin')
+    student = make_user('alice')
+    ann = make_user('ann', role='staff')
+    complaint = _complaint(student)
+    _complaint(student, assignee=ann)
+    db.session.commit()
+
+    assert assignment.open_counts() == {ann.id: 1}
+    with QueryCounter() as counter:
+        assert assignment.open_counts() == {ann.id: 1}
+    assert counter.count == 0
+
+    login(client, admin)
+    client.post(f'/admin/assign/{complaint.id}', data={'staff_id': ann.id})
+    assert assignment.open_counts() == {ann.id: 2}
@@ -0,0 +1,145 @@
+import threading
+import time
+
+import pytest
+
+from app import bulk, create_app, db
+from app import stats
+from app.models import Complaint, ComplaintHistory
+from app.query_counter import QueryCounter
+from conftest import TestConfig
+
+
+def _seed(student, count, **kwargs):
+    complaints = [Complaint(title=f'Complaint {i}', category='Electricity', description='Broken',
+                            location='Block A', author=student, **kwargs) for i in range(count)]
+    db.session.add_all(complaints)
+    db.session.commit()
+    return [complaint.id for complaint in complaints]
+
+
+def test_bulk_assign_reports_each_id(app, client, make_user, login):
+    admin = make_user('admin', role='admin')
+    staff = make_user('bob', role='staff')
+    ids = _seed(make_user('alice'), 3)
+    db.session.get(Complaint, ids[2]).is_deleted = True
+    db.session.commit()
+    login(client, admin)
+
+    response = client.post('/admin/bulk', json={'action': 'assign', 'staff_id': staff.id,
+                                                'ids': ids + [ids[0], 9999]})
+    assert response.status_code == 200
+    assert response.json['results'] == {str(ids[0]): 'updated', str(ids[1]): 'updated',
+                                        str(ids[2]): 'not_found', '9999': 'not_found'}
+    assert response.json['counts'] == {'updated': 2, 'not_found': 2}
+
+    db.session.expire_all()
+    assert {c.assigned_to for c in Complaint.query.filter(Complaint.id.in_(ids[:2]))} == {staff.id}
+    history = ComplaintHistory.query.order_by(ComplaintHistory.complaint_id).all()
+    assert [(h.complaint_id, h.old_status, h.new_status, h.changed_by) for h in history] == [
+        (ids[0], 'Pending', 'In Progress', admin.id), (ids[1], 'Pending', 'In Progress', admin.id)]
+    assert not stats.find_mismatches()
+
+    # Applying it again changes nothing
+    again = client.post('/admin/bulk', json={'action': 'assign', 'staff_id': staff.id, 'ids': ids[:2]})
+    assert again.json['counts'] == {'unchanged': 2}
+    assert ComplaintHistory.query.count() == 2
+
+
+def test_bulk_status_by_filter_is_set_based(app, client, make_user, login):
+    admin = make_user('admin', role='admin')
+    ids = _seed(make_user('alice'), 40)
+    db.session.get(Complaint, ids[0]).category = 'Other'
+    db.session.commit()
+    login(client, admin)
+
+    with QueryCounter() as counter:
+        response = client.post('/admin/bulk', json={'action': 'status', 'status': 'Resolved',
+                                                    'scope': 'filter', 'filter_category': 'Electricity'})
+    assert response.json['counts'] == {'updated': 39}
+    # Independent of the number of complaints: no per-row statements
+    assert counter.count < 15
+
+    assert stats.dashboard_counts()[0] == {'Pending': 1, 'In Progress': 0, 'Resolved': 39}
+    assert not stats.find_mismatches()
+
+
+def test_bulk_delete_form_needs_confirmation(app, client, make_user, login):
+    admin = make_user('admin', role='admin')
+    ids = _seed(make_user('alice'), 2)
+    login(client, admin)
+
+    response = client.post('/admin/bulk', data={'action': 'delete', 'ids': [str(i) for i in ids]})
+    assert response.status_code == 302
+    assert Complaint.query.filter_by(is_deleted=True).count() == 0
+
+    response = client.post('/admin/bulk', data={'action': 'delete', 'confirm': 'yes', 'ids': [str(i) for i in ids],
+                                                'filter_status': 'Pending'}, follow_redirects=True)
+    assert b'2 complaints updated, 0 unchanged, 0 not found.' in response.data
+    assert Complaint.query.filter_by(is_deleted=True).count() == 2
+    assert stats.live_count() == 0
+
+
+def test_bulk_rejects_invalid_requests(app, client, make_user, login):
+    admin = make_user('admin', role='admin')
+    student = make_user('bob')
+    ids = _seed(make_user('alice'), 1)
+    login(client, admin)
+
+    assert client.post('/admin/bulk', json={'action': 'assign', 'staff_id': student.id, 'ids': ids}).status_code == 400
+    assert client.post('/admin/bulk', json={'action': 'status', 'status': 'Closed', 'ids': ids}).status_code == 400
+    assert client.post('/admin/bulk', json={'action': 'status', 'status': 'Resolved', 'ids': []}).status_code == 400
+    assert client.post('/admin/bulk', json={'action': 'status', 'status': 'Resolved', 'ids': ['x']}).status_code == 400
+    assert client.post('/admin/bulk', json={'action': 'status', 'status': 'Resolved', 'ids': '12'}).status_code == 400
+    assert client.post('/admin/bulk', json=[{'action': 'status', 'ids': ids}]).status_code == 400
+    assert db.session.get(Complaint, ids[0]).status == 'Pending'
+
+    app.config['BULK_MAX_ITEMS'] = 0
+    response = client.post('/admin/bulk', json={'action': 'status', 'status': 'Resolved', 'scope': 'filter'})
+    assert response.status_code == 400
+    assert 'narrow it down' in response.json['error']
+
+
+@pytest.fixture
+def file_app(tmp_path):
+    class FileConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'bulk.db')
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+
+    app = create_app(FileConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_overlapping_bulk_calls_keep_history_and_counters_consistent(file_app, make_user, monkeypatch):
+    admin = make_user('admin', role='admin')
+    ids = _seed(make_user('alice'), 5)
+    load_targets = bulk._load_targets
+
+    def _other_worker():
+        with file_app.app_context():
+            bulk.apply('status', ids, admin.id, status='Resolved')
+
+    other = threading.Thread(target=_other_worker)
+
+    def _load_then_race(chunk_ids):
+        rows = load_targets(chunk_ids)
+        if other.ident is None:
+            # Another worker starts the same kind of call after this one has read
+            other.start()
+            time.sleep(0.3)
+        return rows
+
+    monkeypatch.setattr(bulk, '_load_targets', _load_then_race)
+    bulk.apply('status', ids, admin.id, status='In Progress')
+    other.join()
+
+    db.session.expire_all()
+    assert {c.status for c in Complaint.query} == {'Resolved'}
+    history = ComplaintHistory.query.order_by(ComplaintHistory.id).all()
+    assert [(h.old_status, h.new_status) for h in history if h.complaint_id == ids[0]] == [
+        ('Pending', 'In Progress'), ('In Progress', 'Resolved')]
+    assert not stats.find_mismatches()
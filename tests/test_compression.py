@@ -0,0 +1,132 @@
+import gzip
+import re
+import zlib
+
+import pytest
+from flask import Response, stream_with_context
+
+from app import compression, csrf_masking, db
+from app.models import Complaint
+
+PAGE = '<html>' + '<p>Broken streetlight near Block A</p>' * 100 + '</html>'
+
+
+@pytest.fixture
+def routes(app):
+    @app.route('/_page')
+    def page():
+        return PAGE
+
+    @app.route('/_tiny')
+    def tiny():
+        return 'ok'
+
+    @app.route('/_binary')
+    def binary():
+        return Response(b'\x89PNG' * 500, mimetype='image/png')
+
+    @app.route('/_stream')
+    def stream():
+        def rows():
+            for i in range(200):
+                yield f'row {i}\n'
+        return Response(stream_with_context(rows()), mimetype='text/plain')
+
+    return app
+
+
+def test_gzip_and_vary(client, routes):
+    response = client.get('/_page', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert int(response.headers['Content-Length']) == len(response.data) < len(PAGE) / 10
+    assert gzip.decompress(response.data).decode() == PAGE
+
+    plain = client.get('/_page')
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.get_data(as_text=True) == PAGE
+
+
+@pytest.mark.skipif(compression.brotli is None, reason='brotli not installed')
+def test_brotli_preferred_when_accepted(client, routes):
+    response = client.get('/_page', headers={'Accept-Encoding': 'gzip, deflate, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert compression.brotli.decompress(response.data).decode() == PAGE
+
+    response = client.get('/_page', headers={'Accept-Encoding': 'gzip, br;q=0'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+
+
+def test_small_and_binary_responses_are_left_alone(client, routes):
+    tiny = client.get('/_tiny', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in tiny.headers and tiny.data == b'ok'
+
+    binary = client.get('/_binary', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in binary.headers
+    assert 'Vary' not in binary.headers
+
+
+def test_weak_etag_and_304(client, routes):
+    first = client.get('/_page', headers={'Accept-Encoding': 'gzip'})
+    etag = first.headers['ETag']
+    assert etag.startswith('W/"')
+
+    again = client.get('/_page', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert again.status_code == 304 and again.data == b''
+
+    # The validator describes the content, whatever the encoding
+    assert client.get('/_page', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/_page', headers={'If-None-Match': 'W/"stale"'}).status_code == 200
+
+
+def test_streamed_responses_are_compressed_incrementally(client, routes):
+    response = client.get('/_stream', headers={'Accept-Encoding': 'gzip'}, buffered=False)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers and 'ETag' not in response.headers
+
+    chunks = list(response.response)
+    assert len(chunks) > 1  # flushed as it goes, not buffered to the end
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    first = decompressor.decompress(chunks[0])
+    assert first == b'row 0\n'
+    assert first + decompressor.decompress(b''.join(chunks[1:])) == ''.join(
+        f'row {i}\n' for i in range(200)).encode()
+
+
+def _csrf_token(html):
+    return re.search(r'name="csrf_token" value="([^"]+)"', html).group(1)
+
+
+def test_admin_dashboard_is_compressed(client, make_user, login):
+    student = make_user('alice')
+    db.session.add_all([Complaint(title=f'Broken light {i}', category='Electricity', description='Dark',
+                                  location='Block A', author=student) for i in range(20)])
+    db.session.commit()
+    login(client, make_user('admin', role='admin'))
+
+    response = client.get('/admin/dashboard', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    html = gzip.decompress(response.data)
+    assert html.count(b'name="csrf_token"') > 20
+    assert len(response.data) < len(html) / 4
+
+
+def test_csrf_token_is_masked_in_every_response(app, client):
+    app.config['WTF_CSRF_ENABLED'] = True
+    first = client.get('/auth/login', headers={'Accept-Encoding': 'gzip'})
+    assert first.headers['Content-Encoding'] == 'gzip'
+    second = client.get('/auth/login')
+    tokens = [_csrf_token(gzip.decompress(first.data).decode()), _csrf_token(second.get_data(as_text=True))]
+    assert tokens[0] != tokens[1]
+
+    # The ETag leaves the mask out, so an unchanged form still gets a 304
+    assert first.headers['ETag'] == second.headers['ETag']
+    assert client.get('/auth/login', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    for token in tokens:
+        response = client.post('/auth/login', data={'csrf_token': token, 'email': 'x@y.z', 'password': 'x'})
+        assert response.status_code == 200
+    assert client.post('/auth/login', headers={'X-CSRFToken': csrf_masking.unmask(tokens[0])}).status_code == 200
+    assert client.post('/auth/login', data={'csrf_token': csrf_masking.mask('forged')}).status_code == 400
+    assert client.post('/auth/login', data={'csrf_token': 'bm90IGEgdG9rZW4='}).status_code == 400
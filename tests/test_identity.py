@@ -0,0 +1,67 @@
+from flask import g
+
+from app import db
+from app.identity import IdentityCache, UserIdentity, get_cache
+from app.query_counter import QueryCounter
+
+
+def _get(client, url):
+    # The test app context outlives requests; forget the user Flask-Login kept in g
+    g.pop('_login_user', None)
+    return client.get(url)
+
+
+def test_repeat_requests_skip_user_table(app, client, make_user, login):
+    user = make_user('admin', role='admin')
+    login(client, user)
+
+    assert _get(client, '/admin/dashboard').status_code == 200
+    with QueryCounter() as counter:
+        assert _get(client, '/admin/dashboard').status_code == 200
+    assert not [s for s in counter.statements if 'FROM user' in s and 'WHERE user.id' in s]
+    assert get_cache().stats()['hits'] == 1
+
+
+def test_role_change_invalidates_identity(app, client, make_user, login):
+    user = make_user('admin', role='admin')
+    login(client, user)
+    assert _get(client, '/admin/dashboard').status_code == 200
+
+    user.role = 'student'
+    db.session.flush()
+    # Not yet: other threads would cache the old row again before the commit
+    assert get_cache().stats()['invalidations'] == 0
+    db.session.commit()
+
+    assert get_cache().stats()['invalidations'] == 1
+    response = _get(client, '/admin/dashboard')
+    assert response.status_code == 302
+
+
+def test_rolled_back_change_keeps_identity(app, client, make_user, login):
+    user = make_user('admin', role='admin')
+    login(client, user)
+    assert _get(client, '/admin/dashboard').status_code == 200
+
+    user.role = 'student'
+    db.session.flush()
+    db.session.rollback()
+
+    assert get_cache().stats()['invalidations'] == 0
+    assert _get(client, '/admin/dashboard').status_code == 200
+
+
+def test_lru_eviction_and_ttl():
+    now = [0.0]
+    cache = IdentityCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    for i in (1, 2):
+        cache.put(UserIdentity(i, f'user{i}', f'user{i}@asmedu.org', 'student'))
+
+    assert cache.get(1).username == 'user1'  # 1 is now most recently used
+    cache.put(UserIdentity(3, 'user3', 'user3@asmedu.org', 'student'))
+    assert cache.get(2) is None
+    assert cache.get(1) is not None
+
+    now[0] = 11.0
+    assert cache.get(1) is None
+    assert cache.stats() == {'size': 1, 'hits': 2, 'misses': 2, 'evictions': 1, 'invalidations': 0}
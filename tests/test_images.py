@@ -0,0 +1,86 @@
+import io
+import os
+
+import pytest
+
+from app import images
+from app.models import Complaint
+
+Image = pytest.importorskip('PIL.Image')
+
+EXIF_ORIENTATION = 0x0112
+EXIF_MAKE = 0x010F
+
+
+@pytest.fixture
+def uploads(app, tmp_path):
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+    return tmp_path
+
+
+def _jpeg(size, orientation=None):
+    exif = Image.Exif()
+    exif[EXIF_MAKE] = 'PhoneCo'
+    if orientation:
+        exif[EXIF_ORIENTATION] = orientation
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'JPEG', exif=exif)
+    return buffer.getvalue()
+
+
+def test_variants_are_rotated_and_stripped(uploads):
+    (uploads / 'photo.jpg').write_bytes(_jpeg((3000, 1500), orientation=6))
+
+    written = images.render_variants(str(uploads / 'photo.jpg'), {'thumb': 320, 'medium': 1024})
+
+    assert written == ['photo.thumb.jpg', 'photo.medium.jpg']
+    with Image.open(uploads / 'photo.thumb.jpg') as thumb:
+        assert thumb.size == (320, 640)  # portrait once the orientation is applied
+        assert not thumb.getexif()
+        assert 'icc_profile' not in thumb.info
+    assert (uploads / 'photo.thumb.jpg').stat().st_size < (uploads / 'photo.jpg').stat().st_size
+
+
+def test_small_and_transparent_images(uploads):
+    (uploads / 'small.jpg').write_bytes(_jpeg((200, 100)))
+    assert images.render_variants(str(uploads / 'small.jpg'), {'thumb': 320}) == []
+
+    Image.new('RGBA', (800, 400), (0, 0, 0, 0)).save(uploads / 'clear.png')
+    assert images.render_variants(str(uploads / 'clear.png'), {'thumb': 320}) == ['clear.thumb.jpg']
+    with Image.open(uploads / 'clear.thumb.jpg') as thumb:
+        assert thumb.mode == 'RGB' and thumb.getpixel((0, 0)) == (255, 255, 255)
+
+
+def test_upload_renders_variants_and_templates_use_them(app, client, uploads, make_user, login):
+    login(client, make_user('alice'))
+
+    client.post('/complaint/new', data={
+        'title': 'Broken bench', 'category': 'Infrastructure', 'priority': 'Low',
+        'location': 'Quad', 'description': 'Snapped in half',
+        'image': (io.BytesIO(_jpeg((1600, 1200))), 'bench.jpg'),
+    }, content_type='multipart/form-data')
+    complaint = Complaint.query.one()
+    stem = os.path.splitext(complaint.image_file)[0]
+    assert sorted(os.listdir(uploads)) == sorted([complaint.image_file, f'{stem}.medium.jpg', f'{stem}.thumb.jpg'])
+
+    with app.test_request_context():
+        assert images.upload_url(complaint.image_file, 'medium') == f'/uploads/{stem}.medium.jpg'
+        assert images.upload_srcset(complaint.image_file) == (
+            f'/uploads/{stem}.thumb.jpg 320w, /uploads/{stem}.medium.jpg 1024w')
+
+        # Until a variant exists, the original is used
+        os.remove(uploads / f'{stem}.medium.jpg')
+        assert images.upload_url(complaint.image_file, 'medium') == f'/uploads/{complaint.image_file}'
+        assert images.upload_srcset(complaint.image_file) == f'/uploads/{stem}.thumb.jpg 320w'
+
+    html = client.get(f'/complaint/{complaint.id}').get_data(as_text=True)
+    assert f'srcset="/uploads/{stem}.thumb.jpg 320w"' in html
+
+
+def test_variants_render_in_a_worker_process(app, uploads):
+    app.config['IMAGE_WORKERS'] = 1
+    (uploads / 'photo.jpg').write_bytes(_jpeg((1200, 900)))
+
+    future = images.schedule_variants('photo.jpg')
+
+    assert future.result(timeout=60) == ['photo.thumb.jpg', 'photo.medium.jpg']
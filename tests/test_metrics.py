@@ -0,0 +1,108 @@
+import io
+import multiprocessing
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from app import create_app, db
+from app import metrics
+from app import uploads
+from app.models import Complaint
+from conftest import TestConfig
+
+
+@pytest.fixture(scope='session')
+def metrics_dir(tmp_path_factory):
+    # prometheus_client keeps one directory per process, so every app shares it
+    return str(tmp_path_factory.mktemp('metrics'))
+
+
+@pytest.fixture
+def metrics_app(tmp_path, metrics_dir):
+    class MetricsConfig(TestConfig):
+        UPLOAD_FOLDER = str(tmp_path / 'uploads')
+        METRICS_ENABLED = True
+        METRICS_DIR = metrics_dir
+
+    app = create_app(MetricsConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+def _scrape(client, **kwargs):
+    """``{(sample name, labels): value}`` from ``/metrics``."""
+    # Imported late: prometheus_client must see PROMETHEUS_MULTIPROC_DIR first
+    from prometheus_client.parser import text_string_to_metric_families
+    response = client.get('/metrics', **kwargs)
+    assert response.status_code == 200
+    return {(sample.name, tuple(sorted(sample.labels.items()))): sample.value
+            for family in text_string_to_metric_families(response.get_data(as_text=True))
+            for sample in family.samples}
+
+
+def _record_in_child(app):
+    with app.app_context():
+        metrics.record_upload(100, duplicate=False)
+
+
+def test_values_from_every_process_are_merged(metrics_app):
+    client = metrics_app.test_client()
+    before = _scrape(client)
+    metrics.record_upload(10, duplicate=False)
+
+    process = multiprocessing.get_context('fork').Process(target=_record_in_child, args=(metrics_app,))
+    process.start()
+    process.join()
+
+    after = _scrape(client)
+    bytes_key = ('campussync_upload_bytes_total', ())
+    assert after[bytes_key] - before.get(bytes_key, 0) == 110
+
+
+def test_metrics_endpoint(metrics_app, make_user):
+    client = metrics_app.test_client()
+    student = make_user('alice')
+    db.session.add(Complaint(title='Dark', category='Other', description='x', location='y', author=student))
+    db.session.commit()
+    before = _scrape(client)
+    client.get('/auth/login')
+    client.get('/auth/login')
+    client.get('/no-such-page')
+
+    response = client.get('/metrics')
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    after = _scrape(client)
+
+    def grew(name, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        return after.get(key, 0) - before.get(key, 0)
+
+    assert grew('campussync_http_requests_total', endpoint='auth.login', status='200') == 2
+    assert grew('campussync_http_requests_total', endpoint='unmatched', status='404') == 1
+    assert grew('campussync_http_request_duration_seconds_count', endpoint='auth.login') == 2
+    assert grew('campussync_http_request_duration_seconds_bucket', endpoint='auth.login', le='+Inf') == 2
+    assert after[('campussync_complaints', (('status', 'Pending'),))] == 1
+    assert grew('campussync_db_checkouts_total') > 0
+
+    metrics_app.config['METRICS_TOKEN'] = 'secret'
+    assert client.get('/metrics').status_code == 403
+    assert _scrape(client, headers={'Authorization': 'Bearer secret'})
+
+
+def test_uploads_are_counted(metrics_app):
+    client = metrics_app.test_client()
+    before = _scrape(client)
+    for _ in range(2):
+        uploads.store(FileStorage(io.BytesIO(b'x' * 1000), 'photo.png'), 'png')
+
+    after = _scrape(client)
+    for key, grown in ((('campussync_uploads_total', (('result', 'stored'),)), 1),
+                       (('campussync_uploads_total', (('result', 'duplicate'),)), 1),
+                       (('campussync_upload_bytes_total', ()), 2000)):
+        assert after[key] - before.get(key, 0) == grown
+
+
+def test_metrics_are_off_by_default(client):
+    assert client.get('/metrics').status_code == 404
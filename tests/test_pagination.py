@@ -0,0 +1,95 @@
+import re
+from datetime import datetime, timedelta
+from html import unescape
+
+import pytest
+
+from app import db
+from app.models import Complaint
+from app.pagination import decode_cursor, encode_cursor
+
+
+@pytest.fixture
+def admin(app, make_user):
+    admin = make_user('admin', role='admin')
+    student = make_user('alice')
+
+    base = datetime(2026, 3, 1, 12, 0, 0, 250000)
+    complaints = []
+    for i in range(25):
+        # Pairs of complaints share a timestamp so the id tie-breaker matters
+        complaints.append(Complaint(title=f'Leak {i}', category='Water Supply', description='Dripping tap',
+                                    location='Hostel', author=student, date_posted=base + timedelta(minutes=i // 2)))
+    db.session.add_all(complaints)
+    db.session.commit()
+    return admin
+
+
+def _ids(html):
+    return [int(i) for i in re.findall(r'<td>#(\d+)</td>', html)]
+
+
+def _link(html, label):
+    match = re.search(r'<a class="page-link" href="([^"]+)" aria-label="' + label + '"', html)
+    return unescape(match.group(1)) if match else None
+
+
+def _walk(client, url, label):
+    pages = []
+    while url:
+        html = client.get(url).get_data(as_text=True)
+        pages.append(_ids(html))
+        url = _link(html, label)
+    return pages
+
+
+def test_cursor_round_trip_and_garbage():
+    token = encode_cursor({'p': 2, 'd': 'n', 'k': ['2026-03-01T12:00:00', 7]})
+    assert re.fullmatch(r'[A-Za-z0-9_-]+', token)
+    assert decode_cursor(token) == {'p': 2, 'd': 'n', 'k': ['2026-03-01T12:00:00', 7]}
+    assert decode_cursor('not-a-cursor') is None
+    assert decode_cursor(encode_cursor({'p': 0})) is None
+
+
+def test_walk_forwards(client, admin, login):
+    login(client, admin)
+
+    forward = _walk(client, '/admin/dashboard', 'Next')
+    assert [len(page) for page in forward] == [10, 10, 5]
+    flat = [i for page in forward for i in page]
+    assert flat == list(range(25, 0, -1))
+
+    last_page_html = client.get(_last_url(client)).get_data(as_text=True)
+    assert 'displaying <b>21 - 25</b> complaints in total <b>25</b>' in last_page_html
+
+
+def _last_url(client):
+    url = '/admin/dashboard'
+    while True:
+        html = client.get(url).get_data(as_text=True)
+        following = _link(html, 'Next')
+        if not following:
+            return url
+        url = following
+
+
+def test_previous_links_retrace_pages(client, admin, login):
+    login(client, admin)
+
+    backward = _walk(client, _last_url(client), 'Previous')
+    assert backward == [list(range(5, 0, -1)), list(range(15, 5, -1)), list(range(25, 15, -1))]
+
+
+def test_garbled_cursor_shows_first_page(client, admin, login):
+    login(client, admin)
+
+    html = client.get('/admin/dashboard?cursor=%%%').get_data(as_text=True)
+    assert _ids(html) == list(range(25, 15, -1))
+
+
+def test_ranked_search_pages_by_offset(client, admin, login):
+    login(client, admin)
+
+    pages = _walk(client, '/admin/dashboard?search=leak', 'Next')
+    assert sorted(i for page in pages for i in page) == list(range(1, 26))
+    assert [len(page) for page in pages] == [10, 10, 5]
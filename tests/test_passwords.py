@@ -0,0 +1,65 @@
+import threading
+import time
+
+from app import bcrypt, db
+from app import passwords
+from app.models import User
+
+
+def _sign_in(client):
+    return client.post('/auth/login', data={'email': 'alice@asmedu.org', 'password': 'Password123'})
+
+
+def test_login_rehashes_old_work_factor(app, client, make_user):
+    user = make_user('alice', password=bcrypt.generate_password_hash('Password123', 5).decode('utf-8'))
+
+    response = _sign_in(client)
+    assert response.status_code == 302
+    db.session.refresh(user)
+    assert passwords.hash_rounds(user.password) == app.config['BCRYPT_LOG_ROUNDS'] == 4
+    assert bcrypt.check_password_hash(user.password, 'Password123')
+
+
+def test_failed_login_keeps_hash(app, client, make_user):
+    old_hash = bcrypt.generate_password_hash('Password123', 5).decode('utf-8')
+    user = make_user('alice', password=old_hash)
+
+    response = client.post('/auth/login', data={'email': 'alice@asmedu.org', 'password': 'wrong'})
+    assert response.status_code == 200
+    db.session.refresh(user)
+    assert user.password == old_hash
+
+
+def test_register_hashes_at_configured_cost(app, client):
+    response = client.post('/auth/register', data={'username': 'bob', 'email': 'bob@asmedu.org',
+                                                   'password': 'Password123'})
+    assert response.status_code == 302
+    user = User.query.filter_by(email='bob@asmedu.org').one()
+    assert passwords.hash_rounds(user.password) == 4
+
+
+def test_busy_pool_returns_503(app, client, make_user):
+    make_user('alice', password=passwords.hash_password('Password123'))
+    app.config['BCRYPT_QUEUE_TIMEOUT'] = 0.05
+    app.extensions['password_pool'] = passwords._Pool(1)
+
+    release = threading.Event()
+    app.extensions['password_pool'].submit(release.wait)
+    try:
+        response = _sign_in(client)
+    finally:
+        release.set()
+    assert response.status_code == 503
+    assert b'The server is busy' in response.data
+
+
+def test_queue_timeout_only_bounds_the_wait(app):
+    app.config['BCRYPT_QUEUE_TIMEOUT'] = 0.05
+    app.extensions['password_pool'] = passwords._Pool(1)
+
+    def slow_hash():
+        time.sleep(0.2)
+        return 'hashed'
+
+    # Started at once, so it is waited for even though it runs past the timeout
+    assert passwords._run(slow_hash) == 'hashed'
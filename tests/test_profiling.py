@@ -0,0 +1,68 @@
+import json
+import logging
+import pstats
+
+import pytest
+
+from app import create_app, db
+from app.profiling import normalize_sql
+from conftest import TestConfig
+
+
+@pytest.fixture
+def profiled_app(tmp_path):
+    class ProfiledConfig(TestConfig):
+        PROFILING_ENABLED = True
+        PROFILING_SLOW_REQUEST_MS = 0
+        PROFILING_SLOW_QUERY_MS = 0
+        PROFILING_SAMPLE_EVERY = 2
+        PROFILING_DIR = str(tmp_path / 'profiles')
+
+    app = create_app(ProfiledConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+def test_normalize_sql_folds_literals_and_in_lists():
+    statement = """SELECT complaint.id, count_1 FROM complaint
+                   WHERE status = 'Won''t fix' AND id IN (?, ?, ?) AND priority IN (1,2) LIMIT 10"""
+    assert normalize_sql(statement) == ("SELECT complaint.id, count_1 FROM complaint WHERE status = ? "
+                                        "AND id IN (...) AND priority IN (...) LIMIT ?")
+
+
+def test_profiling_is_off_by_default(client):
+    assert 'Server-Timing' not in client.get('/auth/login').headers
+
+
+def test_server_timing_and_slow_log(profiled_app, caplog, make_user, login):
+    client = profiled_app.test_client()
+    login(client, make_user('alice'))
+
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger='campussync.slow'):
+        response = client.get('/dashboard')
+    timing = response.headers['Server-Timing']
+    assert timing.startswith('total;dur=')
+    assert 'render;dur=' in timing
+    assert 'desc="' in timing and ' queries"' in timing
+
+    records = [json.loads(record.getMessage()) for record in caplog.records]
+    request_record = next(record for record in records if record['type'] == 'request')
+    assert request_record['endpoint'] == 'student.dashboard'
+    assert request_record['status'] == 200 and request_record['sql_count'] >= 1
+    query_records = [record for record in records if record['type'] == 'query']
+    assert query_records and all(record['endpoint'] == 'student.dashboard' for record in query_records)
+    assert all("'" not in record['sql'] for record in query_records)
+
+
+def test_one_request_in_n_is_profiled(profiled_app, tmp_path):
+    client = profiled_app.test_client()
+    for _ in range(4):
+        client.get('/auth/login')
+
+    dumps = sorted((tmp_path / 'profiles').glob('*.pstats'))
+    assert len(dumps) == 2
+    assert 'auth.login' in dumps[0].name
+    assert pstats.Stats(str(dumps[0])).total_calls > 0
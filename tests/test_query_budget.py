@@ -0,0 +1,59 @@
+"""Per-route SQL statement budgets; a lazy load per row blows through them."""
+import pytest
+
+from app import db
+from app.models import User, Complaint
+from app.query_counter import QueryBudgetExceeded, QueryCounter, max_queries
+
+
+@pytest.fixture
+def users(app, make_user):
+    admin = make_user('admin', role='admin')
+    staff = make_user('staff', role='staff')
+    students = []
+    for i in range(10):
+        student = make_user(f'student{i}')
+        students.append(student)
+        db.session.add(Complaint(title=f'Complaint {i}', category='Other', description='Broken',
+                                 location='Campus', author=student, assignee=staff, status='In Progress'))
+    db.session.commit()
+    ids = {'admin': admin.id, 'staff': staff.id, 'student': students[0].id}
+    # Start each request from an empty identity map, as a real worker would
+    db.session.remove()
+    return ids
+
+
+# user, page, counters total, staff dropdown, staff workloads, summary counters
+def test_admin_dashboard_budget(client, users, login):
+    login(client, users['admin'])
+    with max_queries(6):
+        response = client.get('/admin/dashboard')
+    assert response.status_code == 200
+    assert b'student9' in response.data
+
+
+# user, page
+def test_student_dashboard_budget(client, users, login):
+    login(client, users['student'])
+    with max_queries(2):
+        assert client.get('/dashboard').status_code == 200
+
+
+# user, status counts, one queue seek per priority, archive page
+def test_staff_dashboard_budget(client, users, login):
+    login(client, users['staff'])
+    with max_queries(6):
+        response = client.get('/staff/dashboard')
+    assert response.status_code == 200
+    assert b'student9' in response.data
+
+
+def test_budget_reports_statements(app, users):
+    with pytest.raises(QueryBudgetExceeded, match='2 statements executed, budget is 1'):
+        with max_queries(1):
+            db.session.get(User, users['admin'])
+            db.session.get(User, users['staff'])
+
+    with QueryCounter() as counter:
+        Complaint.query.count()
+    assert counter.count == 1
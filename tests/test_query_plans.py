@@ -0,0 +1,127 @@
+"""Every dashboard query must be answered from an index, never a table scan."""
+import re
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.models import Complaint
+from app.pagination import encode_cursor
+
+CATEGORIES = ['Roads & Streets', 'Water Supply', 'Electricity', 'Sanitation & Garbage', 'Public Transport', 'Other']
+STATUSES = ['Pending', 'In Progress', 'Resolved']
+PRIORITIES = ['Low', 'Medium', 'High']
+
+TABLE_SCAN = re.compile(r'\bSCAN complaint\b(?! USING)')
+
+# Cursors into the middle of the listings, forwards and backwards
+_KEY = [(datetime.utcnow() - timedelta(hours=300)).isoformat(), 300]
+NEXT_PAGE = 'cursor=' + encode_cursor({'p': 4, 'd': 'n', 'k': _KEY})
+PREV_PAGE = 'cursor=' + encode_cursor({'p': 3, 'd': 'p', 'k': _KEY})
+
+
+@pytest.fixture
+def seeded(app, make_user):
+    admin = make_user('admin', role='admin')
+    staff = [make_user(f'staff{i}', role='staff') for i in range(3)]
+    students = [make_user(f'student{i}') for i in range(20)]
+
+    now = datetime.utcnow()
+    complaints = []
+    for i in range(600):
+        status = STATUSES[i % 3]
+        complaints.append(Complaint(
+            title=f'Complaint {i}', category=CATEGORIES[i % len(CATEGORIES)],
+            description='Something is broken', location='Campus', priority=PRIORITIES[(i // 3) % 3],
+            date_posted=now - timedelta(hours=i), status=status,
+            user_id=students[i % len(students)].id,
+            assigned_to=staff[i % len(staff)].id if status != 'Pending' else None,
+            is_deleted=(i % 17 == 0),
+        ))
+    db.session.add_all(complaints)
+    db.session.commit()
+    return {'admin': admin, 'staff': staff[0], 'student': students[0]}
+
+
+@contextmanager
+def captured_complaint_selects():
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and 'FROM complaint' in statement:
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+
+
+def _assert_indexed(statements, listing_index, ranked=False):
+    """No scan or temp sort anywhere, and every listing uses one of ``listing_index``.
+
+    Ranked (full-text) listings are driven by the FTS index and have to sort
+    their matches by relevance, so only they may use a temp B-tree.
+    """
+    assert statements, 'no complaint queries were captured'
+    with db.engine.connect() as conn:
+        for statement, parameters in statements:
+            plan = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+            details = [row[-1] for row in plan]
+            for detail in details:
+                assert not TABLE_SCAN.search(detail), f'table scan in {statement!r}: {details}'
+                if not ranked:
+                    assert 'USE TEMP B-TREE' not in detail, f'temp sort in {statement!r}: {details}'
+            if 'ORDER BY' in statement:
+                indexes = (listing_index,) if isinstance(listing_index, str) else listing_index
+                assert any(i in d for i in indexes for d in details), f'{indexes} not used: {details}'
+
+
+@pytest.mark.parametrize('query_string, listing_index', [
+    ('', 'ix_complaint_live_date_posted'),
+    ('?status=Pending', 'ix_complaint_live_status_date (status=?)'),
+    ('?category=Electricity', 'ix_complaint_live_category_date (category=?)'),
+    ('?status=Resolved&category=Other', 'ix_complaint_live_'),
+    ('?' + NEXT_PAGE, 'ix_complaint_live_date_posted (date_posted<?)'),
+    ('?' + PREV_PAGE, 'ix_complaint_live_date_posted (date_posted>?)'),
+    ('?status=Pending&' + NEXT_PAGE, 'ix_complaint_live_status_date (status=? AND date_posted<?)'),
+])
+def test_admin_dashboard_uses_indexes(client, seeded, query_string, listing_index, login):
+    login(client, seeded['admin'])
+    with captured_complaint_selects() as statements:
+        assert client.get('/admin/dashboard' + query_string).status_code == 200
+    _assert_indexed(statements, listing_index)
+
+
+@pytest.mark.parametrize('query_string', ['', '?category=Water Supply', '?' + NEXT_PAGE, '?' + PREV_PAGE])
+def test_student_dashboard_uses_indexes(client, seeded, query_string, login):
+    login(client, seeded['student'])
+    with captured_complaint_selects() as statements:
+        assert client.get('/dashboard' + query_string).status_code == 200
+    _assert_indexed(statements, 'ix_complaint_live_user_date (user_id=?')
+
+
+@pytest.mark.parametrize('user, url', [
+    ('admin', '/admin/dashboard?search=Complaint'),
+    ('admin', '/admin/dashboard?search=compl&status=Pending'),
+    ('student', '/dashboard?search=Complaint'),
+])
+def test_search_uses_full_text_index(client, seeded, user, url, login):
+    login(client, seeded[user])
+    with captured_complaint_selects() as statements:
+        assert client.get(url).status_code == 200
+    _assert_indexed(statements, 'complaint_fts VIRTUAL TABLE INDEX', ranked=True)
+
+
+@pytest.mark.parametrize('query_string', ['', '?' + NEXT_PAGE])
+def test_staff_dashboard_uses_indexes(client, seeded, query_string, login):
+    login(client, seeded['staff'])
+    with captured_complaint_selects() as statements:
+        assert client.get('/staff/dashboard' + query_string).status_code == 200
+    _assert_indexed(statements, (
+        'ix_complaint_open_assignee_priority (assigned_to=? AND priority=?)',  # active queue
+        'ix_complaint_live_assignee_status_date (assigned_to=? AND status=?',  # archive
+    ))
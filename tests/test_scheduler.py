@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import JobRun
+from app.scheduler import Cron, Scheduler, acquire_lease, jobs_cli, parse_trigger, release_lease
+
+NOW = datetime(2026, 3, 10, 12, 0)  # a Tuesday
+
+
+@pytest.mark.parametrize('expression, expected', [
+    ('0 2 * * *', datetime(2026, 3, 11, 2, 0)),
+    ('*/15 * * * *', datetime(2026, 3, 10, 12, 15)),
+    ('30 9-17 * * 1-5', datetime(2026, 3, 10, 12, 30)),
+    ('0 0 * * 0', datetime(2026, 3, 15, 0, 0)),
+    ('0 0 1 1 *', datetime(2027, 1, 1, 0, 0)),
+    ('0 0 13 * 5', datetime(2026, 3, 13, 0, 0)),  # day or weekday, like cron
+])
+def test_cron_next_after(expression, expected):
+    assert Cron(expression).next_after(NOW) == expected
+
+
+def test_parse_trigger():
+    assert str(parse_trigger('every 90m')) == 'every 90m'
+    assert parse_trigger('every 6h').next_after(NOW) == NOW + timedelta(hours=6)
+    for bad in ('every 6x', '0 25 * * *', '* * *'):
+        with pytest.raises(ValueError):
+            parse_trigger(bad)
+
+
+def test_lease_is_exclusive_until_released_or_expired(app):
+    assert acquire_lease('job', 'worker-1', 60, NOW)
+    assert not acquire_lease('job', 'worker-2', 60, NOW)
+    assert acquire_lease('job', 'worker-2', 60, NOW + timedelta(seconds=61))
+
+    release_lease('job', 'worker-2')
+    assert acquire_lease('job', 'worker-1', 60)
+
+
+def test_run_pending_runs_due_jobs_once(app):
+    calls = []
+    scheduler = Scheduler()
+    scheduler.register('count', 'every 1h', lambda: calls.append(1) or 'counted')
+
+    assert [run.status for run in scheduler.run_pending(NOW)] == ['success']
+    assert scheduler.run_pending(NOW + timedelta(minutes=30)) == []
+    assert len(scheduler.run_pending(NOW + timedelta(hours=1))) == 1
+    assert len(calls) == 2
+
+    runs = JobRun.query.order_by(JobRun.started_at).all()
+    assert [run.summary for run in runs] == ['counted', 'counted']
+    assert all(run.duration is not None and run.finished_at >= run.started_at for run in runs)
+
+
+def test_job_is_skipped_while_another_process_holds_its_lease(app):
+    calls = []
+    scheduler = Scheduler()
+    scheduler.register('count', 'every 1h', lambda: calls.append(1))
+    assert acquire_lease('count', 'other-host:1', 600, NOW)
+
+    assert scheduler.run_pending(NOW) == []
+    assert scheduler.run('count', now=NOW) is None
+    assert calls == []
+
+
+def test_failed_runs_are_recorded(app):
+    scheduler = Scheduler()
+
+    def broken():
+        raise RuntimeError('boom')
+
+    scheduler.register('broken', 'every 1h', broken)
+    run = scheduler.run('broken', now=NOW)
+
+    assert run.status == 'failed' and 'RuntimeError: boom' in run.error
+    # The lease is released, so it can be retried straight away
+    assert scheduler.run('broken', now=NOW) is not None
+
+
+def test_cli_lists_and_runs_escalation(app):
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(jobs_cli, ['list'])
+    assert result.exit_code == 0
+    assert 'escalate  [0 2 * * *]  last: never' in result.output
+
+    result = runner.invoke(jobs_cli, ['run', 'escalate'])
+    assert result.exit_code == 0
+    assert 'escalate: success' in result.output and '0 escalated' in result.output
+    assert db.session.query(JobRun).filter_by(job='escalate', trigger='manual').count() == 1
@@ -0,0 +1,27 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def test_schema_create_is_idempotent(app):
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['schema', 'create'])
+    assert result.exit_code == 0
+    assert 'All tables already exist.' in result.output
+
+
+def test_importing_run_does_not_touch_the_database(tmp_path):
+    database = tmp_path / 'import.db'
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{database}', SCHEDULER_ENABLED='0')
+    subprocess.run([sys.executable, '-c', 'import run'], cwd=ROOT, env=env, check=True)
+    assert not database.exists()
+
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'run', 'schema', 'create'], cwd=ROOT, env=env,
+                   check=True, capture_output=True)
+    connection = sqlite3.connect(database)
+    tables = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    connection.close()
+    assert {'user', 'complaint', 'complaint_history'} <= tables
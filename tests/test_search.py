@@ -0,0 +1,70 @@
+from app import db
+from app import search
+from app.models import Complaint
+
+
+def _seed(user):
+    complaints = [
+        Complaint(title='Projector broken', category='Electricity', description='The projector in lab 3 flickers',
+                  location='Lab 3', author=user),
+        Complaint(title='Water leak', category='Water Supply', description='Leak near the <b>projector</b> room',
+                  location='Block B', author=user),
+        Complaint(title='Pothole', category='Roads & Streets', description='Deep pothole at the gate',
+                  location='Main gate', author=user),
+    ]
+    db.session.add_all(complaints)
+    db.session.commit()
+    return complaints
+
+
+def _titles(search_term):
+    query = search.apply(Complaint.query, search_term)
+    return [c.title for c in query.order_by(Complaint.date_posted.desc()).all()]
+
+
+def test_search_matches_all_columns_by_prefix_and_rank(app, make_user):
+    _seed(make_user('alice'))
+    assert search.fts_enabled()
+
+    # Title and description hits rank above a description-only hit
+    assert _titles('proj') == ['Projector broken', 'Water leak']
+    assert _titles('main gate') == ['Pothole']
+    assert _titles('projector gate') == []
+
+
+def test_index_follows_edits_and_deletes(app, make_user):
+    projector, leak, _ = _seed(make_user('alice'))
+
+    projector.title = 'Screen broken'
+    projector.description = 'Display is dead'
+    db.session.delete(leak)
+    db.session.commit()
+
+    assert _titles('projector') == []
+    assert _titles('screen') == ['Screen broken']
+
+
+def test_snippets_highlight_matches_and_escape_content(app, make_user):
+    _, leak, _ = _seed(make_user('alice'))
+
+    snippets = search.snippets([leak.id], 'projector')
+    assert '<mark>projector</mark>' in snippets[leak.id]
+    assert '&lt;b&gt;' in snippets[leak.id]
+
+
+def test_like_fallback_without_fts(app, monkeypatch, make_user):
+    _seed(make_user('alice'))
+    monkeypatch.setattr(search, 'fts_enabled', lambda: False)
+
+    assert sorted(_titles('projector')) == ['Projector broken', 'Water leak']
+    assert search.snippets([1], 'projector') == {}
+
+
+def test_student_dashboard_search(app, client, make_user, login):
+    complaints = _seed(make_user('alice'))
+    login(client, complaints[0].user_id)
+
+    response = client.get('/dashboard?search=pothole')
+    assert response.status_code == 200
+    assert b'<mark>Pothole</mark>' in response.data
+    assert b'Water leak' not in response.data
@@ -0,0 +1,81 @@
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app import search as complaint_search
+from app import stats
+from app.models import User, Complaint, ComplaintHistory
+from app.passwords import check_password
+from app import seed
+from app.seed import Generator
+
+ANCHOR = datetime(2026, 1, 1)
+
+
+def test_generator_is_reproducible():
+    first = list(Generator(seed=7, anchor=ANCHOR).complaints(200, [10, 11], [2, 3, 4]))
+    second = list(Generator(seed=7, anchor=ANCHOR).complaints(200, [10, 11], [2, 3, 4]))
+    other = list(Generator(seed=8, anchor=ANCHOR).complaints(200, [10, 11], [2, 3, 4]))
+    assert first == second
+    assert first != other
+
+
+def test_seed_command_loads_consistent_data(app):
+    result = app.test_cli_runner().invoke(args=['seed', 'synthetic', '--users', '20', '--staff', '4',
+                                                '--complaints', '2000', '--batch-size', '300',
+                                                '--commit-every', '600', '--anchor', '2026-01-01'])
+    assert result.exit_code == 0, result.output
+    assert 'Seeded 25 users, 2000 complaints' in result.output
+
+    assert User.query.filter_by(role='staff').count() == 4
+    # One bcrypt hash per role, shared by every account
+    students = User.query.filter_by(role='student').all()
+    assert len({student.password for student in students}) == 1
+    assert check_password(students[0].password, 'student123')
+
+    complaints = Complaint.query.all()
+    assert len({c.category for c in complaints}) == 6
+    assert {c.status for c in complaints} >= {'Pending', 'In Progress', 'Resolved', 'Escalated'}
+    assert all(c.date_posted <= ANCHOR and c.date_updated >= c.date_posted for c in complaints)
+    resolved = [c for c in complaints if c.status == 'Resolved']
+    assert all(c.history[-1].new_status == 'Resolved' for c in resolved[:50])
+    assert ComplaintHistory.query.count() > len(resolved)
+
+    # Counters, indexes and the search index are all rebuilt after the load
+    assert not stats.find_mismatches()
+    indexes = db.session.execute(db.text("SELECT name FROM sqlite_master WHERE type = 'index' "
+                                         "AND tbl_name = 'complaint'")).scalars().all()
+    assert 'ix_complaint_live_date_posted' in indexes
+    if complaint_search.fts_enabled():
+        assert complaint_search.apply(Complaint.query, 'pothole').count() == \
+            Complaint.query.filter(Complaint.title.like('Pothole%')).count()
+        db.session.add(Complaint(title='Unique zeppelin', category='Other', description='x', location='y',
+                                 user_id=students[0].id))
+        db.session.commit()
+        assert complaint_search.apply(Complaint.query, 'zeppelin').count() == 1
+
+
+def test_seed_refuses_a_populated_database(app):
+    db.session.add(User(username='admin', email='admin@asmedu.org', password='x', role='admin'))
+    db.session.commit()
+    result = app.test_cli_runner().invoke(args=['seed', 'synthetic', '--complaints', '10'])
+    assert result.exit_code != 0
+    assert 'already has users' in result.output
+
+
+def test_seed_failure_leaves_committed_batches_counted(app, monkeypatch):
+    complaints = Generator.complaints
+
+    def _fail_partway(self, count, student_ids, staff_ids):
+        for i, row in enumerate(complaints(self, count, student_ids, staff_ids)):
+            if i == 250:
+                raise RuntimeError('disk full')
+            yield row
+
+    monkeypatch.setattr(Generator, 'complaints', _fail_partway)
+    with pytest.raises(RuntimeError):
+        seed.seed_synthetic(users=5, staff=2, complaints=1000, anchor=ANCHOR, batch_size=50, commit_every=100)
+
+    assert Complaint.query.count() == 200
+    assert not stats.find_mismatches()
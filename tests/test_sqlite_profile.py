@@ -0,0 +1,54 @@
+import sqlite3
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app import create_app, db
+from app.models import Complaint
+from app.sqlite_profile import current_pragmas
+from config import Config
+
+
+@pytest.fixture
+def file_app(tmp_path):
+    class FileConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'profile.db')
+        SCHEDULER_ENABLED = False
+
+    app = create_app(FileConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_pragmas_applied_to_pooled_connections(file_app):
+    pragmas = current_pragmas(['journal_mode', 'busy_timeout', 'synchronous', 'foreign_keys', 'mmap_size'])
+    assert pragmas == {'journal_mode': 'wal', 'busy_timeout': 15000, 'synchronous': 1,
+                       'foreign_keys': 1, 'mmap_size': 268435456}
+
+
+def test_readers_are_not_blocked_by_a_writer(file_app, make_user):
+    make_user('alice')
+
+    # Another process holds the write lock mid-transaction...
+    writer = sqlite3.connect(db.engine.url.database, isolation_level=None)
+    writer.execute('BEGIN IMMEDIATE')
+    writer.execute("UPDATE user SET role = 'staff'")
+    try:
+        # ...and this worker still reads the last committed state at once
+        with db.engine.connect() as connection:
+            connection.exec_driver_sql('PRAGMA busy_timeout = 0')
+            assert connection.exec_driver_sql('SELECT role FROM user').scalar() == 'student'
+    finally:
+        writer.execute('ROLLBACK')
+        writer.close()
+
+
+def test_foreign_keys_are_enforced(file_app):
+    db.session.add(Complaint(title='Orphan', category='Other', description='x', location='y', user_id=999))
+    with pytest.raises(IntegrityError):
+        db.session.commit()
+    db.session.rollback()
@@ -0,0 +1,68 @@
+import re
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import Complaint
+
+
+@pytest.fixture
+def staff_user(app, make_user):
+    staff = make_user('maintenance', role='staff')
+    student = make_user('alice')
+
+    now = datetime.utcnow()
+    rows = [
+        # title, priority, status, age in days
+        ('Old low', 'Low', 'In Progress', 9),
+        ('New high', 'High', 'In Progress', 1),
+        ('Old high', 'High', 'Escalated', 5),
+        ('Medium', 'Medium', 'In Progress', 3),
+        ('Done 1', 'High', 'Resolved', 20),
+        ('Done 2', 'Low', 'Resolved', 30),
+        ('Gone', 'High', 'In Progress', 2),
+    ]
+    for title, priority, status, age in rows:
+        db.session.add(Complaint(title=title, category='Other', description='x', location='Campus',
+                                 priority=priority, status=status, author=student, assignee=staff,
+                                 date_posted=now - timedelta(days=age), is_deleted=(title == 'Gone')))
+    db.session.commit()
+    return staff
+
+
+def _queue_titles(html):
+    queue = html.split('Resolved Archive')[0]
+    return re.findall(r'<h5 class="card-title text-truncate" title="([^"]+)"', queue)
+
+
+def test_queue_orders_by_priority_then_age(client, staff_user, login):
+    login(client, staff_user)
+    html = client.get('/staff/dashboard').get_data(as_text=True)
+
+    assert _queue_titles(html) == ['Old high', 'New high', 'Medium', 'Old low']
+    archive = html.split('Resolved Archive')[1]
+    assert archive.index('Done 1') < archive.index('Done 2')
+    assert 'Gone' not in html
+    assert 'In Progress: 3' in html
+    assert 'Escalated: 1' in html
+    assert 'Resolved: 2' in html
+
+
+def test_queue_is_capped(app, client, staff_user, login):
+    app.config['STAFF_QUEUE_LIMIT'] = 3
+    login(client, staff_user)
+    html = client.get('/staff/dashboard').get_data(as_text=True)
+
+    assert _queue_titles(html) == ['Old high', 'New high', 'Medium']
+    assert 'Showing the 3 most urgent of 4 open tasks.' in html
+
+
+def test_unexpected_priorities_are_queued_last(client, staff_user, login):
+    complaint = Complaint.query.filter_by(title='Old low').one()
+    complaint.priority = 'Urgent'
+    db.session.commit()
+
+    login(client, staff_user)
+    html = client.get('/staff/dashboard').get_data(as_text=True)
+    assert _queue_titles(html) == ['Old high', 'New high', 'Medium', 'Old low']
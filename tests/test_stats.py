@@ -0,0 +1,168 @@
+from datetime import datetime, timedelta
+
+from app import db
+from app import stats
+from app.models import Complaint, ComplaintStat
+
+
+def _make_complaint(user, category='Electricity', **kwargs):
+    complaint = Complaint(title='Broken light', category=category, description='Flickers',
+                          location='Block A', author=user, **kwargs)
+    db.session.add(complaint)
+    db.session.commit()
+    return complaint
+
+
+def test_counters_follow_complaint_lifecycle(app, make_user):
+    student = make_user('alice')
+    staff = make_user('bob', role='staff')
+
+    first = _make_complaint(student)
+    second = _make_complaint(student, category='Water Supply')
+    third = _make_complaint(student)
+
+    # Assignment
+    first.assigned_to = staff.id
+    first.status = 'In Progress'
+    db.session.commit()
+
+    # Student edit changes the category
+    second.category = 'Electricity'
+    db.session.commit()
+
+    # Staff resolves, admin soft deletes
+    first.status = 'Resolved'
+    third.is_deleted = True
+    db.session.commit()
+
+    status_counts, category_counts = stats.dashboard_counts()
+    assert status_counts == {'Pending': 1, 'In Progress': 0, 'Resolved': 1}
+    assert category_counts == {'Electricity': 2}
+    assert stats.find_mismatches() == {}
+
+    db.session.delete(second)
+    db.session.commit()
+    assert stats.dashboard_counts()[0]['Pending'] == 0
+    assert stats.find_mismatches() == {}
+
+
+def test_counters_survive_expired_attributes(app, make_user):
+    student = make_user('alice')
+    complaint = _make_complaint(student)
+
+    # After commit every attribute is expired; the old status must still be seen
+    complaint.status = 'Resolved'
+    db.session.commit()
+
+    assert stats.find_mismatches() == {}
+
+
+def test_rebuild_and_check_commands(app, make_user):
+    student = make_user('alice')
+    _make_complaint(student)
+    _make_complaint(student, category='Other')
+
+    db.session.execute(ComplaintStat.__table__.update().values(count=7))
+    db.session.commit()
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['stats', 'check'])
+    assert result.exit_code == 1
+    assert 'stored 7, actual 1' in result.output
+
+    result = runner.invoke(args=['stats', 'rebuild'])
+    assert result.exit_code == 0
+    result = runner.invoke(args=['stats', 'check'])
+    assert result.exit_code == 0
+    assert stats.dashboard_counts()[1] == {'Electricity': 1, 'Other': 1}
+
+
+def test_admin_dashboard_reads_counters(app, client, make_user, login):
+    admin = make_user('admin', role='admin')
+    student = make_user('alice')
+    _make_complaint(student)
+
+    login(client, admin)
+
+    response = client.get('/admin/dashboard')
+    assert response.status_code == 200
+    assert b'/admin/api/stats' in response.data
+
+    response = client.get('/admin/api/stats')
+    assert response.json['status']['Pending'] == 1
+    assert response.json['category'] == {'Electricity': 1}
+
+
+def test_stats_api_window_and_validators(app, client, make_user, login):
+    admin = make_user('admin', role='admin')
+    student = make_user('alice')
+    _make_complaint(student, date_posted=datetime.utcnow() - timedelta(days=40))
+    _make_complaint(student, category='Water Supply', status='Resolved')
+
+    login(client, admin)
+
+    response = client.get('/admin/api/stats')
+    assert response.status_code == 200
+    assert response.json['total'] == 2
+    assert response.headers['Cache-Control'] == 'private, max-age=30'
+
+    recent = client.get('/admin/api/stats?days=30').json
+    assert recent == {'days': 30, 'total': 1, 'category': {'Water Supply': 1},
+                      'status': {'Pending': 0, 'In Progress': 0, 'Resolved': 1}}
+
+    etag = response.headers['ETag']
+    assert client.get('/admin/api/stats', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/admin/api/stats?days=0').status_code == 400
+    assert client.get('/admin/api/stats?days=week').status_code == 400
+
+
+def test_stats_api_cache_expires_and_follows_local_writes(app, client, make_user, login):
+    admin = make_user('admin', role='admin')
+    student = make_user('alice')
+    complaint = _make_complaint(student)
+    cache = app.extensions['stats_cache']
+    clock = [0.0]
+    cache.clock = lambda: clock[0]
+
+    login(client, admin)
+    first = client.get('/admin/api/stats')
+
+    # Another worker's write is not seen until the entry expires
+    db.session.execute(ComplaintStat.__table__.update().values(count=ComplaintStat.count + 5))
+    db.session.commit()
+    assert client.get('/admin/api/stats').headers['ETag'] == first.headers['ETag']
+    clock[0] += 31
+    assert client.get('/admin/api/stats').json['total'] == 6
+
+    # A write through this process's session clears the cache at once
+    complaint.status = 'Resolved'
+    db.session.commit()
+    assert client.get('/admin/api/stats').json['status']['Resolved'] == 1
+    assert cache.hits == 1
+
+
+def test_cache_is_cleared_on_commit_not_on_flush(app, make_user):
+    student = make_user('alice')
+    complaint = _make_complaint(student)
+    cache = app.extensions['stats_cache']
+
+    complaint.status = 'Resolved'
+    db.session.flush()
+    # Another request thread, which cannot see the flush yet, refills the cache...
+    cache.put(None, 'stale')
+    db.session.commit()
+    # ...and the commit throws its entry away
+    assert cache.get(None) is None
+
+    complaint.status = 'Pending'
+    db.session.flush()
+    cache.put(None, 'current')
+    db.session.rollback()
+    db.session.commit()
+    assert cache.get(None) == 'current'
+
+
+def test_stats_api_requires_admin(app, client, make_user, login):
+    student = make_user('alice')
+    login(client, student)
+    assert client.get('/admin/api/stats').status_code == 302
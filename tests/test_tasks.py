@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+
+from app import db
+from app import stats
+from app.models import Complaint, ComplaintHistory
+from app.query_counter import QueryCounter
+from app.tasks import escalate_overdue, tasks_cli
+
+NOW = datetime(2026, 3, 10, 12, 0)
+
+
+def _seed(student):
+    rows = [
+        # title, category, priority, status, age in days
+        ('Old pending', 'Electricity', 'Low', 'Pending', 5),
+        ('Old in progress', 'Water Supply', 'Medium', 'In Progress', 4),
+        ('Recent pending', 'Electricity', 'Low', 'Pending', 1),
+        ('Recent high', 'Water Supply', 'High', 'Pending', 2),
+        ('Old resolved', 'Electricity', 'Low', 'Resolved', 9),
+        ('Old escalated', 'Electricity', 'Low', 'Escalated', 9),
+        ('Old deleted', 'Electricity', 'Low', 'Pending', 9),
+    ]
+    for title, category, priority, status, age in rows:
+        db.session.add(Complaint(title=title, category=category, priority=priority, status=status,
+                                 description='x', location='Block A', author=student,
+                                 date_posted=NOW - timedelta(days=age),
+                                 is_deleted=(title == 'Old deleted')))
+    db.session.commit()
+
+
+def _statuses():
+    return dict(db.session.execute(db.select(Complaint.title, Complaint.status)).all())
+
+
+def test_escalates_overdue_complaints_in_batches(app, make_user):
+    _seed(make_user('alice'))
+
+    report = escalate_overdue(now=NOW, batch_size=1)
+
+    assert report.escalated == 2
+    assert report.batches == 2
+    assert report.by_category == {'Electricity': 1, 'Water Supply': 1}
+    statuses = _statuses()
+    assert statuses['Old pending'] == statuses['Old in progress'] == 'Escalated'
+    assert statuses['Recent pending'] == statuses['Recent high'] == 'Pending'
+    assert statuses['Old resolved'] == 'Resolved'
+    assert statuses['Old deleted'] == 'Pending'
+
+    history = {(h.complaint.title, h.old_status, h.new_status, h.changed_by)
+               for h in ComplaintHistory.query.all()}
+    assert history == {('Old pending', 'Pending', 'Escalated', None),
+                       ('Old in progress', 'In Progress', 'Escalated', None)}
+
+    # Bulk statements bypass the flush hook; the counters must still agree
+    assert stats.find_mismatches() == {}
+
+    # A second run finds nothing left to do
+    assert escalate_overdue(now=NOW).escalated == 0
+
+
+def test_batch_statement_count_does_not_grow_with_rows(app, make_user):
+    _seed(make_user('alice'))
+    with QueryCounter() as counter:
+        escalate_overdue(now=NOW, batch_size=500)
+    # id lookup, history insert, grouping, update, counters, final empty lookup
+    assert counter.count <= 6
+
+
+def test_thresholds_per_category_and_priority(app, make_user):
+    app.config['ESCALATION_THRESHOLDS'] = {
+        (None, 'High'): 1,
+        ('Water Supply', None): 10,
+        ('Water Supply', 'High'): 1,
+    }
+    _seed(make_user('alice'))
+
+    report = escalate_overdue(now=NOW)
+
+    statuses = _statuses()
+    assert statuses['Recent high'] == 'Escalated'  # category + priority rule wins
+    assert statuses['Old in progress'] == 'In Progress'  # category rule: 10 days
+    assert statuses['Old pending'] == 'Escalated'  # default: 3 days
+    assert report.escalated == 2
+
+
+def test_dry_run_reports_without_writing(app, make_user):
+    _seed(make_user('alice'))
+
+    report = escalate_overdue(now=NOW, dry_run=True)
+
+    assert report.dry_run and report.escalated == 2
+    assert report.by_category == {'Electricity': 1, 'Water Supply': 1}
+    assert _statuses()['Old pending'] == 'Pending'
+    assert ComplaintHistory.query.count() == 0
+
+
+def test_cli_dry_run(app, make_user):
+    _seed(make_user('alice'))
+    app.config['ESCALATION_THRESHOLD_DAYS'] = 0
+
+    result = app.test_cli_runner().invoke(tasks_cli, ['escalate', '--dry-run'])
+
+    assert result.exit_code == 0
+    assert 'Would escalate 4 complaints' in result.output
+    assert 'Electricity: 2' in result.output
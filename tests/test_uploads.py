@@ -0,0 +1,155 @@
+import hashlib
+import io
+import os
+import time
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from app import db
+from app import uploads
+from app.models import Complaint, Upload
+
+
+@pytest.fixture
+def folder(app, tmp_path):
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+    app.config['IMAGE_VARIANTS'] = {'thumb': 320}
+    return tmp_path
+
+
+def _file(data, name='photo.jpg'):
+    return FileStorage(stream=io.BytesIO(data), filename=name)
+
+
+def _refcounts():
+    return {u.filename: u.ref_count for u in Upload.query.all()}
+
+
+def _complaint(author, image_file):
+    complaint = Complaint(title='Leak', category='Water Supply', description='Drips', location='Block B',
+                          author=author, image_file=image_file)
+    db.session.add(complaint)
+    db.session.commit()
+    return complaint
+
+
+def test_identical_uploads_are_stored_once(folder):
+    data = b'\xff\xd8not really a jpeg' * 10000  # several chunks
+
+    first = uploads.store(_file(data), '.jpg')
+    second = uploads.store(_file(data, 'copy.JPEG'), '.JPEG')
+
+    assert first == second == hashlib.sha256(data).hexdigest() + '.jpg'
+    assert os.listdir(folder) == [first]
+    assert (folder / first).read_bytes() == data
+    assert uploads.store(_file(b'other'), '.png') != first
+
+
+def test_reference_counts_follow_complaints(app, folder, make_user):
+    student = make_user('alice')
+    first = _complaint(student, 'a.jpg')
+    second = _complaint(student, 'a.jpg')
+    _complaint(student, None)
+    assert _refcounts() == {'a.jpg': 2}
+
+    # Re-submitting a different photo moves the reference
+    second.image_file = 'b.jpg'
+    db.session.commit()
+    assert _refcounts() == {'a.jpg': 1, 'b.jpg': 1}
+
+    db.session.delete(first)
+    db.session.commit()
+    assert _refcounts() == {'a.jpg': 0, 'b.jpg': 1}
+
+    assert uploads.recount() == 1
+    assert _refcounts() == {'b.jpg': 1}
+
+
+def test_gc_removes_old_orphans_and_their_variants(app, folder, make_user):
+    student = make_user('alice')
+    _complaint(student, 'kept.jpg')
+    for name in ('kept.jpg', 'kept.thumb.jpg', 'orphan.jpg', 'orphan.thumb.jpg', '.upload-crashed', 'fresh.jpg'):
+        (folder / name).write_bytes(b'x' * 100)
+    an_hour_ago = time.time() - 7200
+    for name in ('kept.jpg', 'kept.thumb.jpg', 'orphan.jpg', 'orphan.thumb.jpg', '.upload-crashed'):
+        os.utime(folder / name, (an_hour_ago, an_hour_ago))
+
+    report = uploads.collect_garbage(grace=3600, dry_run=True)
+    assert (report.files, report.bytes) == (3, 300)
+    assert len(os.listdir(folder)) == 6
+
+    report = uploads.collect_garbage(grace=3600)
+    assert (report.files, report.bytes) == (3, 300)
+    assert sorted(os.listdir(folder)) == ['fresh.jpg', 'kept.jpg', 'kept.thumb.jpg']
+
+
+def test_gc_command_reports_reclaimed_space(app, folder):
+    (folder / 'orphan.jpg').write_bytes(b'x' * 2048)
+
+    result = app.test_cli_runner().invoke(uploads.uploads_cli, ['gc', '--grace', '0'])
+
+    assert result.exit_code == 0
+    assert 'Removed 1 files, reclaiming 0.0 MB (2048 bytes).' in result.output
+
+
+HASHED = 'ab' * 32 + '.jpg'
+
+
+@pytest.fixture
+def logged_in(app, client, folder, make_user, login):
+    login(client, make_user('alice'))
+    (folder / HASHED).write_bytes(bytes(range(256)) * 4)
+    return client
+
+
+def _assert_cacheable(response):
+    assert set(response.headers['Cache-Control'].split(', ')) == {'private', 'max-age=31536000', 'immutable'}
+
+
+def test_direct_mode_sends_validators_and_ranges(logged_in):
+    response = logged_in.get(f'/uploads/{HASHED}')
+    assert response.status_code == 200 and len(response.data) == 1024
+    assert response.headers['ETag'] == f'"{"ab" * 32}"'
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    _assert_cacheable(response)
+
+    response = logged_in.get(f'/uploads/{HASHED}', headers={'If-None-Match': f'"{"ab" * 32}"'})
+    assert response.status_code == 304 and response.data == b''
+    _assert_cacheable(response)
+
+    response = logged_in.get(f'/uploads/{HASHED}', headers={'Range': 'bytes=10-19'})
+    assert response.status_code == 206
+    assert response.headers['Content-Range'] == 'bytes 10-19/1024'
+    assert response.data == bytes(range(10, 20))
+
+    assert logged_in.get('/uploads/missing.jpg').status_code == 404
+
+
+def test_x_accel_mode_leaves_the_body_to_nginx(app, logged_in):
+    app.config['UPLOAD_SEND_MODE'] = 'x-accel'
+
+    response = logged_in.get(f'/uploads/{HASHED}')
+    assert response.status_code == 200 and response.data == b''
+    assert response.headers['X-Accel-Redirect'] == f'/protected-uploads/{HASHED}'
+    assert response.headers['Content-Type'] == 'image/jpeg'
+    _assert_cacheable(response)
+
+    response = logged_in.get(f'/uploads/{HASHED}', headers={'If-None-Match': f'"{"ab" * 32}"'})
+    assert response.status_code == 304
+    assert 'X-Accel-Redirect' not in response.headers
+
+
+def test_x_sendfile_mode(app, logged_in, folder):
+    app.config['UPLOAD_SEND_MODE'] = 'x-sendfile'
+
+    response = logged_in.get(f'/uploads/{HASHED}')
+    assert response.headers['X-Sendfile'] == str(folder / HASHED)
+    assert response.data == b''
+
+
+def test_uploads_require_login(client, folder):
+    (folder / HASHED).write_bytes(b'secret')
+    response = client.get(f'/uploads/{HASHED}')
+    assert response.status_code == 302
+    assert 'X-Accel-Redirect' not in response.headers
@@ -6,6 +6,7 @@ Run this script to view all database contents in a readable format.
 
 from app import create_app, db
 from app.models import User, Complaint
+from sqlalchemy.orm import joinedload
 
 app = create_app()
 
@@ -25,7 +26,7 @@ def view_database():
         # Complaints
         print("\n📋 COMPLAINTS:")
         print("-" * 40)
-        complaints = Complaint.query.all()
+        complaints = Complaint.query.options(joinedload(Complaint.assignee).load_only(User.username)).all()
         if not complaints:
             print("No complaints found.")
         else: